@@ -0,0 +1,161 @@
+# macOS Cleanup Tool
+# Copyright (c) 2025 XClassicPeter
+# Licensed under the MIT License. See LICENSE for details.
+
+"""
+Classification of compiled Python bytecode. Each .pyc in a __pycache__
+folder names its source module and the interpreter that wrote it
+(mod.cpython-312.pyc): it is orphaned once the source is gone and obsolete
+once no installed interpreter uses its tag. Both kinds are dead weight that
+is never read again, unlike the rest of the cache, which Python would only
+rebuild.
+"""
+
+import os
+import re
+import sys
+import glob
+import stat
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from scanner import format_size, TARGET_WORKERS
+import metrics
+import throttle
+
+# Folders holding python3.X / pypy3.X executables besides those on PATH
+INTERPRETER_DIRS = [
+    "/usr/bin", "/usr/local/bin", "/opt/homebrew/bin", "/opt/local/bin",
+    "/Library/Frameworks/Python.framework/Versions/*/bin",
+    "/usr/local/Cellar/python@*/*/bin", "/opt/homebrew/Cellar/python@*/*/bin",
+    "~/.pyenv/versions/*/bin", "~/.local/share/uv/python/*/bin",
+    "~/miniconda3/bin", "~/anaconda3/bin", "~/miniforge3/bin", "~/mambaforge/bin",
+    "~/miniconda3/envs/*/bin", "~/anaconda3/envs/*/bin", "~/miniforge3/envs/*/bin", "~/mambaforge/envs/*/bin",
+]
+INTERPRETER_NAME = re.compile(r"^(python|pypy)(\d)\.(\d+)$")
+# Only tags of these forms are judged; anything else (graalpy, jython...) counts as live
+KNOWN_TAG = re.compile(r"^(cpython|pypy)-?\d+$")
+SOURCE_SUFFIXES = (".py", ".pyw")
+
+
+def installed_tags(dirs=INTERPRETER_DIRS):
+    """Cache tags of every interpreter found on PATH or in the usual install locations."""
+    tags = {sys.implementation.cache_tag}
+    patterns = os.environ.get("PATH", "").split(os.pathsep) + [os.path.expanduser(d) for d in dirs]
+    for pattern in patterns:
+        for directory in glob.glob(pattern) if pattern else []:
+            try:
+                names = os.listdir(directory)
+            except OSError:
+                continue
+            for name in names:
+                match = INTERPRETER_NAME.match(name)
+                if match is None:
+                    continue
+                kind, major, minor = match.groups()
+                tags.add(f"cpython-{major}{minor}" if kind == "python" else f"pypy{major}{minor}")
+    return tags
+
+
+def _parse(name):
+    """(module, tag) from a __pycache__ file name like mod.cpython-312.opt-1.pyc, or None."""
+    if not name.endswith(".pyc"):
+        return None
+    parts = name[:-4].split(".")
+    if len(parts) > 2 and parts[-1].startswith("opt-"):
+        parts = parts[:-1]
+    if len(parts) < 2:
+        return None
+    return ".".join(parts[:-1]), parts[-1]
+
+
+def classify(cache_dir, tags):
+    """
+    List one __pycache__ folder, sizing and classifying each file as it
+    goes. Returns {"fields": measure()-style totals for the whole folder,
+    "orphaned": [(path, bytes)], "obsolete": [(path, bytes)]}; a file whose
+    source is gone is orphaned whatever its tag.
+    """
+    throttle.wait()
+    try:
+        st = os.lstat(cache_dir)
+        sources = set(os.listdir(os.path.dirname(cache_dir)))
+    except OSError as e:
+        logging.getLogger(__name__).debug(f"Cannot list {cache_dir}: {e}")
+        return None
+    total = st.st_blocks * 512
+    newest_mtime = st.st_mtime
+    newest_atime = 0.0
+    files = 0
+    orphaned, obsolete = [], []
+    try:
+        with os.scandir(cache_dir) as entries:
+            for entry in entries:
+                try:
+                    st = entry.stat(follow_symlinks=False)
+                except OSError:
+                    continue
+                size = st.st_blocks * 512
+                total += size
+                newest_mtime = max(newest_mtime, st.st_mtime)
+                if not stat.S_ISREG(st.st_mode):
+                    continue
+                files += 1
+                newest_atime = max(newest_atime, st.st_atime)
+                parsed = _parse(entry.name)
+                if parsed is None:
+                    continue
+                module, tag = parsed
+                if not any(module + suffix in sources for suffix in SOURCE_SUFFIXES):
+                    orphaned.append((entry.path, size))
+                elif KNOWN_TAG.match(tag) and tag not in tags:
+                    obsolete.append((entry.path, size))
+    except OSError as e:
+        logging.getLogger(__name__).debug(f"Cannot list {cache_dir}: {e}")
+        return None
+    metrics.count(dirs=1, files=files)
+    fields = {"size": format_size(total), "bytes": total, "files": files, "mtime": newest_mtime, "atime": newest_atime}
+    return {"fields": fields, "orphaned": orphaned, "obsolete": obsolete}
+
+
+def bytecode_items(cache_dirs, category="Python Cache", workers=TARGET_WORKERS):
+    """
+    One row per __pycache__ folder, plus one "Orphaned Bytecode" and one
+    "Obsolete Bytecode" row listing just those files as members, all from a
+    single listing of each folder.
+    """
+    logger = logging.getLogger(__name__)
+    tags = installed_tags()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(lambda path: classify(path, tags), cache_dirs))
+    items = []
+    dead = {"Orphaned Bytecode": [], "Obsolete Bytecode": []}
+    for path, result in zip(cache_dirs, results):
+        if result is None or not result["fields"]["bytes"]:
+            continue
+        parent = os.path.basename(os.path.dirname(path))
+        counts = [f"{format_size(sum(s for _, s in result[k]))} {k}" for k in ("orphaned", "obsolete") if result[k]]
+        name = os.path.basename(path) + (f" in {parent} ({', '.join(counts)})" if counts else "")
+        items.append(dict({"category": category, "name": name, "short_name": os.path.basename(path), "path": path}, **result["fields"]))
+        dead["Orphaned Bytecode"].extend(result["orphaned"])
+        dead["Obsolete Bytecode"].extend(result["obsolete"])
+    for kind, files in dead.items():
+        if not files:
+            continue
+        paths = [p for p, _ in files]
+        total = sum(s for _, s in files)
+        caches = {os.path.dirname(p) for p in paths}
+        # The files are spread over unrelated folders, so the row has no path of its own; trashing it removes the members
+        items.append({
+            "category": kind,
+            "name": f"{kind} ({len(paths)} files in {len(caches)} __pycache__ folders)",
+            "short_name": kind,
+            "path": "",
+            "size": format_size(total),
+            "bytes": total,
+            "files": len(paths),
+            "reclaimable": total,
+            "members": "\n".join(sorted(paths)),
+        })
+    logger.info(f"Classified bytecode in {len(cache_dirs)} __pycache__ folders (interpreters: {', '.join(sorted(tags))})")
+    return items
@@ -0,0 +1,88 @@
+# macOS Cleanup Tool
+# Copyright (c) 2025 XClassicPeter
+# Licensed under the MIT License. See LICENSE for details.
+
+import os
+import json
+import time
+import logging
+
+import settings
+import snapshot
+
+CHECKPOINT_DIR = os.path.join(settings.CACHE_DIR, "checkpoints")
+CHECKPOINT_INTERVAL = 30  # seconds between checkpoints of a running scan
+
+
+def checkpoint_path(root):
+    return snapshot.cache_file(CHECKPOINT_DIR, root, ".ckpt")
+
+
+def save_checkpoint(root, params, items, frontier=(), state=None):
+    """
+    Persist a running scan: the parameters it was started with, the items
+    found so far and the frontier of (path, depth) pairs still to be walked.
+    """
+    logger = logging.getLogger(__name__)
+    columns = snapshot.items_to_columns(items)
+    columns["frontier_path"] = [path for path, _ in frontier]
+    columns["frontier_depth"] = [depth for _, depth in frontier]
+    meta = {
+        "root": snapshot.root_key(root),
+        "params": params,
+        "state": state or {},
+        "created": time.time(),
+        "items": len(items),
+        "frontier": len(frontier),
+    }
+    try:
+        snapshot.write_columns(checkpoint_path(root), meta, columns)
+        logger.debug(f"Checkpointed scan of {meta['root']}: {len(items)} items, {len(frontier)} pending")
+    except (OSError, ValueError) as e:
+        logger.error(f"Failed to checkpoint scan of {meta['root']}: {e}")
+
+
+def checkpoint_info(root):
+    """Return the header of root's checkpoint (created, items, frontier), or None."""
+    path = checkpoint_path(root)
+    if not os.path.exists(path):
+        return None
+    try:
+        meta, _ = snapshot.read_columns(path)
+    except (OSError, ValueError) as e:
+        logging.getLogger(__name__).error(f"Unreadable checkpoint {path}: {e}")
+        return None
+    return meta if meta.get("root") == snapshot.root_key(root) else None
+
+
+def load_checkpoint(root, params):
+    """
+    Return {"items", "frontier", "state", "created"} for root if a checkpoint
+    exists and was written with the same params, otherwise None.
+    """
+    logger = logging.getLogger(__name__)
+    path = checkpoint_path(root)
+    if not os.path.exists(path):
+        return None
+    try:
+        meta, columns = snapshot.read_columns(path)
+        if meta.get("root") != snapshot.root_key(root):
+            return None
+        if meta.get("params") != json.loads(json.dumps(params)):
+            logger.info(f"Checkpoint for {meta['root']} was made with different settings, starting over")
+            return None
+        items = snapshot.columns_to_items(columns)
+        frontier = list(zip(columns["frontier_path"], columns["frontier_depth"]))
+        return {"items": items, "frontier": frontier, "state": meta.get("state", {}), "created": meta.get("created")}
+    except (OSError, ValueError, KeyError) as e:
+        logger.error(f"Failed to load checkpoint {path}: {e}")
+        return None
+
+
+def clear_checkpoint(root):
+    try:
+        os.remove(checkpoint_path(root))
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        logging.getLogger(__name__).error(f"Failed to remove checkpoint for {snapshot.root_key(root)}: {e}")
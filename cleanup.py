@@ -6,31 +6,46 @@ import tkinter as tk
 from tkinter import ttk, messagebox
 import subprocess
 import os
+import math
 import threading
 import queue
 import shutil
 import time
 import logging
 
-from scanner import scan_system, scan_folder, get_size, CRITICAL_SYSTEM_PATHS
+from scanner import (
+    scan_system, scan_folder, list_folder, expand_folded, refine_estimates, find_largest_files, measure,
+    size_to_bytes, format_size, SizeWorker, CRITICAL_SYSTEM_PATHS
+)
 import settings
+import snapshot
+import checkpoint
+import plugin_cache
+import throttle
+from log_config import setup_logging
+from scan_tree import ScanTree
+# daemon, duplicates, history, metrics and watcher are imported where used, so startup does not load them
 
-try:
-    import send2trash
-except ImportError:
-    send2trash = None
+GROWTH_ROWS = 500  # largest changes shown by the Growth view
+LIVE_POLL_MS = 500  # how often the queue is checked for live updates once a scan is done
 
-def size_to_bytes(size_str):
-    size_str = size_str.strip()
-    if size_str == "0B":
-        return 0
+SCAN_MODES = {
+    "full": "Full",
+    "quick": "Quick (estimate)",
+    "lazy": "Lazy (size on demand)",
+}
+
+def load_send2trash():
+    """Import send2trash on first use so it does not slow down startup."""
     try:
-        multipliers = {"K": 1024, "M": 1024**2, "G": 1024**3, "T": 1024**4}
-        num = float(size_str[:-1])
-        unit = size_str[-1]
-        return int(num * multipliers.get(unit, 1))
-    except (ValueError, KeyError):
-        return 0
+        import send2trash
+    except ImportError:
+        return None
+    return send2trash
+
+def row_key(item):
+    """Identity of a row across refreshes; a folded row shares its folder's category and path."""
+    return item["category"], item["path"], bool(item.get("folded"))
 
 class CleanupApp:
     def __init__(self, root):
@@ -42,46 +57,74 @@ class CleanupApp:
         self.scan_queue = queue.Queue()
         self.is_scanning = False
         self.selected_item = None
-        self.top_level_items = []
+        self.row_items = {}
+        self.results_root = ""
+        self.showing_stale = False
+        self.stale_rows = {}
+        self.resume_scan = False
+        self.force_refresh = False
+        self.scan_stop = threading.Event()
+        self.scan_thread = None
+        self.size_worker = None
+        self.live_updater = None
+        self.scan_tree = ScanTree()
+        self.scan_depth = 3
+        self.polling_queue = False
         self.status_var = tk.StringVar()
         self.deleted_paths = []
-        self.app_settings = settings.load_settings()
+        self.app_settings = settings.get_settings()
         self.size_filter = tk.StringVar(value=self.app_settings.get("size_filter", "All"))
         self.custom_size = tk.StringVar(value="100")
         self.search_query = tk.StringVar(value="")
+        self.stale_days = tk.StringVar(value="")
         self.current_folder = self.app_settings.get("last_scan_path", os.path.expanduser("~"))
         self.max_depth = tk.IntVar(value=self.app_settings.get("max_depth", 3))
+        self.top_n = tk.IntVar(value=self.app_settings.get("top_n", 0))
+        self.throttle_ops = tk.IntVar(value=self.app_settings.get("throttle_ops", 0))
+        self.scan_mode = tk.StringVar(value=SCAN_MODES.get(self.app_settings.get("scan_mode", "full"), SCAN_MODES["full"]))
         self.exclusions = tk.StringVar(value=self.app_settings.get("exclusions", ""))
         self.dark_mode = self.app_settings.get("dark_mode", "auto")
         self.sort_column = self.app_settings.get("sort_column", "size")
         self.sort_descending = self.app_settings.get("sort_descending", True)
         # Initialize logging
-        logging.basicConfig(
-            level=logging.INFO,
-            format="%(asctime)s [%(levelname)s] %(message)s",
-            handlers=[
-                logging.FileHandler("cleanup.log"),
-                logging.StreamHandler()
-            ]
-        )
+        setup_logging(self.app_settings)
         self.logger = logging.getLogger(__name__)
         self.logger.info("Application started")
+        if self.throttle_ops.get():
+            throttle.configure(self.throttle_ops.get())
         self.create_ui()
+        self.show_cached_results()
         self.update_button_states()
         self.set_status(f"Viewing {self.current_folder}")
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
         self.root.after(100, self.start_scan)
 
+    def on_close(self):
+        """Stop a running scan at its next checkpoint so it can be resumed later."""
+        if self.size_worker:
+            self.size_worker.stop()
+        self.stop_live_updates()
+        if self.is_scanning:
+            self.scan_stop.set()
+            self.scan_thread.join(timeout=5)
+            self.logger.info("Scan interrupted by window close")
+        settings.flush()
+        self.root.destroy()
+
     def save_settings(self):
         self.app_settings["last_scan_path"] = self.current_folder
         self.app_settings["size_filter"] = self.size_filter.get()
         self.app_settings["max_depth"] = self.max_depth.get()
+        self.app_settings["top_n"] = self.top_n.get()
+        self.app_settings["throttle_ops"] = self.throttle_ops.get()
+        self.app_settings["scan_mode"] = self.get_scan_mode()
         self.app_settings["exclusions"] = self.exclusions.get()
         self.app_settings["dark_mode"] = self.dark_mode
         self.app_settings["sort_column"] = self.sort_column
         self.app_settings["sort_descending"] = self.sort_descending
         self.app_settings["plugins"] = self.app_settings.get("plugins", {})
-        settings.save_settings(self.app_settings)
-        self.logger.info("Settings saved")
+        settings.schedule_save()
+        self.logger.debug("Settings changed")
 
     def get_free_space(self):
         try:
@@ -174,6 +217,12 @@ class CleanupApp:
         actions_frame.pack(side="left", padx=5)
         self.scan_btn = ttk.Button(actions_frame, text="Scan System", command=self.start_system_scan)
         self.scan_btn.pack(side="left", padx=2)
+        self.largest_btn = ttk.Button(actions_frame, text="Largest Files", command=self.find_largest_files)
+        self.largest_btn.pack(side="left", padx=2)
+        self.duplicates_btn = ttk.Button(actions_frame, text="Duplicates", command=self.find_duplicates)
+        self.duplicates_btn.pack(side="left", padx=2)
+        self.growth_btn = ttk.Button(actions_frame, text="Growth", command=self.show_growth)
+        self.growth_btn.pack(side="left", padx=2)
         self.actions_btn = ttk.Button(actions_frame, text="Actions", command=self.show_actions_menu)
         self.actions_btn.pack(side="left", padx=2)
         self.undo_btn = ttk.Button(actions_frame, text="🗑️ Undo", command=self.undo_last_delete)
@@ -200,6 +249,11 @@ class CleanupApp:
         self.size_entry.pack(side="left")
         self.size_entry.bind("<FocusOut>", lambda e: self.on_filter_change())
         self.size_entry.bind("<Return>", lambda e: self.on_filter_change())
+        ttk.Label(filter_frame, text="Stale (days):", font=('Helvetica', 9)).pack(side="left", padx=(5, 2))
+        self.stale_entry = ttk.Entry(filter_frame, textvariable=self.stale_days, width=4)
+        self.stale_entry.pack(side="left")
+        self.stale_entry.bind("<FocusOut>", lambda e: self.on_filter_change())
+        self.stale_entry.bind("<Return>", lambda e: self.on_filter_change())
         ttk.Label(filter_frame, text="Search:", font=('Helvetica', 9)).pack(side="left", padx=(5, 2))
         self.search_entry = ttk.Entry(filter_frame, textvariable=self.search_query, width=15)
         self.search_entry.pack(side="left")
@@ -217,20 +271,25 @@ class CleanupApp:
         hint_label.pack(fill="x", pady=(0, 5))
 
         # Treeview
-        columns = ("category", "name", "path", "size")
+        columns = ("category", "name", "path", "size", "files", "modified")
         column_headings = {
             "category": "Category",
             "name": "Name",
             "path": "Path",
-            "size": "Size"
+            "size": "Size",
+            "files": "Files",
+            "modified": "Last modified"
         }
         self.tree = ttk.Treeview(main_frame, columns=columns, show="headings")
         for col in columns:
             self.tree.heading(col, text=column_headings[col], command=lambda c=col: self.sort_by_column(c, False))
-            self.tree.column(col, width=160 if col != "size" else 100, stretch=True)
+            self.tree.column(col, width=160 if col not in ("size", "files", "modified") else 100, stretch=True)
         self.tree.pack(fill="both", expand=True)
+        self.tree.configure(yscrollcommand=lambda first, last: self.request_visible_sizes())
         self.tree.tag_configure('oddrow', background=oddrow_bg)
         self.tree.tag_configure('evenrow', background=evenrow_bg)
+        self.tree.tag_configure('stale', foreground='#888888')
+        self.tree.tag_configure('folded', font=('Helvetica', 10, 'italic'))
 
         # Bottom frame
         bottom_frame = ttk.Frame(main_frame)
@@ -244,6 +303,29 @@ class CleanupApp:
         self.depth_spin.pack(side="left", padx=2)
         self.depth_spin.bind("<FocusOut>", lambda e: self.on_depth_change())
         self.depth_spin.bind("<Return>", lambda e: self.on_depth_change())
+        ttk.Label(settings_frame, text="Top N:", font=('Helvetica', 9)).pack(side="left", padx=(5, 2))
+        self.top_n_spin = tk.Spinbox(settings_frame, from_=0, to=1000, width=4, textvariable=self.top_n, command=self.on_top_n_change)
+        self.top_n_spin.pack(side="left", padx=2)
+        self.top_n_spin.bind("<FocusOut>", lambda e: self.on_top_n_change())
+        self.top_n_spin.bind("<Return>", lambda e: self.on_top_n_change())
+        ttk.Label(settings_frame, text="Dirs/s:", font=('Helvetica', 9)).pack(side="left", padx=(5, 2))
+        self.throttle_spin = tk.Spinbox(
+            settings_frame, from_=0, to=10000, increment=50, width=5, textvariable=self.throttle_ops,
+            command=self.on_throttle_change
+        )
+        self.throttle_spin.pack(side="left", padx=2)
+        self.throttle_spin.bind("<FocusOut>", lambda e: self.on_throttle_change())
+        self.throttle_spin.bind("<Return>", lambda e: self.on_throttle_change())
+        ttk.Label(settings_frame, text="Mode:", font=('Helvetica', 9)).pack(side="left", padx=(5, 2))
+        self.mode_combo = ttk.Combobox(
+            settings_frame,
+            textvariable=self.scan_mode,
+            values=list(SCAN_MODES.values()),
+            state="readonly",
+            width=16
+        )
+        self.mode_combo.pack(side="left", padx=2)
+        self.mode_combo.bind("<<ComboboxSelected>>", lambda e: self.on_mode_change())
         ttk.Label(settings_frame, text="Excl:", font=('Helvetica', 9)).pack(side="left", padx=(5, 2))
         self.excl_entry = ttk.Entry(settings_frame, textvariable=self.exclusions, width=15)
         self.excl_entry.pack(side="left")
@@ -271,16 +353,18 @@ class CleanupApp:
         self.context_menu.add_command(label="Open in Finder", command=self.open_in_finder, state="disabled", accelerator="Cmd+F")
         self.context_menu.add_command(label="Move to Trash", command=self.move_to_trash, state="disabled", accelerator="Cmd+T")
         self.context_menu.add_command(label="Clean Folder", command=self.clean_folder, state="disabled", accelerator="Cmd+E")
+        self.context_menu.add_command(label="Expand Folded Items", command=self.expand_selected, state="disabled")
         self.tree.bind("<Button-3>", self.show_context_menu)
         self.tree.bind("<Button-2>", self.show_context_menu)
         self.tree.bind("<Control-Button-1>", self.show_context_menu)
         self.tree.bind("<<TreeviewSelect>>", self.on_tree_select)
-        self.tree.bind("<Double-1>", self.open_in_finder)
+        self.tree.bind("<Double-1>", self.on_double_click)
 
         self.actions_menu = tk.Menu(self.root, tearoff=0)
         self.actions_menu.add_command(label="Open in Finder", command=self.open_in_finder, state="disabled")
         self.actions_menu.add_command(label="Move to Trash", command=self.move_to_trash, state="disabled")
         self.actions_menu.add_command(label="Clean Folder", command=self.clean_folder, state="disabled")
+        self.actions_menu.add_command(label="Expand Folded Items", command=self.expand_selected, state="disabled")
 
         # Plugins menu
         self.plugins_menu = tk.Menu(self.root, tearoff=0)
@@ -340,8 +424,17 @@ class CleanupApp:
                 onvalue=True,
                 offvalue=False
             )
+        self.plugins_menu.add_separator()
+        self.plugins_menu.add_command(label="Rescan Ignoring Plugin Cache", command=self.rescan_plugins)
         self.logger.info("Updated plugins menu")
 
+    def rescan_plugins(self):
+        """Scan system temps again, running every plugin even if its cached results are fresh."""
+        self.current_folder = None
+        self.save_settings()
+        self.start_scan(force_refresh=True)
+        self.logger.info("Started system scan ignoring plugin cache")
+
     def toggle_plugin(self, plugin_name):
         plugins = self.app_settings.get("plugins", {})
         current = plugins.get(plugin_name, True)
@@ -374,6 +467,37 @@ class CleanupApp:
         self.save_settings()
         self.logger.info(f"Depth changed to {val}")
 
+    def on_top_n_change(self):
+        try:
+            val = max(0, int(self.top_n.get()))
+        except Exception as e:
+            self.logger.error(f"Invalid top N value: {e}")
+            val = 0
+        self.top_n.set(val)
+        self.save_settings()
+        self.logger.info(f"Top N changed to {val or 'all'}")
+
+    def on_throttle_change(self):
+        """0 scans at full speed; otherwise cap directory listings per second, slowing further under load."""
+        try:
+            val = max(0, int(self.throttle_ops.get()))
+        except Exception as e:
+            self.logger.error(f"Invalid throttle value: {e}")
+            val = 0
+        self.throttle_ops.set(val)
+        throttle.configure(val)
+        self.save_settings()
+
+    def get_scan_mode(self):
+        for key, label in SCAN_MODES.items():
+            if label == self.scan_mode.get():
+                return key
+        return "full"
+
+    def on_mode_change(self):
+        self.save_settings()
+        self.logger.info(f"Scan mode changed to {self.get_scan_mode()}")
+
     def on_exclusions_change(self):
         self.save_settings()
         self.logger.info("Exclusions updated")
@@ -385,7 +509,7 @@ class CleanupApp:
 
     def on_search_change(self):
         self.apply_filter()
-        self.logger.info(f"Search query: {self.search_query.get()}")
+        self.logger.debug(f"Search query: {self.search_query.get()}")
 
     def clear_search(self):
         self.search_query.set("")
@@ -415,10 +539,80 @@ class CleanupApp:
         self.start_scan()
         self.logger.info("Started system scan")
 
-    def start_scan(self):
+    def show_cached_results(self):
+        """Show the last saved results for the current root while a fresh scan runs."""
+        items, created = snapshot.load_results(self.current_folder)
+        if items is None:
+            return False
+        self.items = sorted(items, key=lambda x: size_to_bytes(x["size"]), reverse=True)
+        self.results_root = self.current_folder
+        self.mark_items_stale()
+        when = time.strftime("%Y-%m-%d %H:%M", time.localtime(created))
+        self.set_status(f"Showing last scan of {self.current_folder or 'system temps'} from {when} (stale, refreshing...)")
+        self.logger.info(f"Loaded {len(items)} cached items from {when}")
+        return True
+
+    def mark_items_stale(self):
+        """Flag the rows on screen as stale; fresh results replace them as they stream in."""
+        for item in self.items:
+            item["stale"] = True
+        self.stale_rows = {row_key(item): item for item in self.items}
+        self.showing_stale = bool(self.items)
+        if self.items:
+            self.apply_filter()
+
+    def merge_item(self, item):
+        stale = self.stale_rows.pop(row_key(item), None)
+        if stale is not None:
+            stale.clear()
+            stale.update(item)
+        else:
+            self.items.append(item)
+
+    def start_lazy_sizing(self):
+        """Size pending rows in the background: selected first, then visible, then the rest."""
+        self.size_worker = SizeWorker(lambda path, fields: self.scan_queue.put(("sized", path, fields)))
+        for order, item in enumerate(self.items):
+            if item.get("pending"):
+                self.size_worker.request(item["path"], SizeWorker.BACKGROUND, order)
+        self.request_visible_sizes()
+        if self.selected_item and self.selected_item.get("pending"):
+            self.size_worker.request(self.selected_item["path"], SizeWorker.SELECTED)
+        self.start_polling()
+
+    def request_visible_sizes(self):
+        if not self.size_worker:
+            return
+        children = self.tree.get_children()
+        if not children:
+            return
+        first, last = self.tree.yview()
+        start = int(first * len(children))
+        end = int(math.ceil(last * len(children)))
+        for order, iid in enumerate(children[start:end + 1]):
+            item = self.row_items.get(iid)
+            if item and item.get("pending"):
+                self.size_worker.request(item["path"], SizeWorker.VISIBLE, order)
+
+    def start_scan(self, force_refresh=False):
         if self.is_scanning:
             self.logger.warning("Scan already in progress")
             return
+        if self.results_root != self.current_folder and not self.show_cached_results():
+            self.items = []
+            self.results_root = self.current_folder
+            self.apply_filter()
+        self.mark_items_stale()
+        self.resume_scan = self.ask_resume()
+        self.force_refresh = force_refresh
+        self.scan_tree.for_exclusions([e.strip() for e in self.exclusions.get().split(",") if e.strip()])
+        self.scan_depth = self.max_depth.get()
+        self.scan_stop.set()  # stops background refinement left over from the previous scan
+        self.stop_live_updates()
+        self.scan_stop = threading.Event()
+        if self.size_worker:
+            self.size_worker.stop()
+            self.size_worker = None
         self.is_scanning = True
         self.update_button_states()
         self.progress_var.set(0)
@@ -430,39 +624,151 @@ class CleanupApp:
         self.scan_thread = threading.Thread(target=self.scan_in_background)
         self.scan_thread.daemon = True
         self.scan_thread.start()
-        self.check_queue()
+        self.start_polling()
         self.logger.info("Scan thread started")
 
+    def ask_resume(self):
+        """Offer to resume an interrupted scan of the current root, if one was checkpointed."""
+        info = checkpoint.checkpoint_info(self.current_folder)
+        if not info:
+            return False
+        when = time.strftime("%Y-%m-%d %H:%M", time.localtime(info["created"]))
+        if messagebox.askyesno(
+            "Resume Scan",
+            f"An interrupted scan of {self.current_folder or 'system temps'} from {when} was found "
+            f"({info['items']} items found so far).\nResume it instead of starting over?"
+        ):
+            self.logger.info(f"Resuming checkpointed scan from {when}")
+            return True
+        checkpoint.clear_checkpoint(self.current_folder)
+        return False
+
     def scan_in_background(self):
         def progress_callback(category, progress):
             self.scan_queue.put(("progress", category, progress))
+
+        def item_callback(item):
+            self.scan_queue.put(("item", dict(item)))
         exclusions = [e.strip() for e in self.exclusions.get().split(",") if e.strip()]
-        if self.current_folder:
+        scan_root = self.current_folder
+        stop_event = self.scan_stop
+        quick = self.get_scan_mode() == "quick"
+        if scan_root and self.get_scan_mode() == "lazy":
+            # Sizes are filled in afterwards by a SizeWorker, so nothing to snapshot yet
+            items = list_folder(
+                scan_root,
+                "Home Folder" if scan_root == os.path.expanduser("~") else "Subfolder",
+                exclusions=exclusions
+            )
+            self.scan_queue.put(("complete", items))
+            return
+        items = self.items_from_daemon(scan_root, exclusions)
+        if items is not None:
+            self.scan_queue.put(("complete", items))
+            return
+        if scan_root:
             items = scan_folder(
-                self.current_folder,
-                "Home Folder" if self.current_folder == os.path.expanduser("~") else "Subfolder",
+                scan_root,
+                "Home Folder" if scan_root == os.path.expanduser("~") else "Subfolder",
                 progress_callback,
+                known=self.scan_tree,
                 max_depth=self.max_depth.get(),
-                exclusions=exclusions
+                exclusions=exclusions,
+                resume=self.resume_scan,
+                stop_event=stop_event,
+                top_n=self.top_n.get() or None,
+                quick=quick,
+                item_callback=item_callback
             )
         else:
-            items = scan_system(progress_callback, max_depth=self.max_depth.get(), exclusions=exclusions)
-        self.top_level_items = items
+            items = scan_system(
+                progress_callback, max_depth=self.max_depth.get(), exclusions=exclusions,
+                resume=self.resume_scan, stop_event=stop_event, quick=quick,
+                item_callback=item_callback, force_refresh=self.force_refresh,
+                enabled_plugins=dict(self.app_settings.get("plugins", {}))
+            )
+        if stop_event.is_set():
+            return
+        import history
+        import metrics
+        snapshot.save_results(scan_root, items)
+        history.record_scan(scan_root, items, history.scan_params(
+            self.max_depth.get(), exclusions, quick, self.top_n.get() if scan_root else None,
+            None if scan_root else dict(self.app_settings.get("plugins", {}))
+        ))
+        metrics.write(scan_root, items)
         self.scan_queue.put(("complete", items))
+        if quick:
+            # Results are already on screen; firm up the biggest estimates behind them
+            refined = refine_estimates(
+                items,
+                lambda item, fields: self.scan_queue.put(("update", item, fields)),
+                stop_event=stop_event
+            )
+            self.scan_queue.put(("refined", refined))
+
+    def items_from_daemon(self, scan_root, exclusions):
+        """
+        Ask a running scan daemon for the current root's items; None (scan
+        locally) if it isn't running, doesn't cover this root and depth, or
+        the scan asks for something it can't answer (quick, top-N, resume,
+        ignoring caches).
+        """
+        if self.get_scan_mode() != "full" or self.resume_scan or self.force_refresh:
+            return None
+        if scan_root and self.top_n.get():
+            return None
+        import daemon
+        try:
+            result = daemon.query("subtree", root=scan_root, depth=self.max_depth.get(), exclusions=exclusions)
+        except (daemon.DaemonUnavailable, daemon.DaemonError) as e:
+            self.logger.debug(f"Scan daemon not used: {e}")
+            return None
+        if result is None:
+            return None
+        when = time.strftime("%H:%M", time.localtime(result["scanned"]))
+        self.logger.info(f"Got {len(result['items'])} items from the scan daemon (indexed at {when})")
+        return result["items"]
+
+    def start_live_updates(self):
+        """Watch the rows on screen and re-measure the ones whose folders change."""
+        from watcher import LiveUpdater
+        exclusions = [e.strip() for e in self.exclusions.get().split(",") if e.strip()]
+        self.live_updater = LiveUpdater(
+            self.items, lambda item, fields: self.scan_queue.put(("changed", item, fields)), exclusions
+        )
+        self.live_updater.start()
+        self.start_polling()
+
+    def stop_live_updates(self):
+        if self.live_updater:
+            self.live_updater.stop()
+            self.live_updater = None
+
+    def start_polling(self):
+        if not self.polling_queue:
+            self.polling_queue = True
+            self.check_queue()
 
     def check_queue(self):
+        refresh = False
         try:
             while True:
                 msg = self.scan_queue.get_nowait()
                 if msg[0] == "progress":
                     _, category, progress = msg
                     self.progress_var.set(progress)
-                    self.set_status(f"Scanning: {category} ({progress:.1f}%)")
+                    stale_info = " | showing stale results, refreshing..." if self.showing_stale else ""
+                    self.set_status(f"Scanning: {category} ({progress:.1f}%){stale_info}")
                     self.root.update_idletasks()  # Force GUI refresh
-                    self.logger.debug(f"Progress updated: {category} ({progress:.1f}%)")
                 elif msg[0] == "complete":
                     _, items = msg
                     self.items = sorted(items, key=lambda x: size_to_bytes(x["size"]), reverse=True)
+                    self.showing_stale = False
+                    self.stale_rows = {}
+                    self.results_root = self.current_folder
+                    if self.current_folder and self.get_scan_mode() != "lazy":
+                        self.scan_tree.record(self.current_folder, items, self.scan_depth)
                     self.apply_filter()
                     self.progress_var.set(100)
                     self.set_status(f"Viewing {self.current_folder or 'system temps'}")
@@ -470,10 +776,68 @@ class CleanupApp:
                     self.is_scanning = False
                     self.update_button_states()
                     self.logger.info("Scan completed")
-                    return
+                    if any(item.get("pending") for item in self.items):
+                        self.start_lazy_sizing()
+                    elif self.app_settings.get("watch_changes", True):
+                        self.start_live_updates()
+                elif msg[0] == "expanded":
+                    _, folded, new_items = msg
+                    self.items = [item for item in self.items if item is not folded] + new_items
+                    self.apply_filter()
+                    self.progress_var.set(100)
+                    self.set_status(f"Expanded {folded['name']} in {folded['path']}")
+                    self.is_scanning = False
+                    self.update_button_states()
+                    self.logger.info(f"Expanded folded row under {folded['path']}")
+                elif msg[0] == "searching":
+                    self.set_status(msg[1])
+                elif msg[0] == "found":
+                    _, description, folder, items = msg
+                    self.items = items
+                    self.showing_stale = False
+                    self.stale_rows = {}
+                    self.results_root = ("search", folder)  # not the results of a scan of folder
+                    self.apply_filter()
+                    self.progress_var.set(100)
+                    self.set_status(f"Viewing {description} ({len(items)} files)")
+                    self.is_scanning = False
+                    self.update_button_states()
+                    self.logger.info(f"Found {len(items)} files: {description}")
+                elif msg[0] == "item":
+                    self.merge_item(msg[1])
+                    refresh = True
+                elif msg[0] == "update":
+                    _, item, fields = msg
+                    item.update(fields)
+                    refresh = True
+                    self.set_status(f"Refining estimates: {item['path']} is {item['size']}")
+                elif msg[0] == "changed":
+                    _, item, fields = msg
+                    item.update(fields)
+                    self.scan_tree.forget(item["path"])
+                    refresh = True
+                    self.set_status(f"{item['path']} changed, now {item['size']}")
+                elif msg[0] == "sized":
+                    _, path, fields = msg
+                    for item in self.items:
+                        if item["path"] == path and item.get("pending"):
+                            item.update(fields)
+                            item["pending"] = 0
+                    refresh = True
+                elif msg[0] == "refined":
+                    _, count = msg
+                    self.set_status(f"Viewing {self.current_folder or 'system temps'} (refined {count} largest estimates)")
         except queue.Empty:
             pass
-        self.root.after(100, self.check_queue)
+        if refresh:
+            self.apply_filter()
+        if (self.is_scanning or (self.scan_thread and self.scan_thread.is_alive())
+                or (self.size_worker and self.size_worker.is_busy()) or not self.scan_queue.empty()):
+            self.root.after(100, self.check_queue)
+        elif self.live_updater is not None:
+            self.root.after(LIVE_POLL_MS, self.check_queue)  # changes can arrive at any time
+        else:
+            self.polling_queue = False
 
     def apply_filter(self):
         thresholds = {
@@ -495,9 +859,16 @@ class CleanupApp:
         else:
             threshold = thresholds[self.size_filter.get()]
         search_query = self.search_query.get().strip().lower()
+        try:
+            stale_before = time.time() - float(self.stale_days.get()) * 86400 if self.stale_days.get().strip() else None
+        except ValueError:
+            stale_before = None
         self.display_items = [
             item for item in self.items
-            if size_to_bytes(item["size"]) >= threshold and
+            if (item.get("pending") or size_to_bytes(item["size"]) >= threshold) and
+            (item.get("pending") or stale_before is None or (
+                item.get("mtime") and max(item["mtime"], item.get("atime", 0)) < stale_before
+            )) and
             (not search_query or any(
                 search_query in field.lower()
                 for field in [item["category"], item["short_name"], item["path"]]
@@ -506,8 +877,6 @@ class CleanupApp:
         self.populate_tree()
 
     def populate_tree(self):
-        for item in self.tree.get_children():
-            self.tree.delete(item)
         # Sort display_items based on stored sort_column and sort_descending
         if self.sort_column == "size":
             sorted_items = sorted(
@@ -515,31 +884,74 @@ class CleanupApp:
                 key=lambda x: size_to_bytes(x["size"]),
                 reverse=self.sort_descending
             )
+        elif self.sort_column in ("files", "modified"):
+            field = "files" if self.sort_column == "files" else "mtime"
+            sorted_items = sorted(
+                self.display_items,
+                key=lambda x: x.get(field, 0),
+                reverse=self.sort_descending
+            )
         else:
             sorted_items = sorted(
                 self.display_items,
                 key=lambda x: x[self.sort_column],
                 reverse=self.sort_descending
             )
+        # Update rows in place so selection and scroll position survive a refresh
+        old_rows = {}
+        for iid, item in self.row_items.items():
+            old_rows.setdefault(row_key(item), []).append(iid)
+        self.row_items = {}
         for idx, item in enumerate(sorted_items):
             tag = 'evenrow' if idx % 2 == 0 else 'oddrow'
-            self.tree.insert(
-                "", "end", values=(item["category"], item["short_name"], item["path"], item["size"]),
-                tags=(tag,)
-            )
+            tags = (tag, 'stale') if item.get("stale") else (tag,)
+            if item.get("folded"):
+                tags += ('folded',)
+            size = item["size"]
+            if item.get("pending"):
+                size = "calculating…"
+            elif item.get("approx"):
+                size = f"≈{size} ±{format_size(item['approx'])}"
+            files = item["files"] if "files" in item else ""
+            modified = time.strftime("%Y-%m-%d", time.localtime(item["mtime"])) if item.get("mtime") else ""
+            values = (item["category"], item["short_name"], item["path"], size, files, modified)
+            reusable = old_rows.get(row_key(item))
+            iid = reusable.pop() if reusable else None
+            if iid is None:
+                iid = self.tree.insert("", idx, values=values, tags=tags)
+            else:
+                self.tree.item(iid, values=values, tags=tags)
+                self.tree.move(iid, "", idx)
+            self.row_items[iid] = item
+        unused = [iid for iids in old_rows.values() for iid in iids]
+        if unused:
+            self.tree.delete(*unused)
+        selected = self.tree.selection()
+        if selected and selected[0] in self.row_items:
+            self.selected_item = self.row_items[selected[0]]
+        self.request_visible_sizes()
 
     def update_button_states(self):
+        is_folded = bool(self.selected_item and self.selected_item.get("folded"))
         is_folder = (
             self.selected_item
+            and not is_folded
             and os.path.isdir(os.path.expanduser(self.selected_item["path"]))
         )
-        has_selection = bool(self.selected_item)
+        has_selection = bool(self.selected_item) and not is_folded
+        # Rows spread over many folders (stale bytecode) have no path to open
+        can_open = has_selection and bool(self.selected_item["path"])
+        # Rows listing members (project artifacts, stale bytecode) are trashed member by member, never cleaned
+        can_clean = is_folder and not self.selected_item.get("members")
         has_results = bool(self.items)
         at_top_level = self.current_folder is None or self.current_folder == os.path.expanduser("~")
         self.home_btn.config(
             state="disabled" if self.is_scanning or self.current_folder == os.path.expanduser("~") else "normal"
         )
         self.scan_btn.config(state="disabled" if self.is_scanning else "normal")
+        self.largest_btn.config(state="disabled" if self.is_scanning else "normal")
+        self.duplicates_btn.config(state="disabled" if self.is_scanning else "normal")
+        self.growth_btn.config(state="disabled" if self.is_scanning else "normal")
         self.deep_btn.config(
             state="normal" if has_results and is_folder and not self.is_scanning else "disabled"
         )
@@ -547,7 +959,7 @@ class CleanupApp:
             state="normal" if has_results and not at_top_level and not self.is_scanning else "disabled"
         )
         self.actions_btn.config(
-            state="normal" if has_selection and not self.is_scanning else "disabled"
+            state="normal" if self.selected_item and not self.is_scanning else "disabled"
         )
         self.plugins_btn.config(
             state="normal" if not self.is_scanning else "disabled"
@@ -556,41 +968,156 @@ class CleanupApp:
             state="normal" if self.deleted_paths else "disabled"
         )
         self.context_menu.entryconfig(
-            "Open in Finder", state="normal" if has_selection else "disabled"
+            "Open in Finder", state="normal" if can_open else "disabled"
         )
         self.context_menu.entryconfig(
             "Move to Trash", state="normal" if has_selection else "disabled"
         )
         self.context_menu.entryconfig(
-            "Clean Folder", state="normal" if is_folder else "disabled"
+            "Clean Folder", state="normal" if can_clean else "disabled"
+        )
+        self.context_menu.entryconfig(
+            "Expand Folded Items", state="normal" if is_folded and not self.is_scanning else "disabled"
         )
         self.actions_menu.entryconfig(
-            "Open in Finder", state="normal" if has_selection else "disabled"
+            "Open in Finder", state="normal" if can_open else "disabled"
         )
         self.actions_menu.entryconfig(
             "Move to Trash", state="normal" if has_selection else "disabled"
         )
         self.actions_menu.entryconfig(
-            "Clean Folder", state="normal" if is_folder else "disabled"
+            "Clean Folder", state="normal" if can_clean else "disabled"
+        )
+        self.actions_menu.entryconfig(
+            "Expand Folded Items", state="normal" if is_folded and not self.is_scanning else "disabled"
         )
 
     def on_tree_select(self, event):
         selected = self.tree.selection()
-        if selected:
-            item_id = selected[0]
-            values = self.tree.item(item_id, "values")
-            self.selected_item = {
-                "category": values[0],
-                "name": values[1],
-                "path": values[2],
-                "size": values[3]
-            }
-            self.set_status(f"Selected: {self.selected_item['path']} ({self.selected_item['size']})")
+        self.selected_item = self.row_items.get(selected[0]) if selected else None
+        if self.selected_item and self.selected_item.get("pending") and self.size_worker:
+            self.size_worker.request(self.selected_item["path"], SizeWorker.SELECTED)
+        if self.selected_item:
+            self.set_status(f"Selected: {self.selected_item['path'] or self.selected_item['name']} ({self.selected_item['size']})")
         else:
-            self.selected_item = None
             self.set_status(f"Viewing {self.current_folder or 'system temps'}")
         self.update_button_states()
 
+    def on_double_click(self, event=None):
+        if self.selected_item and self.selected_item.get("folded"):
+            self.expand_selected()
+        else:
+            self.open_in_finder()
+
+    def expand_selected(self):
+        """Size the children hidden behind a folded "N other items" row."""
+        folded = self.selected_item
+        if not folded or not folded.get("folded") or self.is_scanning:
+            return
+        known_paths = {item["path"] for item in self.items}
+        exclusions = [e.strip() for e in self.exclusions.get().split(",") if e.strip()]
+        top_n = self.top_n.get() or None
+        self.is_scanning = True
+        self.update_button_states()
+        self.set_status(f"Expanding {folded['name']} in {folded['path']}...")
+
+        def expand_in_background():
+            new_items = expand_folded(folded, known_paths, top_n=top_n, exclusions=exclusions)
+            self.scan_queue.put(("expanded", folded, new_items))
+
+        self.scan_thread = threading.Thread(target=expand_in_background, daemon=True)
+        self.scan_thread.start()
+        self.start_polling()
+
+    def start_file_search(self, description, search):
+        """
+        Run search(folder, exclusions, report, stop_event) in the background on
+        the current folder (home for system scans) and show the items it returns.
+        report(message) updates the status line while it runs.
+        """
+        if self.is_scanning:
+            return
+        folder = self.current_folder or os.path.expanduser("~")
+        exclusions = [e.strip() for e in self.exclusions.get().split(",") if e.strip()]
+        self.scan_stop.set()
+        self.scan_stop = threading.Event()
+        self.stop_live_updates()
+        stop_event = self.scan_stop
+        if self.size_worker:
+            self.size_worker.stop()
+            self.size_worker = None
+        self.is_scanning = True
+        self.update_button_states()
+        self.progress_var.set(0)
+        self.set_status(f"Finding {description} in {folder}...")
+
+        def search_in_background():
+            items = search(folder, exclusions, lambda message: self.scan_queue.put(("searching", message)), stop_event)
+            if not stop_event.is_set():
+                self.scan_queue.put(("found", f"{description} in {folder}", folder, items))
+
+        self.scan_thread = threading.Thread(target=search_in_background, daemon=True)
+        self.scan_thread.start()
+        self.start_polling()
+        self.logger.info(f"Search for {description} started in {folder}")
+
+    def find_largest_files(self):
+        count = self.app_settings.get("largest_files", 100)
+        self.start_file_search(
+            f"the {count} largest files",
+            lambda folder, exclusions, report, stop_event: find_largest_files(
+                folder, count, exclusions,
+                lambda directory, files: report(f"Finding largest files: {files} files checked"),
+                stop_event=stop_event
+            )
+        )
+
+    def find_duplicates(self):
+        from duplicates import find_duplicates, duplicate_items
+        self.start_file_search(
+            "duplicate files",
+            lambda folder, exclusions, report, stop_event: duplicate_items(find_duplicates(
+                folder, exclusions,
+                progress_callback=lambda stage, count: report(f"Finding duplicates: {stage} ({count} files)"),
+                stop_event=stop_event
+            ))
+        )
+
+    def show_growth(self):
+        """Show what grew under the current root since the scan from growth_days ago."""
+        if self.is_scanning:
+            return
+        import history
+        days = self.app_settings.get("growth_days", 7)
+        result = history.growth_since(self.current_folder, days * 86400, limit=GROWTH_ROWS)
+        root_label = self.current_folder or "system temps"
+        if result is None:
+            messagebox.showinfo("Growth", f"Scan {root_label} at least twice to see what grew between scans.")
+            return
+        then, now, changes = result
+        self.stop_live_updates()
+        since = time.strftime("%Y-%m-%d %H:%M", time.localtime(then))
+        category = f"Growth since {since}"
+        self.items = []
+        for change in changes:
+            if change["delta"] <= 0:
+                break
+            name = os.path.basename(change["path"]) or change["path"]
+            self.items.append({
+                "category": category,
+                "name": name,
+                "short_name": name,
+                "path": change["path"],
+                "size": f"+{format_size(change['delta'])}",
+                "files": change["files_delta"],
+            })
+        self.showing_stale = False
+        self.stale_rows = {}
+        self.results_root = ("growth", self.current_folder)
+        self.apply_filter()
+        self.set_status(f"Viewing growth of {root_label} since {since} ({len(self.items)} folders grew)")
+        self.logger.info(f"Showing growth of {root_label} since {since}")
+
     def go_home(self):
         self.current_folder = os.path.expanduser("~")
         self.save_settings()
@@ -598,7 +1125,7 @@ class CleanupApp:
         self.logger.info("Navigated to home")
 
     def open_in_finder(self, event=None):
-        if not self.selected_item:
+        if not self.selected_item or self.selected_item.get("folded") or not self.selected_item["path"]:
             return
         try:
             full_path = os.path.expanduser(self.selected_item["path"])
@@ -609,12 +1136,16 @@ class CleanupApp:
             messagebox.showerror("Error", f"Could not open {self.selected_item['path']}:\n{e}")
 
     def move_to_trash(self, event=None):
-        if not self.selected_item:
+        if not self.selected_item or self.selected_item.get("folded"):
             return
+        send2trash = load_send2trash()
         if not send2trash:
             self.logger.error("send2trash package missing")
             messagebox.showerror("Error", "The 'send2trash' package is required. Install it with: pip install send2trash")
             return
+        if self.selected_item.get("members"):
+            self.trash_members(self.selected_item, send2trash)
+            return
         path = self.selected_item["path"]
         full_path = os.path.abspath(os.path.expanduser(path))
         if full_path in CRITICAL_SYSTEM_PATHS:
@@ -629,6 +1160,8 @@ class CleanupApp:
                         continue
                     send2trash.send2trash(full_path)
                     self.deleted_paths.append(full_path)
+                    self.scan_tree.forget(full_path)
+                    self.forget_plugin_results(self.selected_item)
                     self.items = [item for item in self.items if item["path"] != path]
                     self.apply_filter()
                     self.set_status(f"Moved {full_path} to Trash")
@@ -646,9 +1179,47 @@ class CleanupApp:
                     break
             self.set_status(f"Error moving {full_path} to Trash")
 
+    def forget_plugin_results(self, item):
+        """A plugin's cached rows are out of date once one of them is trashed or cleaned."""
+        if item.get("plugin"):
+            plugin_cache.invalidate(item["plugin"])
+
+    def trash_members(self, item, send2trash):
+        """Trash only the paths a row lists in "members" (one per line), leaving its own path alone."""
+        members = [m for m in item["members"].split("\n") if m]
+        if not messagebox.askyesno(
+            "Confirm Move",
+            f"Move the {len(members)} items counted in {item['name']} ({item['size']}) to Trash?"
+            + ("" if not item["path"] or item["path"] in members else f"\n{item['path']} itself is kept.")
+        ):
+            return
+        failed = 0
+        for member in members:
+            full_path = os.path.abspath(os.path.expanduser(member))
+            if full_path in CRITICAL_SYSTEM_PATHS or not os.path.lexists(full_path):
+                continue
+            try:
+                send2trash.send2trash(full_path)
+            except Exception as e:
+                failed += 1
+                self.logger.error(f"Could not move {full_path}: {e}")
+                continue
+            self.deleted_paths.append(full_path)
+            self.scan_tree.forget(full_path)
+        self.forget_plugin_results(item)
+        self.items = [row for row in self.items if row is not item]
+        self.apply_filter()
+        self.selected_item = None
+        self.update_button_states()
+        self.set_status(f"Moved {len(members) - failed} items from {item['path'] or item['name']} to Trash")
+        self.logger.info(f"Trashed {len(members) - failed} of {len(members)} members of {item['path'] or item['name']}")
+        if failed:
+            messagebox.showwarning("Partial Move", f"{failed} items could not be moved to Trash.\nSee cleanup.log for details.")
+
     def clean_folder(self, event=None):
-        if not self.selected_item:
+        if not self.selected_item or self.selected_item.get("folded"):
             return
+        send2trash = load_send2trash()
         if not send2trash:
             self.logger.error("send2trash package missing")
             messagebox.showerror("Error", "The 'send2trash' package is required. Install it with: pip install send2trash")
@@ -675,20 +1246,21 @@ class CleanupApp:
                             continue
                         send2trash.send2trash(item_path)
                         self.deleted_paths.append(item_path)
+                        self.scan_tree.forget(item_path)
                         self.logger.info(f"Trashed {item_path}")
                         break
                     except Exception as e:
                         had_errors = True
                         self.logger.error(f"Failed to trash {item_path}: {e}")
                         break
+            self.forget_plugin_results(self.selected_item)
             self.items = [item for item in self.items if item["path"] != path]
-            self.items.append({
+            self.items.append(dict({
                 "category": self.selected_item["category"],
                 "name": self.selected_item["name"],
                 "short_name": self.selected_item["name"],
                 "path": path,
-                "size": get_size(path),
-            })
+            }, **measure(path)))
             self.apply_filter()
             self.set_status(f"Cleaned contents of {full_path} to Trash")
             self.selected_item = None
@@ -706,7 +1278,8 @@ class CleanupApp:
             self.set_status("Error cleaning folder")
 
     def go_deep(self):
-        if not self.selected_item or not os.path.isdir(os.path.expanduser(self.selected_item["path"])):
+        if (not self.selected_item or self.selected_item.get("folded")
+                or not os.path.isdir(os.path.expanduser(self.selected_item["path"]))):
             self.logger.warning("Go Deep attempted with invalid or non-directory item")
             return
         self.current_folder = self.selected_item["path"]
@@ -746,16 +1319,7 @@ class CleanupApp:
         self.sort_column = col
         self.sort_descending = descending
         self.save_settings()
-        data = [
-            (self.tree.set(child, col), child)
-            for child in self.tree.get_children("")
-        ]
-        if col == "size":
-            data.sort(key=lambda t: size_to_bytes(t[0]), reverse=descending)
-        else:
-            data.sort(reverse=descending)
-        for idx, (val, child) in enumerate(data):
-            self.tree.move(child, "", idx)
+        self.populate_tree()
         self.tree.heading(col, command=lambda: self.sort_by_column(col, not descending))
         self.logger.info(f"Sorted by {col}, descending={descending}")
 
@@ -0,0 +1,163 @@
+# macOS Cleanup Tool
+# Copyright (c) 2025 XClassicPeter
+# Licensed under the MIT License. See LICENSE for details.
+
+"""
+Headless entry point: scan a folder (or the system temps), list the largest
+items (from the scan daemon if it is running) and report growth between scans.
+"""
+
+import os
+import sys
+import time
+import argparse
+import logging
+
+from scanner import scan_system, scan_folder, format_size, size_to_bytes
+import settings
+import snapshot
+import history
+import metrics
+import daemon
+import throttle
+
+
+def _root(path):
+    return None if path in (None, "system") else os.path.abspath(os.path.expanduser(path))
+
+
+def _exclusions(app_settings):
+    return [e.strip() for e in app_settings.get("exclusions", "").split(",") if e.strip()]
+
+
+def _print_items(items, limit):
+    items.sort(key=lambda x: size_to_bytes(x["size"]), reverse=True)
+    for item in items[:limit]:
+        print(f"{item['size']:>8}  {item['category']:<20}  {item['path']}")
+
+
+def cmd_scan(args):
+    root = _root(args.path)
+    app_settings = settings.get_settings()
+    exclusions = _exclusions(app_settings)
+    depth = args.depth or app_settings.get("max_depth", 3)
+    if args.throttle:
+        throttle.configure(args.throttle)
+        throttle.lower_priority()
+    if root is None:
+        items = scan_system(
+            max_depth=depth, exclusions=exclusions, quick=args.quick, enabled_plugins=app_settings.get("plugins", {})
+        )
+    else:
+        items = scan_folder(
+            root, "Home Folder" if root == os.path.expanduser("~") else "Subfolder",
+            max_depth=depth, exclusions=exclusions, top_n=args.top_n or None, quick=args.quick
+        )
+    snapshot.save_results(root, items)
+    history.record_scan(root, items, history.scan_params(
+        depth, exclusions, args.quick, None if root is None else args.top_n,
+        app_settings.get("plugins", {}) if root is None else None
+    ))
+    metrics.write(root, items)
+    _print_items(items, args.limit)
+    return 0
+
+
+def cmd_top(args):
+    """Largest items from the scan daemon's index, else from the last saved scan."""
+    root = _root(args.path)
+    try:
+        items = daemon.query("top", root=root, limit=args.limit, exclusions=_exclusions(settings.get_settings()))
+    except (daemon.DaemonUnavailable, daemon.DaemonError) as e:
+        logging.getLogger(__name__).info(f"Scan daemon not used: {e}")
+        items = None
+    if items is None:
+        items, created = snapshot.load_results(root)
+        if items is None:
+            print(f"No saved scan of {snapshot.root_key(root)}; run 'scan' first or start daemon.py.", file=sys.stderr)
+            return 1
+        print(f"From the scan of {time.strftime('%Y-%m-%d %H:%M', time.localtime(created))}", file=sys.stderr)
+    _print_items(items, args.limit)
+    return 0
+
+
+def cmd_refresh(args):
+    try:
+        daemon.query("refresh", root=_root(args.path))
+    except (daemon.DaemonUnavailable, daemon.DaemonError) as e:
+        print(f"Scan daemon not available: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+def cmd_diff(args):
+    root = _root(args.path)
+    result = history.growth_since(root, args.days * 86400, limit=None)
+    if result is None:
+        print(f"Fewer than two recorded scans of {snapshot.root_key(root)}; run 'scan' again later.", file=sys.stderr)
+        return 1
+    then, now, changes = result
+    fmt = "%Y-%m-%d %H:%M"
+    print(f"{snapshot.root_key(root)}: {time.strftime(fmt, time.localtime(then))} -> {time.strftime(fmt, time.localtime(now))}")
+    if not args.shrunk:
+        changes = [c for c in changes if c["delta"] > 0]
+    for change in changes[:args.limit]:
+        sign = "+" if change["delta"] >= 0 else "-"
+        print(f"{sign}{format_size(abs(change['delta'])):>7}  {change['files_delta']:+8d} files  {change['path']}")
+    return 0
+
+
+def cmd_history(args):
+    root = _root(args.path)
+    for created, path in history.list_snapshots(root):
+        print(f"{time.strftime('%Y-%m-%d %H:%M', time.localtime(created))}  {path}")
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="cli.py", description=__doc__)
+    parser.add_argument("-v", "--verbose", action="store_true", help="log progress to stderr")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    scan = sub.add_parser("scan", help="scan a folder and record it in the scan history")
+    scan.add_argument("path", nargs="?", default="system", help="folder to scan (default: system temps and plugins)")
+    scan.add_argument("--depth", type=int, help="maximum depth (default: the GUI setting)")
+    scan.add_argument("--top-n", type=int, default=0, help="keep only the N largest children of each folder")
+    scan.add_argument("--quick", action="store_true", help="estimate sizes by sampling")
+    scan.add_argument("--limit", type=int, default=30, help="rows to print")
+    scan.add_argument(
+        "--throttle", type=int, metavar="OPS", default=0,
+        help="list at most OPS directories per second, backing off under load, at background priority"
+    )
+    scan.set_defaults(func=cmd_scan)
+
+    top = sub.add_parser("top", help="list the largest items without scanning (from daemon.py or the last scan)")
+    top.add_argument("path", nargs="?", default="system", help="scanned folder (default: system)")
+    top.add_argument("--limit", type=int, default=30, help="rows to print")
+    top.set_defaults(func=cmd_top)
+
+    refresh = sub.add_parser("refresh", help="ask the running scan daemon to rescan a root now")
+    refresh.add_argument("path", nargs="?", default="system", help="indexed folder (default: system)")
+    refresh.set_defaults(func=cmd_refresh)
+
+    diff = sub.add_parser("diff", help="show what grew between recorded scans")
+    diff.add_argument("path", nargs="?", default="system", help="scanned folder (default: system)")
+    diff.add_argument("--days", type=float, default=7, help="compare against the scan from this many days ago")
+    diff.add_argument("--shrunk", action="store_true", help="also list folders that shrank or were removed")
+    diff.add_argument("--limit", type=int, default=30, help="rows to print")
+    diff.set_defaults(func=cmd_diff)
+
+    hist = sub.add_parser("history", help="list recorded scans of a folder")
+    hist.add_argument("path", nargs="?", default="system", help="scanned folder (default: system)")
+    hist.set_defaults(func=cmd_history)
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(
+        level=logging.INFO if args.verbose else logging.WARNING,
+        format="%(asctime)s [%(levelname)s] %(message)s"
+    )
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,315 @@
+# macOS Cleanup Tool
+# Copyright (c) 2025 XClassicPeter
+# Licensed under the MIT License. See LICENSE for details.
+
+"""
+Optional scan service: keeps a size index of the configured roots fresh in
+the background and answers queries over a Unix domain socket, so the GUI and
+cli.py can show results without scanning first.
+
+Run it with `python daemon.py`. The protocol is one JSON object per line in
+each direction: {"op": ..., ...params} -> {"ok": true, "result": ...} or
+{"ok": false, "error": "..."}.
+"""
+
+import os
+import sys
+import json
+import time
+import signal
+import socket
+import argparse
+import logging
+import threading
+import socketserver
+
+from scanner import scan_system, scan_folder, size_to_bytes, _should_exclude
+import settings
+import snapshot
+import history
+import metrics
+import throttle
+from watcher import LiveUpdater, watchable
+from log_config import setup_logging
+
+SOCKET_PATH = os.path.join(settings.CACHE_DIR, "daemon.sock")
+CLIENT_TIMEOUT = 2.0  # seconds a client waits for the daemon before scanning itself
+
+
+class DaemonUnavailable(Exception):
+    """The scan daemon is not running or did not answer."""
+
+
+class DaemonError(Exception):
+    """The scan daemon answered with an error or a reply that could not be read."""
+
+
+def query(op, timeout=CLIENT_TIMEOUT, **params):
+    """Send one request to the daemon and return its result."""
+    request = dict(params, op=op)
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(timeout)
+            sock.connect(SOCKET_PATH)
+            sock.sendall(json.dumps(request).encode("utf-8") + b"\n")
+            with sock.makefile("rb") as f:
+                line = f.readline()
+    except OSError as e:
+        raise DaemonUnavailable(str(e))
+    if not line:
+        raise DaemonUnavailable("connection closed")
+    try:
+        response = json.loads(line)
+    except ValueError as e:
+        raise DaemonError(f"malformed reply: {e}")
+    if not isinstance(response, dict):
+        raise DaemonError(f"malformed reply: {line[:80]!r}")
+    if not response.get("ok"):
+        raise DaemonError(response.get("error", "unknown error"))
+    return response["result"]
+
+
+def available():
+    try:
+        query("ping", timeout=0.5)
+        return True
+    except (DaemonUnavailable, DaemonError):
+        return False
+
+
+def _depth_below(root, path):
+    rel = os.path.relpath(path, root)
+    return 0 if rel == "." else rel.count(os.sep) + 1
+
+
+class ScanDaemon:
+    """The index of every configured root, refreshed on a schedule or on request."""
+
+    def __init__(self, roots, max_depth, exclusions, interval, enabled_plugins, watch=True):
+        self.logger = logging.getLogger(__name__)
+        self.roots = [None if r in (None, "system") else os.path.abspath(os.path.expanduser(r)) for r in roots]
+        self.max_depth = max_depth
+        self.exclusions = exclusions
+        self.interval = interval
+        self.enabled_plugins = enabled_plugins
+        self.watch = watch
+        self.updaters = {}  # root key -> LiveUpdater keeping its index current between refreshes
+        self.index = {}  # root key -> {"items", "scanned"}
+        self.lock = threading.Lock()
+        self.wake = threading.Event()
+        self.stop_event = threading.Event()
+        self.requested = set()
+        for root in self.roots:
+            items, created = snapshot.load_results(root)
+            if items is not None:
+                self.index[snapshot.root_key(root)] = {"items": items, "scanned": created, "warm": True}
+
+    def refresh(self, root):
+        self.logger.info(f"Refreshing {snapshot.root_key(root)}")
+        started = time.time()
+        if root is None:
+            items = scan_system(
+                max_depth=self.max_depth, exclusions=self.exclusions, stop_event=self.stop_event,
+                enabled_plugins=self.enabled_plugins
+            )
+        else:
+            items = scan_folder(
+                root, "Home Folder" if root == os.path.expanduser("~") else "Subfolder",
+                max_depth=self.max_depth, exclusions=self.exclusions, stop_event=self.stop_event
+            )
+        if self.stop_event.is_set():
+            return
+        snapshot.save_results(root, items)
+        history.record_scan(root, items, history.scan_params(
+            self.max_depth, self.exclusions, enabled_plugins=self.enabled_plugins if root is None else None
+        ))
+        metrics.write(root, items)
+        with self.lock:
+            self.index[snapshot.root_key(root)] = {"items": items, "scanned": started}
+        if self.watch:
+            self.watch_items(snapshot.root_key(root), items)
+        self.logger.info(f"Refreshed {snapshot.root_key(root)}: {len(items)} items in {time.time() - started:.1f}s")
+
+    def watch_items(self, key, items):
+        """
+        Re-measure indexed folder rows as their folders change, until the next
+        refresh replaces them; plugin rows with their own accounting wait for it.
+        """
+        def update(item, fields):
+            with self.lock:
+                item.update(fields)
+
+        if key in self.updaters:
+            self.updaters.pop(key).stop()
+        watched = [item for item in items if watchable(item)]
+        if not watched:
+            return
+        self.updaters[key] = LiveUpdater(watched, update, self.exclusions)
+        self.updaters[key].start()
+
+    def run(self):
+        """Refresh every root now and then every interval seconds, or sooner when asked."""
+        while not self.stop_event.is_set():
+            with self.lock:
+                requested, self.requested = self.requested, set()
+            due = [
+                root for root in self.roots
+                if snapshot.root_key(root) in requested
+                or time.time() - (self.index.get(snapshot.root_key(root), {}).get("scanned") or 0) >= self.interval
+                or self.index.get(snapshot.root_key(root), {}).get("warm")
+            ]
+            for root in due:
+                if self.stop_event.is_set():
+                    return
+                try:
+                    self.refresh(root)
+                except Exception as e:
+                    self.logger.error(f"Refresh of {snapshot.root_key(root)} failed: {e}")
+            self.wake.wait(timeout=min(self.interval, 60))
+            self.wake.clear()
+
+    def _entry(self, root):
+        """(covering root key, its index entry) for root or the nearest indexed root above it."""
+        key = snapshot.root_key(root)
+        with self.lock:
+            if key in self.index:
+                return key, self.index[key]
+            if key == "system":
+                return None, None
+            for indexed, entry in self.index.items():
+                if indexed != "system" and (key + os.sep).startswith(indexed.rstrip(os.sep) + os.sep):
+                    return indexed, entry
+        return None, None
+
+    def handle(self, request):
+        op = request.get("op")
+        if op == "ping":
+            return "pong"
+        if op == "status":
+            with self.lock:
+                return {
+                    "roots": [snapshot.root_key(r) for r in self.roots],
+                    "max_depth": self.max_depth,
+                    "exclusions": self.exclusions,
+                    "index": {k: {"items": len(v["items"]), "scanned": v["scanned"]} for k, v in self.index.items()},
+                }
+        if op == "refresh":
+            with self.lock:
+                self.requested.add(snapshot.root_key(request.get("root")))
+            self.wake.set()
+            return True
+        if op == "subtree":
+            return self.subtree(request.get("root"), request.get("depth", self.max_depth), request.get("exclusions", []))
+        if op == "top":
+            items = self.subtree(request.get("root"), None, request.get("exclusions", []))
+            if items is None:
+                return None
+            items = sorted(items["items"], key=lambda x: size_to_bytes(x["size"]), reverse=True)
+            return items[:request.get("limit", 30)]
+        if op == "diff":
+            result = history.growth_since(request.get("root"), request.get("days", 7) * 86400, request.get("limit"))
+            return None if result is None else {"then": result[0], "now": result[1], "changes": result[2]}
+        raise ValueError(f"Unknown op {op!r}")
+
+    def subtree(self, root, depth, exclusions):
+        """
+        The indexed items within depth levels below root (all of them if depth
+        is None), or None if the index doesn't cover that (root not under an indexed root, too deep, or
+        scanned without one of the given exclusions).
+        """
+        if not set(self.exclusions) <= set(exclusions):
+            return None
+        key, entry = self._entry(root)
+        if entry is None:
+            return None
+        if key == "system":
+            items = entry["items"]
+        else:
+            folder = snapshot.root_key(root)
+            if depth is not None and _depth_below(key, folder) + depth > self.max_depth:
+                return None
+            items = [
+                item for item in entry["items"]
+                if item["path"].startswith(folder.rstrip(os.sep) + os.sep)
+                and (depth is None or _depth_below(folder, item["path"]) <= depth)
+            ]
+        items = [item for item in items if not _should_exclude(item["path"], exclusions)]
+        return {"items": items, "scanned": entry["scanned"]}
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for line in self.rfile:
+            try:
+                result = self.server.daemon.handle(json.loads(line))
+                response = {"ok": True, "result": result}
+            except Exception as e:
+                response = {"ok": False, "error": str(e)}
+            self.wfile.write(json.dumps(response).encode("utf-8") + b"\n")
+
+
+class _Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def serve(daemon, path=SOCKET_PATH):
+    logger = logging.getLogger(__name__)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    if os.path.exists(path):
+        if available():
+            raise RuntimeError(f"A scan daemon is already listening on {path}")
+        os.unlink(path)  # left behind by a daemon that died
+    server = _Server(path, _Handler)
+    os.chmod(path, 0o600)
+    server.daemon = daemon
+    worker = threading.Thread(target=daemon.run, daemon=True)
+    worker.start()
+    logger.info(f"Scan daemon listening on {path}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        daemon.stop_event.set()
+        daemon.wake.set()
+        for updater in daemon.updaters.values():
+            updater.stop()
+        server.server_close()
+        os.unlink(path)
+        logger.info("Scan daemon stopped")
+
+
+def main(argv=None):
+    app_settings = settings.get_settings()
+    parser = argparse.ArgumentParser(prog="daemon.py", description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("roots", nargs="*", help="folders to index, or 'system' (default: daemon_roots setting)")
+    parser.add_argument("--interval", type=float, help="seconds between refreshes (default: daemon_interval setting)")
+    parser.add_argument(
+        "--throttle", type=int, metavar="OPS",
+        help="directories listed per second, 0 for full speed and priority (default: daemon_throttle_ops setting)"
+    )
+    args = parser.parse_args(argv)
+    setup_logging(app_settings)
+    ops = args.throttle if args.throttle is not None else app_settings.get("daemon_throttle_ops", 200)
+    if ops:
+        throttle.configure(ops)
+        throttle.lower_priority()
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))  # unlink the socket on kill too
+    daemon = ScanDaemon(
+        args.roots or app_settings.get("daemon_roots", ["~", "system"]),
+        max_depth=app_settings.get("max_depth", 3),
+        exclusions=[e.strip() for e in app_settings.get("exclusions", "").split(",") if e.strip()],
+        interval=args.interval or app_settings.get("daemon_interval", 3600),
+        enabled_plugins=app_settings.get("plugins", {}),
+        watch=app_settings.get("watch_changes", True)
+    )
+    try:
+        serve(daemon)
+    except RuntimeError as e:
+        print(e, file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
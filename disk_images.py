@@ -0,0 +1,260 @@
+# macOS Cleanup Tool
+# Copyright (c) 2025 XClassicPeter
+# Licensed under the MIT License. See LICENSE for details.
+
+"""
+Virtual machine disk image analysis from format headers and allocation
+tables, never guest data: how big the disk looks to the guest (logical), how
+much the image takes on the host (allocated) and how much of that no longer
+backs any guest data, which compacting or converting the image would free
+(reclaimable).
+"""
+
+import os
+import re
+import errno
+import struct
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from scanner import format_size, walk_files
+
+IMAGE_EXTENSIONS = {".qcow2", ".qcow", ".vdi", ".vmdk", ".img", ".raw", ".hds"}
+MIN_IMAGE_SIZE = 1024 * 1024
+IMAGE_WORKERS = 4
+
+_QCOW2_MAGIC = b"QFI\xfb"
+_QCOW2_HEADER = struct.Struct(">4sIQIIQIIQQIIQ")
+_QCOW2_OFFSET_MASK = 0x00fffffffffffe00
+_QCOW2_COMPRESSED = 1 << 62
+_QCOW2_EXTENDED_L2 = 1 << 4
+_VMDK_MAGIC = b"KDMV"
+_VMDK_HEADER = struct.Struct("<4sIIQQQQIQQQ")
+_VMDK_GD_AT_END = 0xFFFFFFFFFFFFFFFF
+_VMDK_EXTENT = re.compile(r'^(?:RW|RDONLY|NOACCESS)\s+(\d+)\s+(\w+)\s+"([^"]+)"', re.M)
+_VDI_SIGNATURE = 0xBEDA107F
+_VDI_UNALLOCATED = 0xFFFFFFFE  # and 0xFFFFFFFF: blocks not stored in the file
+SECTOR = 512
+
+
+def _allocated(st):
+    return st.st_blocks * 512
+
+
+def data_bytes(path):
+    """Bytes of path in data extents according to SEEK_DATA/SEEK_HOLE, or None where unsupported."""
+    if not hasattr(os, "SEEK_DATA"):
+        return None
+    total = 0
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        size = os.fstat(fd).st_size
+        offset = 0
+        while offset < size:
+            try:
+                start = os.lseek(fd, offset, os.SEEK_DATA)
+            except OSError as e:
+                if e.errno == errno.ENXIO:  # only a hole left
+                    break
+                if e.errno == errno.EINVAL:
+                    return None
+                raise
+            end = os.lseek(fd, start, os.SEEK_HOLE)
+            total += end - start
+            offset = end
+    finally:
+        os.close(fd)
+    return total
+
+
+def _read_u32_table(f, offset, count):
+    f.seek(offset)
+    data = f.read(count * 4)
+    return struct.unpack(f"<{len(data) // 4}I", data[:len(data) // 4 * 4])
+
+
+def _qcow2(f, st):
+    header = _QCOW2_HEADER.unpack(f.read(_QCOW2_HEADER.size))
+    (_, version, _, _, cluster_bits, logical, _, l1_size, l1_offset,
+     _, refcount_clusters, snapshots, _) = header
+    cluster = 1 << cluster_bits
+    entry_size = 8
+    if version >= 3:
+        incompatible, = struct.unpack(">Q", f.read(8))
+        if incompatible & _QCOW2_EXTENDED_L2:
+            entry_size = 16
+    f.seek(l1_offset)
+    l1 = struct.unpack(f">{l1_size}Q", f.read(l1_size * 8))
+    live = 0
+    tables = 0
+    compressed_shift = 62 - (cluster_bits - 8)
+    for l1_entry in l1:
+        l2_offset = l1_entry & _QCOW2_OFFSET_MASK
+        if not l2_offset:
+            continue
+        tables += 1
+        f.seek(l2_offset)
+        table = f.read(cluster)
+        for i in range(0, len(table), entry_size):
+            entry, = struct.unpack_from(">Q", table, i)
+            if entry & _QCOW2_COMPRESSED:
+                sectors = (entry & ((1 << 62) - 1)) >> compressed_shift
+                live += (sectors + 1) * SECTOR
+            elif entry & _QCOW2_OFFSET_MASK:
+                live += cluster
+    metadata = cluster * (1 + tables + -(-l1_size * 8 // cluster) + refcount_clusters)
+    metadata += cluster * -(-st.st_size // (cluster * cluster // 2))  # refcount blocks at 16 bits per cluster
+    # Internal snapshots keep clusters the active L1 table no longer points to
+    reclaimable = 0 if snapshots else max(0, _allocated(st) - live - metadata)
+    note = f", {snapshots} snapshots" if snapshots else ""
+    return {"format": f"qcow2 v{version}{note}", "logical": logical, "reclaimable": reclaimable}
+
+
+def _vmdk_sparse(f, st):
+    (_, _, _, capacity, grain, _, _, gtes_per_gt, _, gd_offset, overhead) = _VMDK_HEADER.unpack(
+        f.read(_VMDK_HEADER.size)
+    )
+    logical = capacity * SECTOR
+    if gd_offset == _VMDK_GD_AT_END or not grain or not gtes_per_gt:
+        return {"format": "vmdk (stream-optimized)", "logical": logical, "reclaimable": 0}
+    gd_entries = -(-capacity // (grain * gtes_per_gt))
+    grains = 0
+    for gt_offset in _read_u32_table(f, gd_offset * SECTOR, gd_entries):
+        if gt_offset:
+            grains += sum(1 for gte in _read_u32_table(f, gt_offset * SECTOR, gtes_per_gt) if gte > 1)
+    live = (overhead + grains * grain) * SECTOR
+    return {"format": "vmdk (sparse)", "logical": logical, "reclaimable": max(0, _allocated(st) - live)}
+
+
+def _vdi(f, st):
+    f.seek(0x4C)
+    image_type, = struct.unpack("<I", f.read(4))
+    f.seek(0x154)
+    blocks_offset, data_offset = struct.unpack("<II", f.read(8))
+    f.seek(0x170)
+    logical, block_size, block_extra, block_count = struct.unpack("<QIII", f.read(20))
+    stored = sum(1 for entry in _read_u32_table(f, blocks_offset, block_count) if entry < _VDI_UNALLOCATED)
+    live = data_offset + stored * (block_size + block_extra)
+    kind = "fixed" if image_type == 2 else "dynamic"
+    return {"format": f"vdi ({kind})", "logical": logical, "reclaimable": max(0, _allocated(st) - live)}
+
+
+def _raw(path, st, kind="raw"):
+    data = data_bytes(path)
+    # Allocated blocks beyond the data extents are preallocated but never written
+    reclaimable = max(0, _allocated(st) - data) if data is not None else 0
+    return {"format": kind, "logical": st.st_size, "reclaimable": reclaimable}
+
+
+def _detect(f):
+    head = f.read(0x48)
+    if head[:4] == _QCOW2_MAGIC:
+        return "qcow2"
+    if head[:4] == _VMDK_MAGIC:
+        return "vmdk"
+    if head.startswith(b"# Disk DescriptorFile"):
+        return "vmdk descriptor"
+    if len(head) >= 0x44 and struct.unpack_from("<I", head, 0x40)[0] == _VDI_SIGNATURE:
+        return "vdi"
+    return "raw"
+
+
+def vmdk_extents(path):
+    """Extent files listed by a VMDK descriptor, as (path, sectors, type)."""
+    with open(path, "r", errors="replace") as f:
+        text = f.read(64 * 1024)
+    directory = os.path.dirname(path)
+    return [(os.path.join(directory, name), int(sectors), kind) for sectors, kind, name in _VMDK_EXTENT.findall(text)]
+
+
+def analyze_image(path):
+    """
+    Return {"path", "format", "logical", "allocated", "reclaimable"} for a
+    disk image, reading only its headers and allocation tables, or None if
+    it can't be read.
+    """
+    logger = logging.getLogger(__name__)
+    try:
+        st = os.stat(path)
+        with open(path, "rb") as f:
+            kind = _detect(f)
+            f.seek(0)
+            if kind == "qcow2":
+                info = _qcow2(f, st)
+            elif kind == "vmdk":
+                info = _vmdk_sparse(f, st)
+            elif kind == "vdi":
+                info = _vdi(f, st)
+            elif kind == "vmdk descriptor":
+                info = _vmdk_descriptor(path)
+                st = None
+            else:
+                info = _raw(path, st, "raw" if not path.endswith(".hds") else "parallels (raw analysis)")
+    except (OSError, ValueError, struct.error) as e:
+        logger.warning(f"Cannot analyze disk image {path}: {e}")
+        return None
+    if st is not None:
+        info["allocated"] = _allocated(st)
+    info["path"] = path
+    return info
+
+
+def _vmdk_descriptor(path):
+    """A split or flat VMDK: the sum of its extents."""
+    total = {"format": "vmdk", "logical": 0, "allocated": 0, "reclaimable": 0}
+    kinds = set()
+    for extent, sectors, kind in vmdk_extents(path):
+        total["logical"] += sectors * SECTOR
+        kinds.add(kind.lower())
+        if kind.upper() == "ZERO" or not os.path.exists(extent):
+            continue
+        info = analyze_image(extent)
+        if info:
+            total["allocated"] += info["allocated"]
+            total["reclaimable"] += info["reclaimable"]
+    total["format"] = f"vmdk ({', '.join(sorted(kinds))})"
+    return total
+
+
+def find_images(folders, exclusions=()):
+    """(image, folder it was found in) for the disk images under folders; VMDK extents are reported through their descriptor."""
+    images = {}
+    extents = set()
+    for folder in folders:
+        for path, st in walk_files(folder, exclusions):
+            name = os.path.basename(path)
+            if os.path.splitext(name)[1].lower() not in IMAGE_EXTENSIONS:
+                continue
+            if name.lower().endswith(".vmdk") and st.st_size < MIN_IMAGE_SIZE:
+                try:
+                    extents.update(extent for extent, _, _ in vmdk_extents(path))
+                except OSError:
+                    continue
+                images.setdefault(path, folder)
+            elif st.st_size >= MIN_IMAGE_SIZE:
+                images.setdefault(path, folder)
+    return [(path, folder) for path, folder in images.items() if path not in extents]
+
+
+def analyze_images(paths, workers=IMAGE_WORKERS):
+    """analyze_image for each path, several at once; unreadable images are left out."""
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return [info for info in pool.map(analyze_image, paths) if info]
+
+
+def image_item(info, category):
+    name = os.path.basename(info["path"])
+    details = f"{info['format']}, {format_size(info['logical'])} virtual"
+    if info["reclaimable"]:
+        details += f", ~{format_size(info['reclaimable'])} reclaimable"
+    return {
+        "category": category,
+        "name": f"{name} ({details})",
+        "short_name": name,
+        "path": info["path"],
+        "size": format_size(info["allocated"]),
+        "bytes": info["allocated"],
+        "files": 1,
+        "logical": info["logical"],
+        "reclaimable": info["reclaimable"],
+    }
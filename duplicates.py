@@ -0,0 +1,239 @@
+# macOS Cleanup Tool
+# Copyright (c) 2025 XClassicPeter
+# Licensed under the MIT License. See LICENSE for details.
+
+import os
+import sys
+import mmap
+import ctypes
+import hashlib
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+import settings
+import snapshot
+from scanner import walk_files, format_size
+
+MIN_SIZE = 1024 * 1024   # smaller files are not worth reporting
+PARTIAL_BLOCK = 64 * 1024  # bytes hashed from each end of a file before the full hash
+HASH_WORKERS = 4
+HASH_CACHE = os.path.join(settings.CACHE_DIR, "hashes.cache")
+
+# getattrlist(2) constants for APFS clone detection
+_FSOPT_NOFOLLOW = 0x00000001
+_FSOPT_ATTR_CMN_EXTENDED = 0x00000020
+_ATTR_CMNEXT_PRIVATESIZE = 0x00000008
+
+
+class _AttrList(ctypes.Structure):
+    _fields_ = [
+        ("bitmapcount", ctypes.c_ushort),
+        ("reserved", ctypes.c_uint16),
+        ("commonattr", ctypes.c_uint32),
+        ("volattr", ctypes.c_uint32),
+        ("dirattr", ctypes.c_uint32),
+        ("fileattr", ctypes.c_uint32),
+        ("forkattr", ctypes.c_uint32),
+    ]
+
+
+_libc = None
+
+
+def _private_size(path):
+    """Bytes of path not shared with any clone (APFS), or None where unsupported."""
+    global _libc
+    if sys.platform != "darwin":
+        return None
+    if _libc is None:
+        _libc = ctypes.CDLL(None, use_errno=True)
+    attrs = _AttrList(bitmapcount=5, forkattr=_ATTR_CMNEXT_PRIVATESIZE)
+    buf = ctypes.create_string_buffer(16)
+    result = _libc.getattrlist(
+        os.fsencode(path), ctypes.byref(attrs), buf, ctypes.sizeof(buf),
+        _FSOPT_NOFOLLOW | _FSOPT_ATTR_CMN_EXTENDED
+    )
+    if result != 0:
+        return None
+    return int.from_bytes(buf.raw[4:12], sys.byteorder, signed=True)
+
+
+def _is_clone(path, size):
+    """True if path already shares its blocks with another file, so deleting it frees little."""
+    private = _private_size(path)
+    return private is not None and private < size
+
+
+def _partial_hash(path, size):
+    h = hashlib.blake2b()
+    with open(path, "rb") as f:
+        h.update(f.read(PARTIAL_BLOCK))
+        if size > PARTIAL_BLOCK:
+            f.seek(max(PARTIAL_BLOCK, size - PARTIAL_BLOCK))
+            h.update(f.read(PARTIAL_BLOCK))
+    return h.hexdigest()
+
+
+def _full_hash(path):
+    h = hashlib.blake2b()
+    with open(path, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            h.update(data)
+    return h.hexdigest()
+
+
+def load_hash_cache():
+    """Return {(dev, ino, mtime_ns, size): [partial, full, path]} from the hash cache."""
+    logger = logging.getLogger(__name__)
+    if not os.path.exists(HASH_CACHE):
+        return {}
+    try:
+        _, columns = snapshot.read_columns(HASH_CACHE)
+        keys = zip(columns["dev"], columns["ino"], columns["mtime"], columns["size"])
+        paths = columns.get("path") or [""] * len(columns["dev"])
+        return {
+            key: [partial, full, path]
+            for key, partial, full, path in zip(keys, columns["partial"], columns["full"], paths)
+        }
+    except (OSError, ValueError, KeyError) as e:
+        logger.error(f"Failed to load hash cache: {e}")
+        return {}
+
+
+def prune_hash_cache(cache, folder, seen, min_size=MIN_SIZE):
+    """
+    Drop the entries of files of at least min_size under folder that its
+    walk did not see (deleted, or changed and so keyed anew), keeping other
+    folders' entries. Entries saved before paths were recorded go too.
+    """
+    prefix = os.path.join(os.path.abspath(os.path.expanduser(folder)), "")
+    stale = [
+        key for key, entry in cache.items()
+        if not entry[2] or (key not in seen and key[3] >= min_size and entry[2].startswith(prefix))
+    ]
+    for key in stale:
+        del cache[key]
+    return len(stale)
+
+
+def save_hash_cache(cache):
+    keys = list(cache)
+    columns = {
+        "dev": [key[0] for key in keys],
+        "ino": [key[1] for key in keys],
+        "mtime": [key[2] for key in keys],
+        "size": [key[3] for key in keys],
+        "partial": [cache[key][0] for key in keys],
+        "full": [cache[key][1] for key in keys],
+        "path": [cache[key][2] for key in keys],
+    }
+    try:
+        snapshot.write_columns(HASH_CACHE, {"count": len(keys)}, columns)
+    except (OSError, ValueError, OverflowError) as e:
+        logging.getLogger(__name__).error(f"Failed to save hash cache: {e}")
+
+
+def _hash_all(files, stage, cache, stop_event):
+    """
+    Hash (path, key) pairs on the worker pool; stage 0 is the partial hash,
+    1 the full one. Results are stored in cache and returned as {path: digest}.
+    """
+    logger = logging.getLogger(__name__)
+    digests = {}
+    todo = []
+    for path, key in files:
+        entry = cache.setdefault(key, ["", "", path])
+        entry[2] = path
+        if entry[stage]:
+            digests[path] = entry[stage]
+        else:
+            todo.append((path, key))
+
+    def work(path, key):
+        if stop_event is not None and stop_event.is_set():
+            return path, key, None
+        try:
+            digest = _partial_hash(path, key[3]) if stage == 0 else _full_hash(path)
+        except (OSError, ValueError) as e:
+            logger.debug(f"Cannot hash {path}: {e}")
+            digest = None
+        return path, key, digest
+
+    with ThreadPoolExecutor(max_workers=HASH_WORKERS) as pool:
+        for path, key, digest in pool.map(lambda f: work(*f), todo):
+            if digest is not None:
+                cache[key][stage] = digest
+                digests[path] = digest
+    return digests
+
+
+def find_duplicates(folder, exclusions=None, min_size=MIN_SIZE, progress_callback=lambda stage, count: None,
+                    stop_event=None):
+    """
+    Return duplicate groups under folder as dicts with size, digest, paths
+    and reclaimable bytes, most reclaimable first. Files are grouped by size,
+    then by a hash of their first and last blocks, and only the survivors are
+    hashed in full. Hard links and APFS clones are skipped, since removing
+    them frees nothing; hashes are cached by (dev, ino, mtime, size).
+    """
+    logger = logging.getLogger(__name__)
+    by_size = {}
+    seen = set()
+    for path, st in walk_files(folder, exclusions, lambda d, n: progress_callback("Listing files", n), stop_event):
+        if st.st_size >= min_size:
+            key = (st.st_dev, st.st_ino, st.st_mtime_ns, st.st_size)
+            by_size.setdefault(st.st_size, []).append((path, key))
+            seen.add(key)
+    if stop_event is not None and stop_event.is_set():
+        return []
+    candidates = [
+        (path, key) for files in by_size.values() if len(files) > 1
+        for path, key in files if not _is_clone(path, key[3])
+    ]
+    logger.info(f"{len(candidates)} files under {folder} share a size with another")
+    cache = load_hash_cache()
+    progress_callback("Comparing first and last blocks", len(candidates))
+    partial = _hash_all(candidates, 0, cache, stop_event)
+    by_partial = {}
+    for path, key in candidates:
+        if path in partial:
+            by_partial.setdefault((key[3], partial[path]), []).append((path, key))
+    survivors = [f for files in by_partial.values() if len(files) > 1 for f in files]
+    progress_callback("Hashing full contents", len(survivors))
+    full = _hash_all(survivors, 1, cache, stop_event)
+    if stop_event is None or not stop_event.is_set():
+        # Only a complete walk shows which cached files are gone
+        pruned = prune_hash_cache(cache, folder, seen, min_size)
+        if pruned:
+            logger.info(f"Dropped {pruned} stale entries from the hash cache")
+    save_hash_cache(cache)
+    if stop_event is not None and stop_event.is_set():
+        return []
+    groups = {}
+    for path, key in survivors:
+        if path in full:
+            groups.setdefault((key[3], full[path]), []).append(path)
+    result = [
+        {"size": size, "digest": digest, "paths": sorted(paths), "reclaimable": size * (len(paths) - 1)}
+        for (size, digest), paths in groups.items() if len(paths) > 1
+    ]
+    result.sort(key=lambda g: g["reclaimable"], reverse=True)
+    logger.info(f"Found {len(result)} duplicate groups under {folder}")
+    return result
+
+
+def duplicate_items(groups):
+    """Result rows for duplicate groups; each group's files share a category naming the group."""
+    items = []
+    for number, group in enumerate(groups, 1):
+        category = f"Duplicates #{number} ({len(group['paths'])} copies, {format_size(group['reclaimable'])} reclaimable)"
+        for path in group["paths"]:
+            name = os.path.basename(path)
+            items.append({
+                "category": category,
+                "name": name,
+                "short_name": name,
+                "path": path,
+                "size": format_size(group["size"])
+            })
+    return items
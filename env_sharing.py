@@ -0,0 +1,154 @@
+# macOS Cleanup Tool
+# Copyright (c) 2025 XClassicPeter
+# Licensed under the MIT License. See LICENSE for details.
+
+"""
+Exclusive vs shared bytes of Python environments. Conda hard-links package
+files from pkgs/ into every env (and uv from its cache into venvs), so
+per-env du figures add up to far more than the disk holds. One pass over
+every env and package store attributes each inode to the places that link
+it: an env's exclusive bytes are freed by deleting it, its shared bytes are
+not.
+"""
+
+import os
+import stat
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from scanner import format_size
+import metrics
+import throttle
+
+CONDA_ROOTS = ["~/miniconda3", "~/anaconda3", "~/miniforge3", "~/mambaforge", "/opt/anaconda3", "/opt/miniconda3"]
+PACKAGE_STORES = ["~/.conda/pkgs", "~/.cache/uv", "~/Library/Caches/uv"]
+ACCOUNT_WORKERS = 4
+
+
+def _walk(root, skip=()):
+    """
+    Walk root without following symlinks. Returns (bytes of files with a
+    single link, {(dev, ino): [allocated bytes, link count, links seen here]}).
+    """
+    single = 0
+    linked = {}
+    stack = [root]
+    dirs = files = 0
+    while stack:
+        directory = stack.pop()
+        dirs += 1
+        throttle.wait()
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    try:
+                        st = entry.stat(follow_symlinks=False)
+                    except OSError:
+                        continue
+                    if stat.S_ISDIR(st.st_mode):
+                        if entry.path not in skip:
+                            stack.append(entry.path)
+                        single += st.st_blocks * 512
+                        continue
+                    files += 1
+                    if st.st_nlink > 1:
+                        key = (st.st_dev, st.st_ino)
+                        if key in linked:
+                            linked[key][2] += 1
+                        else:
+                            linked[key] = [st.st_blocks * 512, st.st_nlink, 1]
+                    else:
+                        single += st.st_blocks * 512
+        except OSError as e:
+            logging.getLogger(__name__).debug(f"Cannot list {directory}: {e}")
+    metrics.count(dirs=dirs, files=files)
+    return single, linked
+
+
+def conda_locations(roots=CONDA_ROOTS):
+    """Return ([(env name, env path, dirs to skip)], [pkgs dirs]) for every conda install found."""
+    envs = []
+    stores = []
+    for root in (os.path.expanduser(r) for r in roots):
+        if not os.path.isdir(os.path.join(root, "conda-meta")):
+            continue
+        install = os.path.basename(root)
+        # The base env is the install itself, minus the other envs and the package cache
+        envs.append((f"{install} (base)", root, {os.path.join(root, "envs"), os.path.join(root, "pkgs")}))
+        stores.append(os.path.join(root, "pkgs"))
+        envs_dir = os.path.join(root, "envs")
+        try:
+            names = sorted(os.listdir(envs_dir))
+        except OSError:
+            names = []
+        for name in names:
+            path = os.path.join(envs_dir, name)
+            if os.path.isdir(os.path.join(path, "conda-meta")):
+                envs.append((f"{install}/{name}", path, set()))
+    return envs, [s for s in stores if os.path.isdir(s)]
+
+
+def account(envs, stores, workers=ACCOUNT_WORKERS):
+    """
+    envs and stores are [(name, path, dirs to skip)]. Returns {name:
+    (exclusive, shared)} for each: exclusive bytes are linked only from that
+    location, so deleting it frees them; shared bytes are also linked from
+    another env, a package store or anywhere outside the scanned locations.
+    """
+    locations = list(envs) + list(stores)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        walks = list(pool.map(lambda loc: _walk(loc[1], loc[2]), locations))
+    owners = {}  # inode -> number of scanned locations linking it
+    for _, linked in walks:
+        for key in linked:
+            owners[key] = owners.get(key, 0) + 1
+    result = {}
+    for (name, _, _), (single, linked) in zip(locations, walks):
+        exclusive, shared = single, 0
+        for key, (size, nlink, seen) in linked.items():
+            if owners[key] == 1 and seen == nlink:
+                exclusive += size
+            else:
+                shared += size
+        result[name] = (exclusive, shared)
+    return result
+
+
+def environment_items(venvs=()):
+    """
+    Rows for every conda env, the given venv paths and the package stores,
+    sized by their exclusive bytes.
+    """
+    logger = logging.getLogger(__name__)
+    envs, conda_stores = conda_locations()
+    envs += [(path.replace(os.path.expanduser("~"), "~", 1), path, set()) for path in venvs]
+    stores = [(path, path, set()) for path in conda_stores]
+    stores += [(path, path, set()) for path in map(os.path.expanduser, PACKAGE_STORES) if os.path.isdir(path)]
+    if not envs:
+        return []
+    sizes = account(envs, stores)
+    items = []
+    for (name, path, skip), kind in [(env, "Python Environment") for env in envs] + [(s, "Python Package Store") for s in stores]:
+        exclusive, shared = sizes[name]
+        label = os.path.basename(path) if kind == "Python Package Store" else name
+        freed = "freed if deleted" if kind == "Python Environment" else "used by no environment"
+        items.append({
+            "category": f"{kind} (exclusive)",
+            "name": f"{label} ({format_size(exclusive)} {freed}, {format_size(shared)} shared)",
+            "short_name": label,
+            "path": path,
+            "size": format_size(exclusive),
+            "bytes": exclusive,
+            "shared": shared,
+            "reclaimable": exclusive,
+        })
+        if skip:
+            # A base env is its whole install; trashing the row must leave envs/ and pkgs/ alone
+            try:
+                items[-1]["members"] = "\n".join(sorted(
+                    os.path.join(path, name) for name in os.listdir(path) if os.path.join(path, name) not in skip
+                ))
+            except OSError:
+                items.pop()
+    logger.info(f"Accounted shared files across {len(envs)} environments and {len(stores)} package stores")
+    return items
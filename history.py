@@ -0,0 +1,164 @@
+# macOS Cleanup Tool
+# Copyright (c) 2025 XClassicPeter
+# Licensed under the MIT License. See LICENSE for details.
+
+import os
+import time
+import logging
+
+import settings
+import snapshot
+from scanner import size_to_bytes
+
+HISTORY_DIR = os.path.join(settings.CACHE_DIR, "history")
+HISTORY_KEEP = 30  # snapshots kept per scan root
+
+
+def history_dir(root):
+    return snapshot.cache_file(HISTORY_DIR, root, "")
+
+
+def scan_params(max_depth, exclusions=(), quick=False, top_n=None, enabled_plugins=None):
+    """The settings that decide which paths a scan reports and how exactly; only scans with equal ones are compared."""
+    return {
+        "max_depth": max_depth,
+        "exclusions": sorted(set(exclusions)),
+        "quick": bool(quick),
+        "top_n": top_n or 0,
+        "disabled_plugins": sorted(name for name, enabled in (enabled_plugins or {}).items() if not enabled),
+    }
+
+
+def record_scan(root, items, params=None):
+    """
+    Append a scan of root to its history as path, bytes, files and mtime
+    columns with the scan_params() it ran with, dropping the oldest
+    snapshots beyond HISTORY_KEEP. Quick and top-N scans are not recorded:
+    their estimates and folded rows would show up as growth.
+    """
+    logger = logging.getLogger(__name__)
+    if params and (params.get("quick") or params.get("top_n")):
+        logger.info(f"Not recording {'quick' if params.get('quick') else 'top-N'} scan of {snapshot.root_key(root)} in history")
+        return
+    by_path = {}
+    for item in items:
+        if item.get("folded") or item.get("pending") or not item["path"]:
+            continue  # rows without a path (stale bytecode) only sum files listed elsewhere
+        by_path[item["path"]] = item
+    paths = list(by_path)
+    columns = {
+        "path": paths,
+        "bytes": [by_path[p].get("bytes") or size_to_bytes(by_path[p]["size"]) for p in paths],
+        "files": [by_path[p].get("files", 0) for p in paths],
+        "mtime": [float(by_path[p].get("mtime", 0)) for p in paths],
+    }
+    created = time.time()
+    meta = {"root": snapshot.root_key(root), "created": created, "count": len(paths), "params": params}
+    directory = history_dir(root)
+    try:
+        snapshot.write_columns(os.path.join(directory, f"{int(created * 1000)}.snap"), meta, columns)
+    except (OSError, ValueError) as e:
+        logger.error(f"Failed to record scan history for {meta['root']}: {e}")
+        return
+    for old in list_snapshots(root)[HISTORY_KEEP:]:
+        try:
+            os.remove(old[1])
+        except OSError as e:
+            logger.error(f"Failed to prune scan history {old[1]}: {e}")
+    logger.info(f"Recorded scan of {meta['root']} in history ({len(paths)} paths)")
+
+
+def list_snapshots(root):
+    """Return [(created, file)] of root's recorded scans, newest first."""
+    directory = history_dir(root)
+    try:
+        names = os.listdir(directory)
+    except FileNotFoundError:
+        return []
+    snapshots = []
+    for name in names:
+        stem, ext = os.path.splitext(name)
+        if ext == ".snap" and stem.isdigit():
+            snapshots.append((int(stem) / 1000, os.path.join(directory, name)))
+    return sorted(snapshots, reverse=True)
+
+
+def snapshot_before(root, seconds_ago, snapshots=None):
+    """Newest recorded scan at least seconds_ago old, else the oldest one, as (created, file) or None."""
+    snapshots = list_snapshots(root) if snapshots is None else snapshots
+    cutoff = time.time() - seconds_ago
+    for created, path in snapshots:
+        if created <= cutoff:
+            return created, path
+    return snapshots[-1] if snapshots else None
+
+
+def load_columns(path):
+    meta, columns = snapshot.read_columns(path)
+    for name in ("path", "bytes", "files", "mtime"):
+        if name not in columns:
+            raise ValueError(f"History snapshot {path} has no {name} column")
+    return meta, columns
+
+
+def diff_snapshots(old, new, limit=None):
+    """
+    Compare two history snapshots (columns from load_columns) by path.
+    Returns dicts with path, old and new bytes, delta and files_delta,
+    largest growth first; paths in only one snapshot count from zero.
+    """
+    old_index = {path: i for i, path in enumerate(old["path"])}
+    old_bytes, old_files = old["bytes"], old["files"]
+    changes = []
+    for i, path in enumerate(new["path"]):
+        j = old_index.pop(path, None)
+        before = old_bytes[j] if j is not None else 0
+        delta = new["bytes"][i] - before
+        files_delta = new["files"][i] - (old_files[j] if j is not None else 0)
+        if delta or files_delta:
+            changes.append((delta, path, before, new["bytes"][i], files_delta))
+    for path, j in old_index.items():
+        if old_bytes[j]:
+            changes.append((-old_bytes[j], path, old_bytes[j], 0, -old_files[j]))
+    changes.sort(reverse=True)
+    if limit:
+        changes = changes[:limit]
+    return [
+        {"path": path, "old": before, "new": after, "delta": delta, "files_delta": files_delta}
+        for delta, path, before, after, files_delta in changes
+    ]
+
+
+def growth_since(root, seconds_ago, limit=None):
+    """
+    Diff root's latest recorded scan against the one from seconds_ago,
+    among the earlier scans made with the same scan_params(). Returns (then,
+    now, changes) or None if there is no such pair.
+    """
+    logger = logging.getLogger(__name__)
+    snapshots = list_snapshots(root)
+    if len(snapshots) < 2:
+        return None
+    try:
+        params = snapshot.read_meta(snapshots[0][1]).get("params")
+    except (OSError, ValueError) as e:
+        logger.error(f"Failed to load scan history for {snapshot.root_key(root)}: {e}")
+        return None
+    comparable = []
+    for created, path in snapshots[1:]:
+        try:
+            if snapshot.read_meta(path).get("params") == params:
+                comparable.append((created, path))
+        except (OSError, ValueError) as e:
+            logger.debug(f"Skipping unreadable history snapshot {path}: {e}")
+    if not comparable:
+        logger.info(f"No earlier scan of {snapshot.root_key(root)} with the same depth, mode and exclusions")
+        return None
+    base = snapshot_before(root, seconds_ago, comparable)
+    try:
+        _, old = load_columns(base[1])
+        _, new = load_columns(snapshots[0][1])
+    except (OSError, ValueError) as e:
+        logger.error(f"Failed to load scan history for {snapshot.root_key(root)}: {e}")
+        return None
+    return base[0], snapshots[0][0], diff_snapshots(old, new, limit)
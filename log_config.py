@@ -0,0 +1,63 @@
+# macOS Cleanup Tool
+# Copyright (c) 2025 XClassicPeter
+# Licensed under the MIT License. See LICENSE for details.
+
+import os
+import queue
+import atexit
+import logging
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+LOG_FORMAT = "%(asctime)s [%(levelname)s] %(message)s"
+
+_listener = None
+
+
+def stop_logging():
+    """Flush queued records and stop the background writer."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def setup_logging(app_settings):
+    """
+    Send all log records through a queue to a background thread that writes
+    them to a size-rotated log file and stderr, so logging never makes a scan
+    wait on disk writes. Path, level and rotation come from the settings.
+    Returns the QueueListener; it is stopped (and flushed) at exit.
+    """
+    global _listener
+    stop_logging()
+    level_name = str(app_settings.get("log_level", "INFO")).upper()
+    level = logging.getLevelName(level_name)
+    if not isinstance(level, int):
+        level = logging.INFO
+    path = os.path.expanduser(app_settings.get("log_file") or "cleanup.log")
+    formatter = logging.Formatter(LOG_FORMAT)
+    file_handler = RotatingFileHandler(
+        path,
+        maxBytes=int(app_settings.get("log_max_mb", 5) * 1024 * 1024),
+        backupCount=app_settings.get("log_backups", 3),
+        encoding="utf-8",
+        delay=True
+    )
+    file_handler.setFormatter(formatter)
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(formatter)
+    log_queue = queue.SimpleQueue()
+    listener = QueueListener(log_queue, file_handler, stream_handler)
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    root.addHandler(QueueHandler(log_queue))
+    root.setLevel(level)
+    listener.start()
+    _listener = listener
+    if level_name != logging.getLevelName(level):
+        logging.getLogger(__name__).warning(f"Unknown log_level {level_name!r}, using INFO")
+    return listener
+
+
+atexit.register(stop_logging)
@@ -0,0 +1,147 @@
+# macOS Cleanup Tool
+# Copyright (c) 2025 XClassicPeter
+# Licensed under the MIT License. See LICENSE for details.
+
+"""
+Scan metrics in the Prometheus text format, for the node-exporter textfile
+collector. The scanner counts directories and files as it walks (in
+measure(), folder scans, marker rules, walk_files and the project,
+bytecode and environment walks; quick-mode sampling is not counted) and
+times each plugin; after a scan, write() renders those counters with the bytes
+found per category and plugin into one .prom file per scan root in the
+metrics_dir setting, replaced atomically so a scrape never sees half a file.
+"""
+
+import os
+import time
+import logging
+import tempfile
+import threading
+
+import settings
+import snapshot
+
+_lock = threading.Lock()
+_scan = {"started": time.time(), "dirs": 0, "files": 0, "errors": 0, "timeouts": 0, "plugins": {}}
+
+
+class _ErrorCounter(logging.Handler):
+    """Counts error records logged anywhere while a scan runs."""
+
+    def emit(self, record):
+        count(errors=1)
+
+
+_error_counter = _ErrorCounter(logging.ERROR)
+
+
+def begin():
+    """Reset the counters at the start of a scan."""
+    root = logging.getLogger()
+    if _error_counter not in root.handlers:  # logging setup replaces the root handlers
+        root.addHandler(_error_counter)
+    with _lock:
+        _scan.update({"started": time.time(), "dirs": 0, "files": 0, "errors": 0, "timeouts": 0, "plugins": {}})
+
+
+def count(dirs=0, files=0, errors=0, timeouts=0):
+    with _lock:
+        _scan["dirs"] += dirs
+        _scan["files"] += files
+        _scan["errors"] += errors
+        _scan["timeouts"] += timeouts
+
+
+def plugin_time(plugin_name, seconds):
+    with _lock:
+        _scan["plugins"][plugin_name] = _scan["plugins"].get(plugin_name, 0.0) + seconds
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels):
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + "}"
+
+
+def _category_bytes(items):
+    """{(plugin, category): bytes}, skipping rows nested in another row of the same plugin and category."""
+    from scanner import size_to_bytes  # scanner imports this module to count its walks
+    totals = {}
+    outer = {}
+    for item in sorted(items, key=lambda item: item["path"]):
+        if item.get("pending"):
+            continue
+        key = (item.get("plugin", ""), item["category"])
+        parent = outer.get(key)
+        if parent and item["path"].startswith(parent.rstrip(os.sep) + os.sep):
+            continue
+        outer[key] = item["path"]
+        totals[key] = totals.get(key, 0) + (item.get("bytes") or size_to_bytes(item["size"]))
+    return totals
+
+
+def render(root, items, now=None):
+    """The metrics of the scan just finished, as Prometheus text."""
+    now = time.time() if now is None else now
+    with _lock:
+        scan = dict(_scan, plugins=dict(_scan["plugins"]))
+    key = snapshot.root_key(root)
+    base = _labels(root=key)
+    lines = []
+
+    def metric(name, kind, help_text, samples):
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        lines.extend(f"{name}{labels} {value}" for labels, value in samples)
+
+    metric("cleanup_bytes", "gauge", "Bytes found per category and plugin in the last scan.", [
+        (_labels(root=key, plugin=plugin, category=category), size)
+        for (plugin, category), size in sorted(_category_bytes(items).items())
+    ])
+    metric("cleanup_items", "gauge", "Rows reported by the last scan.", [(base, len(items))])
+    metric("cleanup_scan_duration_seconds", "gauge", "Wall time of the last scan.", [(base, f"{now - scan['started']:.3f}")])
+    metric("cleanup_plugin_duration_seconds", "gauge",
+           "Seconds spent sizing a plugin's targets and running its scan(); plugins run in parallel, so these overlap.", [
+               (_labels(root=key, plugin=plugin), f"{seconds:.3f}") for plugin, seconds in sorted(scan["plugins"].items())
+           ])
+    metric("cleanup_directories_visited", "gauge", "Directories listed by the last scan.", [(base, scan["dirs"])])
+    metric("cleanup_files_visited", "gauge", "Files seen by the last scan's walks.", [(base, scan["files"])])
+    metric("cleanup_errors", "gauge", "Errors logged during the last scan.", [(base, scan["errors"])])
+    metric("cleanup_timeouts", "gauge", "Size measurements that timed out during the last scan.", [(base, scan["timeouts"])])
+    metric("cleanup_last_scan_timestamp_seconds", "gauge", "When the last scan finished.", [(base, f"{now:.3f}")])
+    return "\n".join(lines) + "\n"
+
+
+def metrics_path(root, directory):
+    return snapshot.cache_file(directory, root, ".prom")
+
+
+def write(root, items, directory=None):
+    """
+    Write the metrics of the scan of root into directory (default: the
+    metrics_dir setting; nothing is written when it is empty).
+    """
+    logger = logging.getLogger(__name__)
+    directory = directory if directory is not None else settings.get_settings().get("metrics_dir", "")
+    if not directory:
+        return
+    directory = os.path.expanduser(directory)
+    path = metrics_path(root, directory)
+    try:
+        data = render(root, items)
+        os.makedirs(directory, exist_ok=True)
+        # The collector only reads *.prom, so the temporary file is never scraped
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".metrics.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                f.write(data)
+            os.chmod(tmp_path, 0o644)  # the exporter usually runs as another user
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        logger.info(f"Wrote metrics to {path}")
+    except OSError as e:
+        logger.error(f"Failed to write metrics to {path}: {e}")
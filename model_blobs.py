@@ -0,0 +1,185 @@
+# macOS Cleanup Tool
+# Copyright (c) 2025 XClassicPeter
+# Licensed under the MIT License. See LICENSE for details.
+
+"""
+Blob accounting for content-addressed model stores (Ollama, the Hugging
+Face hub cache). Models reference shared blobs, so a model's apparent size
+overstates what deleting it frees. Everything here comes from manifests,
+symlinks and stat(); no weights are read or hashed.
+"""
+
+import os
+import json
+import logging
+
+from scanner import format_size
+
+HF_PREFIXES = {"models--": "", "datasets--": "datasets/", "spaces--": "spaces/"}
+
+
+def _allocated(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None, 0
+    return (st.st_dev, st.st_ino), st.st_blocks * 512
+
+
+def ollama_models(models_dir):
+    """
+    Return ({model: set(blob paths)}, set(all blob paths)) for an Ollama
+    models directory. Model names are host/namespace/model:tag, shortened to
+    model:tag for the default library.
+    """
+    logger = logging.getLogger(__name__)
+    manifests_dir = os.path.join(models_dir, "manifests")
+    blobs_dir = os.path.join(models_dir, "blobs")
+    models = {}
+    for dirpath, _, files in os.walk(manifests_dir):
+        for tag in files:
+            path = os.path.join(dirpath, tag)
+            try:
+                with open(path) as f:
+                    manifest = json.load(f)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Cannot read Ollama manifest {path}: {e}")
+                continue
+            parts = os.path.relpath(dirpath, manifests_dir).split(os.sep)
+            if parts[0] == "registry.ollama.ai":
+                parts = parts[1:]
+            if parts and parts[0] == "library":
+                parts = parts[1:]
+            name = f"{'/'.join(parts)}:{tag}"
+            blobs = set()
+            for layer in manifest.get("layers", []) + [manifest.get("config") or {}]:
+                digest = layer.get("digest", "")
+                for candidate in (digest.replace(":", "-"), digest):
+                    blob = os.path.join(blobs_dir, candidate)
+                    if digest and os.path.exists(blob):
+                        blobs.add(blob)
+                        break
+            models[(name, path)] = blobs
+    try:
+        stored = {os.path.join(blobs_dir, name) for name in os.listdir(blobs_dir)}
+    except OSError:
+        stored = set()
+    return models, stored
+
+
+def huggingface_models(hub_dir):
+    """
+    Return ({model: set(blob paths)}, set(all blob paths)) for a Hugging Face
+    hub cache, one model per repo revision (repo@branch, or repo@commit for
+    revisions no branch points at).
+    """
+    models = {}
+    stored = set()
+    try:
+        repos = sorted(os.listdir(hub_dir))
+    except OSError:
+        return models, stored
+    for repo in repos:
+        prefix = next((p for p in HF_PREFIXES if repo.startswith(p)), None)
+        if prefix is None:
+            continue
+        repo_dir = os.path.join(hub_dir, repo)
+        repo_name = HF_PREFIXES[prefix] + repo[len(prefix):].replace("--", "/")
+        blobs_dir = os.path.join(repo_dir, "blobs")
+        try:
+            stored.update(os.path.join(blobs_dir, name) for name in os.listdir(blobs_dir))
+        except OSError:
+            pass
+        branches = {}
+        for dirpath, _, files in os.walk(os.path.join(repo_dir, "refs")):
+            for ref in files:
+                try:
+                    with open(os.path.join(dirpath, ref)) as f:
+                        branches.setdefault(f.read().strip(), ref)
+                except OSError:
+                    continue
+        snapshots_dir = os.path.join(repo_dir, "snapshots")
+        try:
+            revisions = os.listdir(snapshots_dir)
+        except OSError:
+            continue
+        for revision in revisions:
+            snapshot_dir = os.path.join(snapshots_dir, revision)
+            blobs = set()
+            for dirpath, _, files in os.walk(snapshot_dir):
+                for name in files:
+                    path = os.path.join(dirpath, name)
+                    # Snapshot files are symlinks into blobs/; a plain file is its own blob
+                    blobs.add(os.path.realpath(path) if os.path.islink(path) else path)
+            label = branches.get(revision, revision[:7])
+            # Deleting the only revision should take the whole repo folder with it
+            path = repo_dir if len(revisions) == 1 else snapshot_dir
+            models[(f"{repo_name}@{label}", path)] = blobs
+    return models, stored
+
+
+def account(models, stored):
+    """
+    Attribute blob bytes to models. Returns ([(name, path, unique, shared,
+    unique blob paths)], [(orphan blob path, bytes)]): unique bytes are
+    referenced by that model alone and freed by deleting it and its unique
+    blobs; shared bytes stay for other models. Blobs no model references are
+    orphans. Hard-linked blobs count once.
+    """
+    owners = {}
+    sizes = {}
+    for key, blobs in models.items():
+        for blob in blobs:
+            inode, size = _allocated(blob)
+            if inode is None:
+                continue
+            sizes[inode] = size
+            owners.setdefault(inode, set()).add(key)
+    result = []
+    for key, blobs in models.items():
+        inodes = {blob: _allocated(blob)[0] for blob in blobs}
+        inodes = {blob: inode for blob, inode in inodes.items() if inode is not None}
+        unique = sum(sizes[i] for i in set(inodes.values()) if len(owners[i]) == 1)
+        shared = sum(sizes[i] for i in set(inodes.values()) if len(owners[i]) > 1)
+        exclusive = sorted(blob for blob, inode in inodes.items() if len(owners[inode]) == 1)
+        result.append((key[0], key[1], unique, shared, exclusive))
+    orphans = []
+    for blob in sorted(stored):
+        inode, size = _allocated(blob)
+        if inode is not None and inode not in owners and os.path.isfile(blob):
+            orphans.append((blob, size))
+    return result, orphans
+
+
+def model_items(models, stored, category):
+    """Result rows for a model store: one per model sized by what deleting it frees, one per orphan blob."""
+    accounted, orphans = account(models, stored)
+    items = []
+    for name, path, unique, shared, exclusive in accounted:
+        # The manifest or snapshot alone frees nothing; its unique blobs are the bytes
+        inside = os.path.join(path, "")
+        members = [path] + [blob for blob in exclusive if not blob.startswith(inside)]
+        items.append({
+            "category": category,
+            "name": f"{name} ({format_size(unique + shared)} total, {format_size(shared)} shared with other models)",
+            "short_name": name,
+            "path": path,
+            "size": format_size(unique),
+            "bytes": unique,
+            "shared": shared,
+            "reclaimable": unique,
+            "members": "\n".join(members),
+        })
+    for blob, size in orphans:
+        name = os.path.basename(blob)
+        items.append({
+            "category": f"{category} (unreferenced blobs)",
+            "name": name,
+            "short_name": name,
+            "path": blob,
+            "size": format_size(size),
+            "bytes": size,
+            "files": 1,
+            "reclaimable": size,
+        })
+    return items
@@ -0,0 +1,135 @@
+# macOS Cleanup Tool
+# Copyright (c) 2025 XClassicPeter
+# Licensed under the MIT License. See LICENSE for details.
+
+import os
+import time
+import logging
+
+import settings
+import snapshot
+
+PLUGIN_CACHE_DIR = os.path.join(settings.CACHE_DIR, "plugins")
+
+
+def _cache_path(plugin_name):
+    return os.path.join(PLUGIN_CACHE_DIR, f"{plugin_name}.cache")
+
+
+def _watch_state(paths):
+    state = {}
+    for path in paths:
+        try:
+            state[path] = os.stat(path).st_mtime
+        except OSError:
+            state[path] = None
+    return state
+
+
+def cache_params(max_depth, exclusions=()):
+    """The scan settings a plugin's results depend on; a cache stored under other ones is a miss."""
+    return {"max_depth": max_depth, "exclusions": sorted(set(exclusions))}
+
+
+def is_cacheable(plugin):
+    return bool(plugin.cache_ttl or plugin.cache_watch)
+
+
+def watch_paths(plugin, resolved=()):
+    """
+    Folders whose mtime invalidates the plugin's cache: its cache_watch,
+    plus, for marker rules, the folder each rule searches under, the visible
+    folders directly inside it and the parents of the paths it resolved to,
+    so new and removed matches show up before the TTL runs out.
+    """
+    paths = list(plugin.cache_watch)
+    try:
+        rules = [r for r in plugin.targets() if "marker" in r or "contains" in r]
+    except Exception:
+        rules = []
+    for rule in rules:
+        root = os.path.expanduser(rule.get("under", "~"))
+        paths.append(root)
+        try:
+            with os.scandir(root) as entries:
+                paths.extend(e.path for e in entries if not e.name.startswith(".") and e.is_dir(follow_symlinks=False))
+        except OSError:
+            pass
+    if rules:
+        paths.extend(os.path.dirname(path) for path in resolved)
+    return list(dict.fromkeys(paths))
+
+
+def invalidate(plugin_name):
+    """Drop a plugin's cached results, e.g. after one of its rows was trashed."""
+    try:
+        os.remove(_cache_path(plugin_name))
+        logging.getLogger(__name__).info(f"Invalidated cache of plugin {plugin_name}")
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        logging.getLogger(__name__).error(f"Failed to invalidate cache of plugin {plugin_name}: {e}")
+
+
+def load_cached(plugin_name, plugin, params=None):
+    """
+    Return the plugin's cached items if they were stored under the same
+    params (see cache_params) and its cache policy says they are still
+    fresh, else None.
+    """
+    logger = logging.getLogger(__name__)
+    path = _cache_path(plugin_name)
+    if not is_cacheable(plugin) or not os.path.exists(path):
+        return None
+    try:
+        meta, columns = snapshot.read_columns(path)
+    except (OSError, ValueError) as e:
+        logger.error(f"Unreadable cache for plugin {plugin_name}: {e}")
+        return None
+    if meta.get("params") != params:
+        logger.debug(f"Cache for plugin {plugin_name} was stored under other scan settings")
+        return None
+    age = time.time() - meta.get("created", 0)
+    if plugin.cache_ttl and age > plugin.cache_ttl:
+        logger.debug(f"Cache for plugin {plugin_name} expired ({age:.0f}s old)")
+        return None
+    watched = meta.get("watch") or {}
+    if watched != _watch_state(list(dict.fromkeys(list(watched) + list(plugin.cache_watch)))):
+        logger.debug(f"Watched paths of plugin {plugin_name} changed")
+        return None
+    try:
+        items = snapshot.columns_to_items(columns)
+    except KeyError as e:
+        logger.error(f"Incomplete cache for plugin {plugin_name}: {e}")
+        return None
+    present = []
+    for item in items:
+        members = [m for m in item.get("members", "").split("\n") if m]
+        gone = [m for m in members if not os.path.lexists(m)]
+        if members and gone and len(gone) < len(members):
+            logger.debug(f"Members of cached row {item['path']} of plugin {plugin_name} changed")
+            return None  # its size no longer adds up; measure it again
+        # A row listing members stands for them; its path may be an unrelated folder or empty
+        if (members and gone) or (not members and not os.path.lexists(os.path.expanduser(item["path"]))):
+            continue
+        present.append(item)
+    if len(present) < len(items):
+        logger.debug(f"Dropped {len(items) - len(present)} cached rows of plugin {plugin_name} whose paths are gone")
+    items = present
+    logger.info(f"Serving plugin {plugin_name} from cache ({age:.0f}s old, {len(items)} items)")
+    return items
+
+
+def store(plugin_name, plugin, items, resolved=(), params=None):
+    """
+    Cache a plugin's items scanned under params (see cache_params); resolved
+    are the paths its targets resolved to, see watch_paths.
+    """
+    if not is_cacheable(plugin):
+        return
+    meta = {"plugin": plugin_name, "created": time.time(), "watch": _watch_state(watch_paths(plugin, resolved)),
+            "params": params}
+    try:
+        snapshot.write_columns(_cache_path(plugin_name), meta, snapshot.items_to_columns(items))
+    except (OSError, ValueError) as e:
+        logging.getLogger(__name__).error(f"Failed to cache results of plugin {plugin_name}: {e}")
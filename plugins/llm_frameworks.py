@@ -1,46 +1,45 @@
 import os
 import logging
 from plugins.plugin_base import PluginBase
-from scanner import get_size
+from model_blobs import ollama_models, huggingface_models, model_items
 
 class Plugin(PluginBase):
+    ollama_dir = os.environ.get("OLLAMA_MODELS", os.path.expanduser("~/.ollama/models"))
+    hf_hub_dirs = [
+        os.environ.get("HF_HUB_CACHE", os.path.expanduser("~/.cache/huggingface/hub")),
+        os.path.expanduser("~/Library/Caches/huggingface/hub"),
+    ]
+    cache_ttl = 6 * 3600
+    # Pulls and removals change the stores the model rows are read from, wherever they live
+    cache_watch = [os.path.join(ollama_dir, "blobs")] + hf_hub_dirs
+
     def __init__(self):
         super().__init__()
         self.logger.info("LLM Frameworks plugin initialized")
 
-    def scan(self):
-        self.logger.info("Starting LLM Frameworks plugin scan")
-        items = []
-        paths = [
-            (os.path.expanduser("~/.ollama/models"), "Ollama Cache"),
-            (os.path.expanduser("~/.cache/lm_studio"), "LM Studio Cache"),
-            (os.path.expanduser("~/Library/Application Support/LM Studio"), "LM Studio Data"),
-            (os.path.expanduser("~/.cache/llama_cpp"), "LLaMA.cpp Cache"),
-            (os.path.expanduser("~/.cache/vllm"), "vLLM Cache"),
-            (os.path.expanduser("~/.localai/models"), "LocalAI Cache"),
-            (os.path.expanduser("~/.localai/logs"), "LocalAI Logs"),
-            (os.path.expanduser("~/.cache/huggingface"), "HuggingFace Cache"),
-            (os.path.expanduser("~/Library/Caches/huggingface"), "HuggingFace Cache"),
-            (os.path.expanduser("~/.cache/transformers"), "Transformers Cache"),
+    def targets(self):
+        return [
+            {"path": "~/.ollama/models", "category": "Ollama Cache"},
+            {"path": "~/.cache/lm_studio", "category": "LM Studio Cache"},
+            {"path": "~/Library/Application Support/LM Studio", "category": "LM Studio Data"},
+            {"path": "~/.cache/llama_cpp", "category": "LLaMA.cpp Cache"},
+            {"path": "~/.cache/vllm", "category": "vLLM Cache"},
+            {"path": "~/.localai/models", "category": "LocalAI Cache"},
+            {"path": "~/.localai/logs", "category": "LocalAI Logs"},
+            {"path": "~/.cache/huggingface", "category": "HuggingFace Cache"},
+            {"path": "~/Library/Caches/huggingface", "category": "HuggingFace Cache"},
+            {"path": "~/.cache/transformers", "category": "Transformers Cache"},
         ]
 
-        for path, category in paths:
-            if not os.path.exists(path):
-                self.logger.debug(f"Path does not exist: {path}")
-                continue
-            size = get_size(path)
-            if size == "0B":
-                self.logger.debug(f"Empty or inaccessible path: {path}")
-                continue
-            name = os.path.basename(path)
-            items.append({
-                "category": category,
-                "name": name,
-                "short_name": name,
-                "path": path,
-                "size": size
-            })
-            self.logger.info(f"Found {category}: {path} ({size})")
-
-        self.logger.info(f"LLM Frameworks plugin scan completed: {len(items)} items found")
-        return items
\ No newline at end of file
+    def scan(self):
+        """One row per Ollama model and Hugging Face revision, sized by the blobs only it references."""
+        items = []
+        if os.path.isdir(self.ollama_dir):
+            models, stored = ollama_models(self.ollama_dir)
+            items.extend(model_items(models, stored, "Ollama Model"))
+        for hub_dir in dict.fromkeys(self.hf_hub_dirs):
+            if os.path.isdir(hub_dir):
+                models, stored = huggingface_models(hub_dir)
+                items.extend(model_items(models, stored, "HuggingFace Model"))
+        self.logger.info(f"Accounted {len(items)} model and blob rows")
+        return items
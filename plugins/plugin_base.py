@@ -1,14 +1,41 @@
 import logging
 
 class PluginBase:
+    # Cache policy. scan_system() serves a plugin's previous results while
+    # they are fresh: for cache_ttl seconds, and/or until the modification
+    # time of one of the cache_watch paths changes. Leave both unset for
+    # targets that change constantly (caches, logs).
+    cache_ttl = None
+    cache_watch = []
+
     def __init__(self):
         self.logger = logging.getLogger(__name__)
+        # (path, category) pairs targets() resolved to, set by the scanner
+        # before scan() runs so scan() can build on them without walking again
+        self.resolved_targets = []
+        # The exclusions of the scan in progress, also set before scan()
+        self.exclusions = []
+
+    def targets(self):
+        """
+        Declare what to size; the scanner resolves and sizes the targets of
+        all plugins together, each path once. Return a list of rules:
+          {"path": "~/.npm", "category": "NPM Cache"}
+          {"glob": "/usr/local/Cellar/python@*", "category": "Homebrew Python"}
+          {"marker": "node_modules", "under": "~", "max_depth": 2, "category": "Node.js Cache"}
+          {"contains": "pyvenv.cfg", "under": "~", "max_depth": 2, "category": "Virtual Environment"}
+        Marker rules match directories named marker (or containing a file
+        named contains) down to max_depth levels below under.
+        """
+        return []
 
     def scan(self):
         """
-        Scan for items (e.g., caches, temp files) and return a list of dictionaries.
-        Each dictionary must contain: category, name, short_name, path, size.
-        Subclasses must implement this method.
+        Custom logic for anything targets() can't express. Return a list of
+        dictionaries, each with: category, name, short_name, path, size.
+        Plugins must override targets(), scan() or both.
         """
-        self.logger.error(f"scan() not implemented in {self.__class__.__name__}")
-        raise NotImplementedError("Plugin must implement scan() method")
\ No newline at end of file
+        if type(self).targets is PluginBase.targets:
+            self.logger.error(f"Neither targets() nor scan() implemented in {self.__class__.__name__}")
+            raise NotImplementedError("Plugin must implement targets() or scan()")
+        return []
@@ -0,0 +1,16 @@
+import logging
+from plugins.plugin_base import PluginBase
+from projects import project_items
+
+class Plugin(PluginBase):
+    roots = ["~"]
+
+    def __init__(self):
+        super().__init__()
+        self.logger.info("Project Artifacts plugin initialized")
+
+    def scan(self):
+        """One row per project anywhere under home, totalling its node_modules, caches, venvs and build output."""
+        items = project_items(self.roots, self.exclusions)
+        self.logger.info(f"Found {len(items)} projects with regenerable artifacts")
+        return items
@@ -1,72 +1,37 @@
 import os
-import glob
 import logging
 from plugins.plugin_base import PluginBase
-from scanner import get_size
+from env_sharing import environment_items
 
 class Plugin(PluginBase):
+    # Installs and environments change rarely, and the home walk for venvs is slow
+    cache_ttl = 24 * 3600
+    cache_watch = [
+        os.path.expanduser("~/.pyenv/versions"),
+        os.path.expanduser("~/miniconda3/envs"),
+        os.path.expanduser("~/anaconda3/envs"),
+    ]
+
     def __init__(self):
         super().__init__()
         self.logger.info("Python Installs plugin initialized")
 
-    def scan(self):
-        self.logger.info("Starting Python Installs plugin scan")
-        items = []
-        python_paths = [
-            ("/Library/Frameworks/Python.framework", "System Python"),
-            ("/Library/Python", "System Python Library"),
-            (os.path.expanduser("~/.pyenv"), "Pyenv Install"),
-            ("/usr/local/Cellar/python", "Homebrew Python"),
-        ]
-        homebrew_python = glob.glob("/usr/local/Cellar/python@*")
-        python_paths.extend([(path, "Homebrew Python") for path in homebrew_python])
-
-        conda_paths = [
-            (os.path.expanduser("~/miniconda3/envs"), "Conda Environment"),
-            (os.path.expanduser("~/anaconda3/envs"), "Conda Environment"),
-            ("/opt/anaconda3/envs", "Conda Environment"),
-            ("/opt/miniconda3/envs", "Conda Environment"),
+    def targets(self):
+        return [
+            {"path": "/Library/Frameworks/Python.framework", "category": "System Python"},
+            {"path": "/Library/Python", "category": "System Python Library"},
+            {"path": "~/.pyenv", "category": "Pyenv Install"},
+            {"path": "/usr/local/Cellar/python", "category": "Homebrew Python"},
+            {"glob": "/usr/local/Cellar/python@*", "category": "Homebrew Python"},
+            # Environments are sized by scan() by the files only they link, not as a whole
+            {"path": "~/miniconda3/envs", "category": "Conda Environment", "measure": False},
+            {"path": "~/anaconda3/envs", "category": "Conda Environment", "measure": False},
+            {"path": "/opt/anaconda3/envs", "category": "Conda Environment", "measure": False},
+            {"path": "/opt/miniconda3/envs", "category": "Conda Environment", "measure": False},
+            {"contains": "pyvenv.cfg", "under": "~", "max_depth": 2, "category": "Virtual Environment", "measure": False},
         ]
 
-        for path, category in python_paths + conda_paths:
-            if not os.path.exists(path):
-                self.logger.debug(f"Path does not exist: {path}")
-                continue
-            size = get_size(path)
-            if size == "0B":
-                self.logger.debug(f"Empty or inaccessible path: {path}")
-                continue
-            name = os.path.basename(path)
-            items.append({
-                "category": category,
-                "name": name,
-                "short_name": name,
-                "path": path,
-                "size": size
-            })
-            self.logger.info(f"Found {category}: {path} ({size})")
-
-        home = os.path.expanduser("~")
-        for root, dirs, files in os.walk(home, topdown=True):
-            if root[len(home) + 1:].count(os.sep) > 2:
-                dirs[:] = []
-                continue
-            if "pyvenv.cfg" in files:
-                path = root
-                size = get_size(path)
-                if size != "0B":
-                    name = os.path.basename(path)
-                    items.append({
-                        "category": "Virtual Environment",
-                        "name": name,
-                        "short_name": name,
-                        "path": path,
-                        "size": size
-                    })
-                    self.logger.info(f"Found Virtual Environment: {path} ({size})")
-                else:
-                    self.logger.debug(f"Empty or inaccessible venv: {path}")
-                dirs[:] = []
-
-        self.logger.info(f"Python Installs plugin scan completed: {len(items)} items found")
-        return items
+    def scan(self):
+        """Each conda env, venv and package store sized by the files only it links, in one pass over all of them."""
+        venvs = [path for path, category in self.resolved_targets if category == "Virtual Environment"]
+        return environment_items(venvs)
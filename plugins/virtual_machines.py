@@ -1,52 +1,65 @@
 import os
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from plugins.plugin_base import PluginBase
-from scanner import get_size
+from scanner import measure, TARGET_WORKERS
+from disk_images import find_images, analyze_images, image_item
 
 class Plugin(PluginBase):
+    # VM bundles are few and huge; adding or removing one shows up in these folders
+    cache_ttl = 6 * 3600
+    cache_watch = [
+        os.path.expanduser("~/Parallels"),
+        os.path.expanduser("~/VirtualBox VMs"),
+        os.path.expanduser("~/Library/Containers/com.utmapp.UTM/Data/Documents"),
+    ]
+
     def __init__(self):
         super().__init__()
         self.logger.info("Virtual Machines plugin initialized")
 
-    def scan(self):
-        self.logger.info("Starting Virtual Machines plugin scan")
-        items = []
-        paths = [
-            (os.path.expanduser("~/Parallels"), "Parallels VM"),
-            (os.path.expanduser("~/Documents/Parallels"), "Parallels VM"),
-            (os.path.expanduser("~/Library/Parallels"), "Parallels VM"),
-            (os.path.expanduser("~/vmware"), "VMware VM"),
-            (os.path.expanduser("~/Documents/Virtual Machines"), "VMware VM"),
-            (os.path.expanduser("~/VirtualBox VMs"), "VirtualBox VM"),
-            (os.path.expanduser("~/Library/VirtualBox"), "VirtualBox VM"),
-            (os.path.expanduser("~/.qemu"), "QEMU VM"),
-            (os.path.expanduser("~/Library/Containers/com.utmapp.UTM/Data/Documents"), "UTM VM"),
-            (os.path.expanduser("~/Documents/UTM"), "UTM VM"),
-            (os.path.expanduser("~/Library/Logs/UTM"), "UTM VM"),
-            (os.path.expanduser("~/.wine"), "Wine"),
-            (os.path.expanduser("~/Library/Application Support/com.codeweavers.CrossOver"), "CrossOver"),
-            (os.path.expanduser("~/Library/Application Support/Heroic"), "Heroic Games Launcher"),
-            (os.path.expanduser("~/Library/Containers/com.isaacmarovitz.Whisky"), "Whisky"),
-            (os.path.expanduser("~/Library/Application Support/CrossOver"), "CrossOver"),
+    def targets(self):
+        # Sized in scan(), which reports a folder holding disk images through its images only
+        return [
+            {"path": "~/Parallels", "category": "Parallels VM", "measure": False},
+            {"path": "~/Documents/Parallels", "category": "Parallels VM", "measure": False},
+            {"path": "~/Library/Parallels", "category": "Parallels VM", "measure": False},
+            {"path": "~/vmware", "category": "VMware VM", "measure": False},
+            {"path": "~/Documents/Virtual Machines", "category": "VMware VM", "measure": False},
+            {"path": "~/VirtualBox VMs", "category": "VirtualBox VM", "measure": False},
+            {"path": "~/Library/VirtualBox", "category": "VirtualBox VM", "measure": False},
+            {"path": "~/.qemu", "category": "QEMU VM", "measure": False},
+            {"path": "~/Library/Containers/com.utmapp.UTM/Data/Documents", "category": "UTM VM", "measure": False},
+            {"path": "~/Documents/UTM", "category": "UTM VM", "measure": False},
+            {"path": "~/Library/Logs/UTM", "category": "UTM VM", "measure": False},
+            {"path": "~/.wine", "category": "Wine", "measure": False},
+            {"path": "~/Library/Application Support/com.codeweavers.CrossOver", "category": "CrossOver", "measure": False},
+            {"path": "~/Library/Application Support/Heroic", "category": "Heroic Games Launcher", "measure": False},
+            {"path": "~/Library/Containers/com.isaacmarovitz.Whisky", "category": "Whisky", "measure": False},
+            {"path": "~/Library/Application Support/CrossOver", "category": "CrossOver", "measure": False},
         ]
 
-        for path, category in paths:
-            if not os.path.exists(path):
-                self.logger.debug(f"Path does not exist: {path}")
-                continue
-            size = get_size(path)
-            if size == "0B":
-                self.logger.debug(f"Empty or inaccessible path: {path}")
+    def scan(self):
+        """
+        One row per disk image in the VM folders (allocated size, virtual size
+        and what compacting it would free), and a size row for each folder
+        without images; a row for the whole folder would count them twice.
+        """
+        folders = {path: category for path, category in self.resolved_targets if os.path.isdir(path)}
+        owners = dict(find_images(folders, self.exclusions))
+        items = []
+        with_images = set()
+        for info in analyze_images(list(owners)):
+            folder = owners[info["path"]]
+            with_images.add(folder)
+            items.append(image_item(info, f"{folders[folder]} Disk Image"))
+        self.logger.info(f"Analyzed {len(items)} VM disk images")
+        bare = [folder for folder in folders if folder not in with_images]
+        with ThreadPoolExecutor(max_workers=TARGET_WORKERS) as pool:
+            sizes = list(pool.map(measure, bare))
+        for folder, fields in zip(bare, sizes):
+            if not fields["bytes"]:
                 continue
-            name = os.path.basename(path)
-            items.append({
-                "category": category,
-                "name": name,
-                "short_name": name,
-                "path": path,
-                "size": size
-            })
-            self.logger.info(f"Found {category}: {path} ({size})")
-
-        self.logger.info(f"Virtual Machines plugin scan completed: {len(items)} items found")
-        return items
\ No newline at end of file
+            name = os.path.basename(folder)
+            items.append(dict(fields, category=folders[folder], name=name, short_name=name, path=folder))
+        return items
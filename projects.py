@@ -0,0 +1,240 @@
+# macOS Cleanup Tool
+# Copyright (c) 2025 XClassicPeter
+# Licensed under the MIT License. See LICENSE for details.
+
+"""
+Project discovery: finds project roots at any depth by their marker files,
+collects the regenerable artifacts inside each one (node_modules, caches,
+venvs, build output) and totals them per project. Directory listings and
+artifact sizes are cached in cache/projects/ and only redone for folders
+whose modification time changed.
+"""
+
+import os
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+import settings
+import metrics
+import snapshot
+import throttle
+from scanner import measure, format_size, _should_exclude, TARGET_WORKERS
+
+PROJECT_INDEX_DIR = os.path.join(settings.CACHE_DIR, "projects")
+ARTIFACT_MAX_AGE = 6 * 3600  # re-measure artifacts this often even if their top folder didn't change
+PROJECT_MARKERS = {
+    "package.json", "pyproject.toml", "setup.py", "setup.cfg", "Cargo.toml", "go.mod", "pom.xml",
+    "build.gradle", "build.gradle.kts", "Gemfile", "composer.json", "Package.swift", "mix.exs", "CMakeLists.txt",
+}
+# Artifact folder name -> what makes it regenerable: None (always), the
+# project markers it is built from, or a file it must contain
+ARTIFACTS = {
+    "node_modules": None,
+    "__pycache__": None,
+    ".pytest_cache": None,
+    ".mypy_cache": None,
+    ".ruff_cache": None,
+    ".tox": None,
+    ".nox": None,
+    ".next": None,
+    ".nuxt": None,
+    ".parcel-cache": None,
+    ".turbo": None,
+    ".gradle": None,
+    ".venv": "pyvenv.cfg",
+    "venv": "pyvenv.cfg",
+    "env": "pyvenv.cfg",
+    "target": ("Cargo.toml", "pom.xml"),
+    "build": ("setup.py", "pyproject.toml", "build.gradle", "build.gradle.kts", "CMakeLists.txt"),
+    "dist": ("setup.py", "pyproject.toml", "package.json"),
+    ".build": ("Package.swift",),
+    "_build": ("mix.exs",),
+}
+# Never descended into, project or not: too big and never hold projects of their own
+PRUNED = {"node_modules", "__pycache__", ".git", ".hg", ".svn"}
+PRUNED_PATHS = ["~/Library", "~/.Trash"]
+
+
+def _is_artifact(name, path, markers):
+    rule = ARTIFACTS[name]
+    if rule is None:
+        return True
+    if isinstance(rule, str):
+        return os.path.isfile(os.path.join(path, rule))
+    return any(marker in markers for marker in rule)
+
+
+def _list(path):
+    """(child directory names, project marker files) of path."""
+    subdirs, markers = [], []
+    files = 0
+    with os.scandir(path) as entries:
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    subdirs.append(entry.name)
+                    continue
+            except OSError:
+                continue
+            files += 1
+            if entry.name in PROJECT_MARKERS:
+                markers.append(entry.name)
+    metrics.count(dirs=1, files=files)
+    return subdirs, markers
+
+
+def discover(roots, exclusions, index):
+    """
+    Walk roots to any depth. index maps directory -> (mtime_ns, subdirs,
+    markers) from the previous walk; directories whose mtime is unchanged
+    are not listed again. Returns (new index, {project root: [artifact paths]}).
+    """
+    pruned = {os.path.expanduser(p) for p in PRUNED_PATHS}
+    new_index = {}
+    projects = {}
+    listed = 0
+    stack = [(os.path.expanduser(root), None, ()) for root in roots]
+    while stack:
+        path, project, project_markers = stack.pop()
+        try:
+            mtime = os.lstat(path).st_mtime_ns
+        except OSError:
+            continue
+        cached = index.get(path)
+        if cached is not None and cached[0] == mtime:
+            subdirs, markers = cached[1], cached[2]
+        else:
+            throttle.wait()
+            try:
+                subdirs, markers = _list(path)
+            except OSError:
+                continue
+            listed += 1
+        new_index[path] = (mtime, subdirs, markers)
+        if markers:
+            project, project_markers = path, markers
+            projects.setdefault(path, [])
+        for name in subdirs:
+            child = os.path.join(path, name)
+            if _should_exclude(child, exclusions) or child in pruned:
+                continue
+            if project is not None and name in ARTIFACTS and _is_artifact(name, child, project_markers):
+                projects[project].append(child)
+                continue
+            if name in PRUNED or name.startswith("."):
+                continue
+            stack.append((child, project, project_markers))
+    logging.getLogger(__name__).info(
+        f"Project index: {len(new_index)} folders, {listed} listed again, {len(projects)} projects"
+    )
+    return new_index, projects
+
+
+def _load(name):
+    path = os.path.join(PROJECT_INDEX_DIR, name)
+    if not os.path.exists(path):
+        return {}
+    try:
+        return snapshot.read_columns(path)[1]
+    except (OSError, ValueError) as e:
+        logging.getLogger(__name__).error(f"Failed to load project index {path}: {e}")
+        return {}
+
+
+def _save(name, columns):
+    try:
+        snapshot.write_columns(os.path.join(PROJECT_INDEX_DIR, name), {"created": time.time()}, columns)
+    except (OSError, ValueError) as e:
+        logging.getLogger(__name__).error(f"Failed to save project index {name}: {e}")
+
+
+def load_index():
+    """({dir: (mtime_ns, subdirs, markers)}, {artifact: (mtime_ns, measured at, fields)})"""
+    dirs = _load("dirs.snap")
+    index = {
+        path: (mtime, subdirs.split("/") if subdirs else [], markers.split("/") if markers else [])
+        for path, mtime, subdirs, markers in zip(
+            dirs.get("path", []), dirs.get("mtime", []), dirs.get("subdirs", []), dirs.get("markers", [])
+        )
+    }
+    arts = _load("artifacts.snap")
+    artifacts = {
+        path: (mtime, measured, {"bytes": size, "files": files, "mtime": newest})
+        for path, mtime, measured, size, files, newest in zip(
+            arts.get("path", []), arts.get("mtime", []), arts.get("measured", []),
+            arts.get("bytes", []), arts.get("files", []), arts.get("newest", [])
+        )
+    }
+    return index, artifacts
+
+
+def save_index(index, artifacts):
+    paths = list(index)
+    _save("dirs.snap", {
+        "path": paths,
+        "mtime": [index[p][0] for p in paths],
+        "subdirs": ["/".join(index[p][1]) for p in paths],  # "/" can't appear in a file name
+        "markers": ["/".join(index[p][2]) for p in paths],
+    })
+    paths = list(artifacts)
+    _save("artifacts.snap", {
+        "path": paths,
+        "mtime": [artifacts[p][0] for p in paths],
+        "measured": [float(artifacts[p][1]) for p in paths],
+        "bytes": [artifacts[p][2]["bytes"] for p in paths],
+        "files": [artifacts[p][2]["files"] for p in paths],
+        "newest": [float(artifacts[p][2]["mtime"]) for p in paths],
+    })
+
+
+def _size_artifacts(paths, cached):
+    """{path: (mtime_ns, measured at, fields)}, re-measuring only changed or old entries."""
+    now = time.time()
+    result = {}
+    todo = []
+    for path in paths:
+        try:
+            mtime = os.lstat(path).st_mtime_ns
+        except OSError:
+            continue
+        entry = cached.get(path)
+        if entry is not None and entry[0] == mtime and now - entry[1] < ARTIFACT_MAX_AGE:
+            result[path] = entry
+        else:
+            todo.append((path, mtime))
+    with ThreadPoolExecutor(max_workers=TARGET_WORKERS) as pool:
+        for (path, mtime), fields in zip(todo, pool.map(lambda t: measure(t[0]), todo)):
+            result[path] = (mtime, now, {k: fields[k] for k in ("bytes", "files", "mtime")})
+    logging.getLogger(__name__).info(f"Sized {len(todo)} of {len(paths)} project artifacts")
+    return result
+
+
+def project_items(roots=("~",), exclusions=()):
+    """One row per project with regenerable artifacts, listing them as the row's members."""
+    index, cached = load_index()
+    index, projects = discover(roots, exclusions, index)
+    artifacts = _size_artifacts([a for paths in projects.values() for a in paths], cached)
+    save_index(index, artifacts)
+    home = os.path.expanduser("~")
+    items = []
+    for root, paths in projects.items():
+        paths = [p for p in paths if p in artifacts and artifacts[p][2]["bytes"]]
+        if not paths:
+            continue
+        total = sum(artifacts[p][2]["bytes"] for p in paths)
+        kinds = sorted({os.path.basename(p) for p in paths})
+        label = "~" + root[len(home):] if root.startswith(home + os.sep) else root
+        items.append({
+            "category": "Project Artifacts",
+            "name": f"{label} ({', '.join(kinds)})",
+            "short_name": os.path.basename(root),
+            "path": root,
+            "size": format_size(total),
+            "bytes": total,
+            "files": sum(artifacts[p][2]["files"] for p in paths),
+            "mtime": max(artifacts[p][2]["mtime"] for p in paths),
+            "reclaimable": total,
+            "members": "\n".join(sorted(paths)),
+        })
+    return items
@@ -0,0 +1,92 @@
+# macOS Cleanup Tool
+# Copyright (c) 2025 XClassicPeter
+# Licensed under the MIT License. See LICENSE for details.
+
+import os
+import time
+import logging
+
+MEASURED_FIELDS = ("size", "bytes", "files", "mtime", "atime")
+
+class ScanTree:
+    """
+    In-memory model of every folder measured during this session, so that
+    moving into, out of and back to folders reuses known subtrees instead
+    of walking them again. Only exact results are recorded.
+    """
+    MAX_AGE = 600  # seconds before a recorded folder is measured again
+
+    def __init__(self):
+        self.logger = logging.getLogger(__name__)
+        self.sizes = {}      # path -> (recorded at, item)
+        self.children = {}   # path -> (recorded at, [child paths]) for folders whose children are all known
+        self.exclusions = None
+
+    def for_exclusions(self, exclusions):
+        """Return self, dropping everything first if it was recorded with other exclusions."""
+        if self.exclusions is not None and self.exclusions != list(exclusions):
+            self.logger.info("Exclusions changed, discarding the session scan tree")
+            self.sizes.clear()
+            self.children.clear()
+        self.exclusions = list(exclusions)
+        return self
+
+    def record(self, root, items, max_depth):
+        """Record the results of scan_folder(root, max_depth=max_depth)."""
+        now = time.monotonic()
+        root = os.path.expanduser(root).rstrip(os.sep) or os.sep
+        by_parent = {root: []}
+        for item in items:
+            if item.get("folded") or item.get("approx") or item.get("pending"):
+                # The parent's children are incomplete or inexact; don't claim to know them
+                by_parent[item["path"] if item.get("folded") else os.path.dirname(item["path"])] = None
+                continue
+            self.sizes[item["path"]] = (now, item)
+            rel_depth = os.path.relpath(item["path"], root).count(os.sep) + 1
+            if rel_depth < max_depth:
+                by_parent.setdefault(item["path"], [])
+            parent = os.path.dirname(item["path"])
+            if by_parent.get(parent, []) is not None:
+                by_parent.setdefault(parent, []).append(item["path"])
+        recorded = 0
+        for parent, children in by_parent.items():
+            if children is not None:
+                self.children[parent] = (now, children)
+                recorded += 1
+        self.logger.info(f"Recorded {recorded} folders under {root} in the session scan tree")
+
+    def _fresh(self, entry):
+        return entry is not None and time.monotonic() - entry[0] < self.MAX_AGE
+
+    def fields_of(self, path):
+        """The measured fields (size, bytes, files, mtime, atime) of path, if known."""
+        entry = self.sizes.get(path)
+        if not self._fresh(entry):
+            return None
+        return {k: v for k, v in entry[1].items() if k in MEASURED_FIELDS}
+
+    def children_of(self, path):
+        """Items for every child of path if all of them are known, else None."""
+        entry = self.children.get(path.rstrip(os.sep) or os.sep)
+        if not self._fresh(entry):
+            return None
+        items = []
+        for child in entry[1]:
+            child_entry = self.sizes.get(child)
+            if not self._fresh(child_entry):
+                return None
+            items.append(child_entry[1])
+        return items
+
+    def forget(self, path):
+        """Drop path, everything below it and the (now wrong) sizes of its ancestors."""
+        path = path.rstrip(os.sep)
+        prefix = path + os.sep
+        for table in (self.sizes, self.children):
+            for key in [k for k in table if k == path or k.startswith(prefix)]:
+                del table[key]
+        parent = os.path.dirname(path)
+        while parent and parent != path:
+            self.sizes.pop(parent, None)
+            self.children.pop(parent, None)
+            path, parent = parent, os.path.dirname(parent)
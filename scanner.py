@@ -5,9 +5,22 @@
 import os
 import subprocess
 import glob
+import heapq
 import importlib.util
+import itertools
 import logging
+import math
+import random
+import stat
+import threading
+import time
 from plugins.plugin_base import PluginBase
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import checkpoint
+import metrics
+import plugin_cache
+import snapshot
+import throttle
 
 CRITICAL_SYSTEM_PATHS = {
     os.path.expanduser(p) for p in [
@@ -27,7 +40,28 @@ CRITICAL_SYSTEM_PATHS = {
     ]
 }
 
+# Quick-scan sampling parameters
+QUICK_DIR_BUDGET = 2000    # directories listed per estimate
+QUICK_SAMPLE_FILES = 256   # files stat()ed per directory before extrapolating
+QUICK_REFINE_COUNT = 20    # largest estimates re-measured exactly afterwards
+CONFIDENCE_Z = 1.96        # ~95% confidence bound on estimates
+
+TARGET_WORKERS = 4  # plugin targets sized in parallel
+
+# When a quick scan is running on this thread, get_size() estimates instead
+# of running du and records each estimate's margin here (path -> bytes).
+_sizing = threading.local()
+
 def get_size(path):
+    estimates = getattr(_sizing, "estimates", None)
+    if estimates is not None:
+        if not os.path.exists(path):
+            return "0B"
+        estimate, margin = estimate_size(path)
+        estimates[path] = margin
+        return format_size(estimate)
+    if throttle.active():
+        return measure(path)["size"]  # du can't be paced; a throttled walk can
     try:
         if not os.path.exists(path):
             logging.getLogger(__name__).warning(f"Path does not exist: {path}")
@@ -40,16 +74,252 @@ def get_size(path):
         )
         size = result.stdout.split("\t")[0]
         return size if size else "0B"
+    except subprocess.TimeoutExpired as e:
+        metrics.count(timeouts=1)
+        logging.getLogger(__name__).error(f"Failed to get size for {path}: {e}")
+        return "0B"
     except (subprocess.SubprocessError, OSError) as e:
         logging.getLogger(__name__).error(f"Failed to get size for {path}: {e}")
         return "0B"
 
+def measure(path):
+    """
+    Walk path once and return {"size", "bytes", "files", "mtime", "atime"}:
+    its allocated bytes (hard links counted once) and their du -h style size,
+    the number of files in it and the newest modification and access times
+    of anything in it. Directory access times are ignored, since listing
+    them updates them.
+    """
+    logger = logging.getLogger(__name__)
+    try:
+        st = os.lstat(path)
+    except OSError:
+        logger.warning(f"Path does not exist: {path}")
+        return {"size": "0B", "bytes": 0, "files": 0, "mtime": 0.0, "atime": 0.0}
+    total = st.st_blocks * 512
+    newest_mtime = st.st_mtime
+    newest_atime = 0.0
+    files = 0
+    if not stat.S_ISDIR(st.st_mode):
+        metrics.count(files=1)
+        return {"size": format_size(total), "bytes": total, "files": 1, "mtime": st.st_mtime, "atime": st.st_atime}
+    linked = set()
+    stack = [path]
+    dirs = 0
+    while stack:
+        directory = stack.pop()
+        dirs += 1
+        throttle.wait()
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    try:
+                        st = entry.stat(follow_symlinks=False)
+                    except OSError:
+                        continue
+                    if st.st_nlink > 1 and not stat.S_ISDIR(st.st_mode):
+                        if (st.st_dev, st.st_ino) in linked:
+                            continue
+                        linked.add((st.st_dev, st.st_ino))
+                    total += st.st_blocks * 512
+                    newest_mtime = max(newest_mtime, st.st_mtime)
+                    if stat.S_ISDIR(st.st_mode):
+                        stack.append(entry.path)
+                    else:
+                        files += 1
+                        newest_atime = max(newest_atime, st.st_atime)
+        except OSError as e:
+            logger.debug(f"Cannot list {directory}: {e}")
+    metrics.count(dirs=dirs, files=files)
+    return {"size": format_size(total), "bytes": total, "files": files, "mtime": newest_mtime, "atime": newest_atime}
+
+def size_to_bytes(size_str):
+    size_str = size_str.strip()
+    if size_str == "0B":
+        return 0
+    try:
+        multipliers = {"K": 1024, "M": 1024**2, "G": 1024**3, "T": 1024**4}
+        num = float(size_str[:-1])
+        unit = size_str[-1]
+        return int(num * multipliers.get(unit, 1))
+    except (ValueError, KeyError):
+        return 0
+
+def format_size(num_bytes):
+    """Format a byte count the way `du -h` does (e.g. 512K, 4.0M, 12G)."""
+    if num_bytes <= 0:
+        return "0B"
+    size = float(num_bytes)
+    for unit in ["B", "K", "M", "G", "T"]:
+        if size < 1024 or unit == "T":
+            break
+        size /= 1024
+    if unit == "B":
+        return f"{int(size)}B"
+    # du rounds up, so a size is never shown smaller than it is
+    if math.ceil(size * 10) < 100:
+        return f"{math.ceil(size * 10) / 10:.1f}{unit}"
+    size = math.ceil(size)
+    if size >= 1024 and unit != "T":
+        units = ["B", "K", "M", "G", "T"]
+        return f"1.0{units[units.index(unit) + 1]}"
+    return f"{size}{unit}"
+
+def _extrapolate(values, population):
+    """Scale a sample's total up to the population; returns (total, variance)."""
+    k = len(values)
+    if k == 0:
+        return 0, 0.0
+    if k >= population:
+        return sum(values), 0.0
+    mean = sum(values) / k
+    if k > 1:
+        var = sum((v - mean) ** 2 for v in values) / (k - 1)
+    else:
+        var = mean ** 2  # a single draw says nothing about spread; assume it is wide
+    return population * mean, population ** 2 * (1 - k / population) * var / k
+
+def _estimate(path, budget, rng, linked):
+    """
+    (estimate, variance, exact) for path. linked holds the (st_dev, st_ino)
+    of hard-linked files already counted, so each is counted once, as in
+    measure().
+    """
+    throttle.wait()
+    try:
+        entries = list(os.scandir(path))
+    except (PermissionError, OSError) as e:
+        logging.getLogger(__name__).debug(f"Cannot sample {path}: {e}")
+        return 0, 0.0, True
+    files, dirs = [], []
+    for entry in entries:
+        try:
+            (dirs if entry.is_dir(follow_symlinks=False) else files).append(entry)
+        except OSError:
+            continue
+    sampled_files = files if len(files) <= QUICK_SAMPLE_FILES else rng.sample(files, QUICK_SAMPLE_FILES)
+    sizes = []
+    for entry in sampled_files:
+        try:
+            st = entry.stat(follow_symlinks=False)
+        except (OSError, AttributeError):
+            sizes.append(0)
+            continue
+        if st.st_nlink > 1:
+            if (st.st_dev, st.st_ino) in linked:
+                sizes.append(0)
+                continue
+            linked.add((st.st_dev, st.st_ino))
+        sizes.append(st.st_blocks * 512)
+    total, variance = _extrapolate(sizes, len(files))
+    exact = len(sampled_files) == len(files)
+    try:
+        total += os.lstat(path).st_blocks * 512  # the directory itself, as du counts it
+    except (OSError, AttributeError):
+        pass
+    if not dirs:
+        return total, variance, exact
+    # Split the remaining budget over the subdirectories; once it runs out,
+    # follow a single random subdirectory (Knuth's tree-size estimator).
+    remaining = budget - 1
+    if remaining >= len(dirs):
+        sampled_dirs = dirs
+    else:
+        sampled_dirs = rng.sample(dirs, 1 if remaining < 2 else int(remaining))
+    child_budget = max(0, remaining) / len(sampled_dirs)
+    results = [_estimate(entry.path, child_budget, rng, linked) for entry in sampled_dirs]
+    dir_total, dir_variance = _extrapolate([est for est, _, _ in results], len(dirs))
+    # Two-stage sampling: between-directory spread plus each sample's own uncertainty
+    within = sum(var for _, var, _ in results) * len(dirs) / len(sampled_dirs)
+    exact = exact and len(sampled_dirs) == len(dirs) and all(e for _, _, e in results)
+    return total + dir_total, variance + dir_variance + within, exact
+
+def estimate_size(path, rng=None, budget=QUICK_DIR_BUDGET):
+    """
+    Estimate the allocated size of path by sampling its entries instead of
+    walking everything. Returns (estimate_bytes, margin_bytes), where margin
+    is an approximate 95% confidence bound; a margin of 0 means every entry
+    was visited and the figure is exact.
+    """
+    estimate, variance, exact = _estimate(path, budget, rng or random.Random(), set())
+    margin = int(CONFIDENCE_Z * math.sqrt(variance))
+    if not exact:
+        margin = max(margin, 1)  # samples that happened to agree are still samples
+    return int(estimate), margin
+
+def _load_priors(root):
+    """Sizes in bytes by path from the previous scan of root, for ordering work."""
+    items, _ = snapshot.load_results(root)
+    return {item["path"]: size_to_bytes(item["size"]) for item in items or [] if not item.get("folded")}
+
+def _size_hint(path, priors):
+    """
+    Expected size of path: its size in the previous scan, else the blocks of
+    the path itself (a directory's grow with its entries), which costs one
+    stat rather than a sample of the tree.
+    """
+    if path in priors:
+        return priors[path]
+    try:
+        return os.lstat(path).st_blocks * 512
+    except OSError:
+        return 0
+
+def refine_estimates(items, update_callback, limit=QUICK_REFINE_COUNT, stop_event=None):
+    """
+    Re-measure the largest approximate items exactly with du. Calls
+    update_callback(item, fields) with the new field values for each one.
+    """
+    logger = logging.getLogger(__name__)
+    candidates = sorted(
+        (item for item in items if item.get("approx") and not item.get("folded")),
+        key=lambda x: size_to_bytes(x["size"]),
+        reverse=True
+    )[:limit]
+    for item in candidates:
+        if stop_event is not None and stop_event.is_set():
+            break
+        update_callback(item, dict(measure(item["path"]), approx=0))
+    logger.info(f"Refined {len(candidates)} estimates")
+    return len(candidates)
+
+def _fold_items(items, path, category, top_n):
+    """
+    Keep the top_n largest of a directory's child items and fold the rest
+    into one "N other items" row. Returns (kept, folded_row or None).
+    """
+    if not top_n or len(items) <= top_n:
+        return items, None
+    items = sorted(items, key=lambda x: size_to_bytes(x["size"]), reverse=True)
+    kept, rest = items[:top_n], items[top_n:]
+    label = f"{len(rest)} other items"
+    folded = {
+        "category": category,
+        "name": label,
+        "short_name": label,
+        "path": path,
+        "size": format_size(sum(size_to_bytes(x["size"]) for x in rest)),
+        "folded": len(rest),
+    }
+    if all("files" in x for x in rest):
+        folded["files"] = sum(x["files"] for x in rest)
+        folded["mtime"] = max(x["mtime"] for x in rest)
+        folded["atime"] = max(x["atime"] for x in rest)
+    return kept, folded
+
+def _mark_estimate(item):
+    """Flag an item sized by a quick-scan estimate with its margin."""
+    estimates = getattr(_sizing, "estimates", None)
+    if estimates and estimates.get(item["path"]):
+        item["approx"] = estimates[item["path"]]
+    return item
+
 def _should_exclude(path, exclusions):
     path = os.path.expanduser(path)
     for excl in exclusions:
         excl = os.path.expanduser(excl).rstrip("/")
         if path.rstrip("/").startswith(excl):
-            logging.getLogger(__name__).info(f"Excluded path: {path}")
+            logging.getLogger(__name__).debug(f"Excluded path: {path}")
             return True
     return False
 
@@ -77,61 +347,298 @@ def load_plugins():
                 logger.info(f"Loaded plugin: {module_name}")
     return plugins
 
-def scan_system(progress_callback=lambda c, p: None, max_depth=3, exclusions=None):
+def resolve_targets(plugins, exclusions=()):
+    """
+    Expand the targets() of each (plugin_name, plugin) into
+    {plugin_name: [(path, category, measure)]} of existing paths, where
+    measure is False for rules that opt out of sizing. Each glob is
+    expanded once and all marker rules under the same root share one walk.
+    """
+    logger = logging.getLogger(__name__)
+    resolved = {plugin_name: [] for plugin_name, _ in plugins}
+    globs = {}
+    walks = {}  # root -> [(plugin_name, rule)]
+    for plugin_name, plugin in plugins:
+        try:
+            rules = plugin.targets()
+        except Exception as e:
+            logger.error(f"Plugin {plugin_name} targets failed: {e}")
+            continue
+        for rule in rules:
+            if "path" in rule:
+                paths = [os.path.expanduser(rule["path"])]
+            elif "glob" in rule:
+                pattern = os.path.expanduser(rule["glob"])
+                if pattern not in globs:
+                    globs[pattern] = sorted(glob.glob(pattern))
+                paths = globs[pattern]
+            elif "marker" in rule or "contains" in rule:
+                walks.setdefault(os.path.expanduser(rule.get("under", "~")), []).append((plugin_name, rule))
+                continue
+            else:
+                logger.warning(f"Invalid target in plugin {plugin_name}: {rule}")
+                continue
+            for path in paths:
+                if os.path.exists(path):
+                    resolved[plugin_name].append((path, rule["category"], rule.get("measure", True)))
+                else:
+                    logger.debug(f"Path does not exist: {path}")
+    for root, rules in walks.items():
+        for plugin_name, path, rule in _walk_markers(root, rules, exclusions):
+            resolved[plugin_name].append((path, rule["category"], rule.get("measure", True)))
+    for plugin_name, targets in resolved.items():
+        seen = set()
+        kept = []
+        for target in targets:
+            if target not in seen and not _should_exclude(target[0], exclusions):
+                seen.add(target)
+                kept.append(target)
+        resolved[plugin_name] = kept
+    return resolved
+
+def _walk_markers(root, rules, exclusions=()):
+    """
+    Walk root once for all marker rules under it. Yields (plugin_name, path,
+    rule) for each directory named rule["marker"] and each directory
+    containing a file named rule["contains"]; matches and excluded
+    directories are not descended into.
+    """
+    max_depth = max(rule.get("max_depth", 2) for _, rule in rules)
+    for dirpath, dirs, files in os.walk(root, topdown=True):
+        throttle.wait()
+        metrics.count(dirs=1, files=len(files))
+        depth = os.path.relpath(dirpath, root).count(os.sep)
+        if depth > max_depth:
+            dirs[:] = []
+            continue
+        matched = set()
+        contained = False
+        # Every rule sees the whole listing; pruning waits until all have looked
+        for plugin_name, rule in rules:
+            if depth > rule.get("max_depth", 2):
+                continue
+            if "marker" in rule and rule["marker"] in dirs:
+                matched.add(rule["marker"])
+                yield plugin_name, os.path.join(dirpath, rule["marker"]), rule
+            elif "contains" in rule and rule["contains"] in files:
+                contained = True
+                yield plugin_name, dirpath, rule
+        if contained:
+            dirs[:] = []
+        else:
+            dirs[:] = [d for d in dirs if d not in matched and not _should_exclude(os.path.join(dirpath, d), exclusions)]
+
+def _size_paths(paths, stop_event=None, workers=TARGET_WORKERS):
+    """
+    Yield (path, fields, seconds taken) for each of paths in completion
+    order, measuring several at once.
+    """
+    estimates = getattr(_sizing, "estimates", None)
+
+    def size(path):
+        started = time.monotonic()
+        if estimates is None:
+            return path, measure(path), time.monotonic() - started
+        _sizing.estimates = estimates  # quick mode is per thread
+        try:
+            return path, {"size": get_size(path)}, time.monotonic() - started
+        finally:
+            _sizing.estimates = None
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(size, path) for path in paths]
+        try:
+            for future in as_completed(futures):
+                if stop_event is not None and stop_event.is_set():
+                    return
+                yield future.result()
+        finally:
+            for future in futures:
+                future.cancel()
+
+def _add_plugin_items(plugin_name, plugin_items, items, exclusions, item_callback):
+    logger = logging.getLogger(__name__)
+    for item in plugin_items:
+        if not isinstance(item, dict) or not all(k in item for k in ["category", "name", "path", "size"]):
+            logger.warning(f"Invalid plugin item: {item}")
+            continue
+        if _should_exclude(item["path"], exclusions):
+            continue
+        item["short_name"] = item.get("short_name") or item["name"]
+        item["plugin"] = plugin_name
+        items.append(_mark_estimate(item))
+        item_callback(item)
+
+def scan_system(progress_callback=lambda c, p: None, max_depth=3, exclusions=None, resume=False, stop_event=None, quick=False,
+                item_callback=lambda item: None, force_refresh=False, enabled_plugins=None):
+    """
+    Size the system temp/log folders and run every enabled plugin, biggest
+    first according to the previous scan. With quick=True, sizes are
+    estimated by sampling (see estimate_size) and the items carry an "approx"
+    margin in bytes. item_callback receives each item as soon as it is found.
+    Plugins with a cache policy reuse their cached results unless
+    force_refresh is set. enabled_plugins maps plugin names to whether they
+    should run; plugins not in it run.
+    """
     logger = logging.getLogger(__name__)
     logger.info("Starting system scan")
+    metrics.begin()
     if exclusions is None:
         exclusions = []
     items = []
+    done = []
+    params = {"max_depth": max_depth, "exclusions": exclusions, "quick": quick}
+    if resume:
+        state = checkpoint.load_checkpoint(None, params)
+        if state:
+            items = state["items"]
+            done = state["state"].get("done", [])
+            logger.info(f"Resuming system scan: {len(done)} steps already done, {len(items)} items")
+    _sizing.estimates = {} if quick else None
+    try:
+        return _scan_system_steps(items, done, params, progress_callback, item_callback, exclusions, stop_event, force_refresh,
+                                  enabled_plugins or {})
+    finally:
+        _sizing.estimates = None
+
+def _scan_system_steps(items, done, params, progress_callback, item_callback, exclusions, stop_event, force_refresh,
+                       enabled_plugins):
+    logger = logging.getLogger(__name__)
     temp_paths = [
         ("System Temp", "/private/tmp"),
         ("User Temp", os.path.expanduser("~/Library/Caches")),
         ("Logs", "/private/var/log"),
         ("User Logs", os.path.expanduser("~/Library/Logs")),
     ]
+    # Largest first, so the top of the size-sorted view is right early on
+    previous, _ = snapshot.load_results(None)
+    priors = {}
+    plugin_priors = {}
+    for item in previous or []:
+        priors[item["path"]] = size_to_bytes(item["size"])
+        if item.get("plugin"):
+            plugin_priors[item["plugin"]] = plugin_priors.get(item["plugin"], 0) + priors[item["path"]]
+    if not params["quick"]:
+        temp_paths.sort(key=lambda t: _size_hint(t[1], priors), reverse=True)
     total = len(temp_paths) + 1  # +1 for plugins
+    sized = {}  # path -> measured fields, shared by the temp paths and every plugin's targets
     for idx, (category, path) in enumerate(temp_paths):
-        if _should_exclude(path, exclusions):
+        if stop_event is not None and stop_event.is_set():
+            checkpoint.save_checkpoint(None, params, items, state={"done": done})
+            logger.info("System scan stopped; checkpoint saved")
+            return items
+        if category in done or _should_exclude(path, exclusions):
             continue
-        size = get_size(path)
-        if size != "0B":
-            items.append({
+        fields = sized[path] = {"size": get_size(path)} if params["quick"] else measure(path)
+        if fields["size"] != "0B":
+            item = _mark_estimate(dict({
                 "category": category,
                 "name": os.path.basename(path),
                 "short_name": os.path.basename(path),
                 "path": path,
-                "size": size
-            })
+            }, **fields))
+            items.append(item)
+            item_callback(item)
+        done.append(category)
+        checkpoint.save_checkpoint(None, params, items, state={"done": done})
         progress_callback(category, (idx + 1) / total * 50)
-    # Scan plugins
+    # Scan plugins: serve fresh caches, then size all remaining targets together
     plugins = load_plugins()
-    plugin_items = []
-    import settings
-    enabled_plugins = settings.load_settings().get("plugins", {})
+    plugins.sort(key=lambda p: plugin_priors.get(p[0], 0), reverse=True)
+    cache_params = plugin_cache.cache_params(params["max_depth"], exclusions)
+    pending = []
     for plugin_name, plugin in plugins:
-        try:
-            if plugin_name in enabled_plugins and not enabled_plugins.get(plugin_name, True):
-                logger.info(f"Skipping disabled plugin: {plugin_name}")
+        if f"plugin:{plugin_name}" in done:
+            continue
+        if plugin_name in enabled_plugins and not enabled_plugins.get(plugin_name, True):
+            logger.info(f"Skipping disabled plugin: {plugin_name}")
+            continue
+        started = time.monotonic()
+        cached = None if force_refresh else plugin_cache.load_cached(plugin_name, plugin, cache_params)
+        if cached is None:
+            pending.append((plugin_name, plugin))
+            continue
+        metrics.plugin_time(plugin_name, time.monotonic() - started)
+        _add_plugin_items(plugin_name, cached, items, exclusions, item_callback)
+        done.append(f"plugin:{plugin_name}")
+        checkpoint.save_checkpoint(None, params, items, state={"done": done})
+    targets = resolve_targets(pending, exclusions)
+    sizing_time = {}  # path -> seconds measure() took, charged to every plugin targeting it
+    remaining = {}
+    for plugin_name, plugin_targets in targets.items():
+        for path, _, measured in plugin_targets:
+            if measured and path not in sized:
+                remaining.setdefault(path, set()).add(plugin_name)
+
+    def finish(plugin_name, plugin):
+        plugin_items = []
+        for path, category, measured in targets[plugin_name]:
+            if not measured:
+                continue
+            if sized[path]["size"] == "0B":
+                logger.debug(f"Empty or inaccessible path: {path}")
                 continue
+            name = os.path.basename(path)
+            plugin_items.append(dict({"category": category, "name": name, "short_name": name, "path": path}, **sized[path]))
+            logger.debug(f"Found {category}: {path} ({sized[path]['size']})")
+        started = time.monotonic()
+        try:
+            plugin.resolved_targets = [(path, category) for path, category, _ in targets[plugin_name]]
+            plugin.exclusions = list(exclusions)
             plugin_items.extend(plugin.scan())
             logger.info(f"Scanned plugin: {plugin_name}")
+            if not params["quick"]:  # never cache estimates as if they were exact
+                plugin_cache.store(plugin_name, plugin, plugin_items, [path for path, _, _ in targets[plugin_name]],
+                                   cache_params)
         except Exception as e:
             logger.error(f"Plugin {plugin_name} failed: {e}")
-    for item in plugin_items:
-        if not isinstance(item, dict) or not all(k in item for k in ["category", "name", "path", "size"]):
-            logger.warning(f"Invalid plugin item: {item}")
-            continue
-        if _should_exclude(item["path"], exclusions):
-            continue
-        item["short_name"] = item.get("short_name", item["name"])
-        items.append(item)
+        seconds = time.monotonic() - started
+        metrics.plugin_time(plugin_name, seconds + sum(sizing_time.get(path, 0.0) for path, _, _ in targets[plugin_name]))
+        _add_plugin_items(plugin_name, plugin_items, items, exclusions, item_callback)
+        done.append(f"plugin:{plugin_name}")
+        checkpoint.save_checkpoint(None, params, items, state={"done": done})
+
+    waiting = {plugin_name: plugin for plugin_name, plugin in pending}
+    for plugin_name, plugin in pending:
+        if not any(plugin_name in owners for owners in remaining.values()):
+            finish(plugin_name, waiting.pop(plugin_name))
+    order = list(remaining)
+    if not params["quick"]:
+        order.sort(key=lambda path: _size_hint(path, priors), reverse=True)
+    for path, fields, seconds in _size_paths(order, stop_event):
+        sized[path] = fields
+        sizing_time[path] = seconds
+        for plugin_name in remaining.pop(path):
+            if plugin_name in waiting and not any(plugin_name in owners for owners in remaining.values()):
+                finish(plugin_name, waiting.pop(plugin_name))
+    if stop_event is not None and stop_event.is_set():
+        checkpoint.save_checkpoint(None, params, items, state={"done": done})
+        logger.info("System scan stopped; checkpoint saved")
+        return items
+    checkpoint.clear_checkpoint(None)
     progress_callback("Plugins", 100)
     logger.info("System scan completed")
     return items
 
-def scan_folder(folder, category, progress_callback=lambda c, p: None, max_depth=3, exclusions=None):
+def scan_folder(folder, category, progress_callback=lambda c, p: None, max_depth=3, exclusions=None, resume=False, stop_event=None, top_n=None, quick=False,
+                item_callback=lambda item: None, known=None):
+    """
+    Size every directory under folder down to max_depth. With top_n set,
+    only the top_n largest children of each directory are kept (and walked
+    further); the rest are folded into one "N other items" row per directory,
+    so memory stays bounded however large the tree is. With quick=True, sizes
+    are estimated by sampling and carry an "approx" margin in bytes.
+
+    Work is scheduled largest-first: children are measured in order of their
+    size in the previous scan (or a rough sample), and the biggest measured
+    directories are walked next. item_callback receives items as they are found.
+
+    known is an optional ScanTree from earlier scans in this session: folders
+    whose children it already knows are not listed or measured again.
+    """
     logger = logging.getLogger(__name__)
     logger.info(f"Scanning folder: {folder}")
+    metrics.begin()
     if exclusions is None:
         exclusions = []
     items = []
@@ -143,35 +650,303 @@ def scan_folder(folder, category, progress_callback=lambda c, p: None, max_depth
     dir_count = 0
     total_dirs_estimated = 100  # Rough estimate; adjust if needed
 
-    def scan_recursive(path, depth, current_category):
-        nonlocal dir_count
-        if depth > max_depth:
-            return
-        try:
-            for entry in os.scandir(path):
-                if _should_exclude(entry.path, exclusions):
-                    continue
-                if entry.is_dir(follow_symlinks=False):
-                    dir_count += 1
-                    size = get_size(entry.path)
-                    if size != "0B":
-                        items.append({
-                            "category": current_category,
-                            "name": entry.name,
-                            "short_name": entry.name,
-                            "path": entry.path,
-                            "size": size
-                        })
-                    # Send progress update (cap at 99% to avoid premature 100%)
-                    progress = min(99, (dir_count / total_dirs_estimated) * 100)
-                    progress_callback(current_category, progress)
-                    logger.debug(f"Progress: {current_category} ({progress:.1f}%)")
-                    scan_recursive(entry.path, depth + 1, current_category)
-        except (PermissionError, OSError) as e:
-            logger.error(f"Error scanning {path}: {e}")
-
-    scan_recursive(folder, 1, category)
+    # Directories still to be listed, as a heap of (-expected size, seq, path,
+    # depth of their children). Kept explicit (rather than recursing) so it
+    # can be checkpointed; ordered so the biggest subtrees are walked first.
+    frontier = []
+    seq = itertools.count()
+
+    def push(path, depth, priority):
+        heapq.heappush(frontier, (-priority, next(seq), path, depth))
+
+    def pending():
+        return [(path, depth) for _, _, path, depth in sorted(frontier)]
+
+    push(folder, 1, 0)
+    params = {"category": category, "max_depth": max_depth, "exclusions": exclusions, "top_n": top_n, "quick": quick}
+    if resume:
+        state = checkpoint.load_checkpoint(folder, params)
+        if state:
+            items, frontier = state["items"], []
+            for rank, (path, depth) in enumerate(state["frontier"]):
+                push(path, depth, -rank)
+            dir_count = state["state"].get("dir_count", len(items))
+            logger.info(f"Resuming scan of {folder}: {len(items)} items found, {len(frontier)} folders left")
+            for item in items:
+                item_callback(item)
+    priors = {} if quick else _load_priors(folder)
+    last_checkpoint = time.monotonic()
+
+    while frontier:
+        if stop_event is not None and stop_event.is_set():
+            checkpoint.save_checkpoint(folder, params, items, pending(), {"dir_count": dir_count})
+            logger.info(f"Folder scan stopped: {folder}; checkpoint saved")
+            return items
+        _, _, path, depth = heapq.heappop(frontier)
+        level_items = []
+        known_children = known.children_of(path) if known else None
+        if known_children is not None:
+            # Measured earlier this session; reuse instead of walking it again
+            entries = []
+            for child in known_children:
+                item = dict(child, category=category)
+                level_items.append(item)
+                if not top_n:
+                    item_callback(item)
+            dir_count += len(known_children)
+        else:
+            throttle.wait()
+            metrics.count(dirs=1)
+            try:
+                entries = [
+                    entry for entry in os.scandir(path)
+                    if not _should_exclude(entry.path, exclusions) and entry.is_dir(follow_symlinks=False)
+                ]
+            except (PermissionError, OSError) as e:
+                logger.error(f"Error scanning {path}: {e}")
+                entries = []
+        if not quick:
+            entries.sort(key=lambda entry: _size_hint(entry.path, priors), reverse=True)
+        for entry in entries:
+            dir_count += 1
+            fields = known.fields_of(entry.path) if known else None
+            margin = 0
+            if fields is None and quick:
+                estimate, margin = estimate_size(entry.path)
+                fields = {"size": format_size(estimate)}
+            elif fields is None:
+                fields = measure(entry.path)
+            if fields["size"] != "0B":
+                item = dict({
+                    "category": category,
+                    "name": entry.name,
+                    "short_name": entry.name,
+                    "path": entry.path,
+                }, **fields)
+                if margin:
+                    item["approx"] = margin
+                level_items.append(item)
+                if not top_n:
+                    item_callback(item)
+            # Send progress update (cap at 99% to avoid premature 100%)
+            progress = min(99, (dir_count / total_dirs_estimated) * 100)
+            progress_callback(category, progress)
+        level_items, folded = _fold_items(level_items, path, category, top_n)
+        if folded:
+            level_items.append(folded)
+        if top_n:
+            for item in level_items:
+                item_callback(item)
+        items.extend(level_items)
+        if depth < max_depth:
+            for item in level_items:
+                if not item.get("folded"):
+                    push(item["path"], depth + 1, size_to_bytes(item["size"]))
+        if time.monotonic() - last_checkpoint >= checkpoint.CHECKPOINT_INTERVAL:
+            checkpoint.save_checkpoint(folder, params, items, pending(), {"dir_count": dir_count})
+            last_checkpoint = time.monotonic()
+
+    checkpoint.clear_checkpoint(folder)
     # Final progress update
     progress_callback(category, 100)
     logger.info(f"Folder scan completed: {folder}, {len(items)} items found")
     return items
+
+def list_folder(folder, category, exclusions=None):
+    """
+    List the immediate subdirectories of folder without sizing them (lazy
+    mode). Items are marked "pending" until a SizeWorker measures them, and
+    come back ordered by their size in the previous scan.
+    """
+    logger = logging.getLogger(__name__)
+    if exclusions is None:
+        exclusions = []
+    folder = os.path.expanduser(folder)
+    items = []
+    try:
+        for entry in os.scandir(folder):
+            if _should_exclude(entry.path, exclusions) or not entry.is_dir(follow_symlinks=False):
+                continue
+            items.append({
+                "category": category,
+                "name": entry.name,
+                "short_name": entry.name,
+                "path": entry.path,
+                "size": "0B",
+                "pending": 1
+            })
+    except (PermissionError, OSError) as e:
+        logger.error(f"Error listing {folder}: {e}")
+    priors = _load_priors(folder)
+    items.sort(key=lambda x: priors.get(x["path"], 0), reverse=True)
+    logger.info(f"Listed {folder}: {len(items)} folders pending sizing")
+    return items
+
+def walk_files(folder, exclusions=None, progress_callback=lambda directory, files: None, stop_event=None):
+    """
+    Yield (path, stat) for every regular file under folder without following
+    symlinks. Files with several hard links are yielded once. Stops early
+    when stop_event is set.
+    """
+    logger = logging.getLogger(__name__)
+    if exclusions is None:
+        exclusions = []
+    linked = set()  # (st_dev, st_ino) of files with several links already seen
+    stack = [os.path.expanduser(folder)]
+    files = 0
+    last_report = time.monotonic()
+    while stack:
+        if stop_event is not None and stop_event.is_set():
+            logger.info(f"Walk of {folder} stopped")
+            return
+        directory = stack.pop()
+        throttle.wait()
+        before = files
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            if not _should_exclude(entry.path, exclusions):
+                                stack.append(entry.path)
+                            continue
+                        if not entry.is_file(follow_symlinks=False):
+                            continue
+                        st = entry.stat(follow_symlinks=False)
+                    except OSError:
+                        continue
+                    if st.st_nlink > 1:
+                        if (st.st_dev, st.st_ino) in linked:
+                            continue
+                        linked.add((st.st_dev, st.st_ino))
+                    files += 1
+                    yield entry.path, st
+        except OSError as e:
+            logger.debug(f"Cannot list {directory}: {e}")
+        metrics.count(dirs=1, files=files - before)
+        if time.monotonic() - last_report > 0.5:
+            progress_callback(directory, files)
+            last_report = time.monotonic()
+    logger.info(f"Walked {files} files under {folder}")
+
+def find_largest_files(folder, count=100, exclusions=None, progress_callback=lambda directory, files: None, stop_event=None):
+    """
+    Return items for the count largest files under folder, largest first.
+    Every file passes through a min-heap of the count largest seen so far,
+    so memory stays O(count) however many files the tree holds. Sizes are
+    allocated bytes, as du counts them.
+    """
+    heap = []  # (bytes, path, mtime, atime); heap[0] is the smallest of the current top files
+    for path, st in walk_files(folder, exclusions, progress_callback, stop_event):
+        size = st.st_blocks * 512 if hasattr(st, "st_blocks") else st.st_size
+        if len(heap) < count:
+            heapq.heappush(heap, (size, path, st.st_mtime, st.st_atime))
+        elif size > heap[0][0]:
+            heapq.heapreplace(heap, (size, path, st.st_mtime, st.st_atime))
+    if stop_event is not None and stop_event.is_set():
+        return []
+    items = []
+    for size, path, mtime, atime in sorted(heap, reverse=True):
+        name = os.path.basename(path)
+        items.append({
+            "category": "Large File",
+            "name": name,
+            "short_name": name,
+            "path": path,
+            "size": format_size(size),
+            "files": 1,
+            "mtime": mtime,
+            "atime": atime
+        })
+    return items
+
+class SizeWorker:
+    """
+    Measures paths on a background thread, most urgent first, and calls
+    callback(path, fields) with the result of measure(). Paths can be
+    re-prioritised at any time, e.g. as rows scroll into view.
+    """
+    SELECTED, VISIBLE, BACKGROUND = 0, 1, 2
+
+    def __init__(self, callback):
+        self.callback = callback
+        self._heap = []
+        self._queued = {}
+        self._done = set()
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        self._running = False
+        self._stopped = False
+
+    def request(self, path, priority=BACKGROUND, order=0):
+        with self._lock:
+            if self._stopped or path in self._done:
+                return
+            key = (priority, order)
+            if path in self._queued and self._queued[path] <= key:
+                return
+            self._queued[path] = key
+            heapq.heappush(self._heap, (priority, order, next(self._seq), path))
+            if not self._running:
+                self._running = True
+                threading.Thread(target=self._run, daemon=True).start()
+
+    def is_busy(self):
+        with self._lock:
+            return self._running
+
+    def stop(self):
+        with self._lock:
+            self._stopped = True
+            self._heap.clear()
+            self._queued.clear()
+
+    def _next_path(self):
+        with self._lock:
+            while self._heap and not self._stopped:
+                priority, order, _, path = heapq.heappop(self._heap)
+                if self._queued.get(path) == (priority, order):
+                    del self._queued[path]
+                    self._done.add(path)
+                    return path
+            self._running = False
+            return None
+
+    def _run(self):
+        while True:
+            path = self._next_path()
+            if path is None:
+                return
+            self.callback(path, measure(path))
+
+def expand_folded(folded, known_paths, top_n=None, exclusions=None):
+    """
+    Expand a folded "N other items" row from scan_folder(top_n=...). Sizes the
+    children of the folded row's directory that are not in known_paths and
+    returns the next top_n of them, plus a new folded row if more remain.
+    """
+    logger = logging.getLogger(__name__)
+    if exclusions is None:
+        exclusions = []
+    path = folded["path"]
+    items = []
+    try:
+        for entry in os.scandir(path):
+            if entry.path in known_paths or _should_exclude(entry.path, exclusions):
+                continue
+            if entry.is_dir(follow_symlinks=False):
+                fields = measure(entry.path)
+                if fields["size"] != "0B":
+                    items.append(dict({
+                        "category": folded["category"],
+                        "name": entry.name,
+                        "short_name": entry.name,
+                        "path": entry.path,
+                    }, **fields))
+    except (PermissionError, OSError) as e:
+        logger.error(f"Error expanding {path}: {e}")
+    items, refolded = _fold_items(items, path, folded["category"], top_n)
+    if refolded:
+        items.append(refolded)
+    logger.info(f"Expanded folded row under {path}: {len(items)} rows")
+    return items
@@ -1,17 +1,35 @@
 import json
 import os
+import copy
+import atexit
 import logging
+import tempfile
+import threading
 
 SETTINGS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "settings.json")
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache")
 
 DEFAULTS = {
     "last_scan_path": os.path.expanduser("~"),
     "size_filter": "All",
     "max_depth": 3,
+    "top_n": 0,
+    "largest_files": 100,
+    "throttle_ops": 0,
+    "watch_changes": True,
+    "growth_days": 7,
     "exclusions": "",
     "dark_mode": "auto",
     "sort_column": "size",
     "sort_descending": True,
+    "log_file": "cleanup.log",
+    "log_level": "INFO",
+    "log_max_mb": 5,
+    "log_backups": 3,
+    "daemon_roots": ["~", "system"],
+    "daemon_interval": 3600,
+    "daemon_throttle_ops": 200,
+    "metrics_dir": "",  # e.g. the node-exporter textfile collector directory; empty disables
     "plugins": {
         "python": True,
         "nodejs": True,
@@ -19,32 +37,89 @@ DEFAULTS = {
         "system_cleanup": True,
         "developer_tools": True,
         "llm_frameworks": True,
-        "virtual_machines": True
+        "virtual_machines": True,
+        "project_artifacts": True
     }
 }
 
+SAVE_DELAY = 1.0  # seconds of quiet before changed settings are written
+
+_current = None
+_lock = threading.Lock()
+_save_timer = None
+
+
 def load_settings():
+    """Read settings.json from disk, filling in defaults. Most code wants get_settings()."""
     logger = logging.getLogger(__name__)
     if not os.path.exists(SETTINGS_FILE):
         logger.info("Settings file not found, using defaults")
-        return DEFAULTS.copy()
+        return copy.deepcopy(DEFAULTS)
     try:
         with open(SETTINGS_FILE, "r") as f:
             data = json.load(f)
         for k, v in DEFAULTS.items():
             if k not in data:
-                data[k] = v
+                data[k] = copy.deepcopy(v)
         logger.info("Settings loaded")
         return data
     except Exception as e:
         logger.error(f"Error loading settings: {e}")
-        return DEFAULTS.copy()
+        return copy.deepcopy(DEFAULTS)
+
+
+def get_settings():
+    """The settings shared by the whole process, loaded from disk on first use."""
+    global _current
+    with _lock:
+        if _current is None:
+            _current = load_settings()
+        return _current
+
 
 def save_settings(settings):
+    """Write settings to disk now, atomically (a crash never leaves a truncated file)."""
     logger = logging.getLogger(__name__)
     try:
-        with open(SETTINGS_FILE, "w") as f:
-            json.dump(settings, f, indent=2)
+        data = json.dumps(settings, indent=2)
+        directory = os.path.dirname(SETTINGS_FILE)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".settings.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                f.write(data)
+            os.replace(tmp_path, SETTINGS_FILE)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
         logger.info("Settings saved to file")
     except Exception as e:
         logger.error(f"Error saving settings: {e}")
+
+
+def schedule_save(delay=SAVE_DELAY):
+    """
+    Write the shared settings once they have stopped changing for delay
+    seconds, so bursts of changes (spinbox clicks, navigation) cost one write.
+    """
+    global _save_timer
+    with _lock:
+        if _save_timer is not None:
+            _save_timer.cancel()
+        _save_timer = threading.Timer(delay, flush)
+        _save_timer.daemon = True
+        _save_timer.start()
+
+
+def flush():
+    """Write pending changes to the shared settings now."""
+    global _save_timer
+    with _lock:
+        if _save_timer is not None:
+            _save_timer.cancel()
+        pending, _save_timer = _save_timer is not None, None
+        current = _current
+    if pending and current is not None:
+        save_settings(current)
+
+
+atexit.register(flush)
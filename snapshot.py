@@ -0,0 +1,182 @@
+# macOS Cleanup Tool
+# Copyright (c) 2025 XClassicPeter
+# Licensed under the MIT License. See LICENSE for details.
+
+import os
+import json
+import struct
+import zlib
+import hashlib
+import tempfile
+import time
+import logging
+from array import array
+
+import settings
+
+MAGIC = b"MCTSNAP"
+VERSION = 1
+SNAPSHOT_DIR = os.path.join(settings.CACHE_DIR, "snapshots")
+ITEM_FIELDS = ["category", "name", "short_name", "path", "size"]
+# Optional fields and their defaults, stored only when some item sets them
+EXTRA_FIELDS = {"folded": 0, "approx": 0, "plugin": "", "bytes": 0, "files": 0, "mtime": 0.0, "atime": 0.0,
+                "logical": 0, "reclaimable": 0, "shared": 0,
+                "members": ""}
+
+_HEADER = struct.Struct("<7sHI")
+_COLUMN = struct.Struct("<H1sII")
+
+
+def _column_type(values):
+    if values and all(type(v) is int for v in values):
+        return b"q"
+    if values and all(type(v) in (int, float) for v in values):
+        return b"d"
+    return b"s"
+
+
+def _encode_column(typecode, values):
+    if typecode == b"s":
+        return "\0".join(str(v) for v in values).encode("utf-8", "surrogateescape")
+    return array(typecode.decode(), values).tobytes()
+
+
+def _decode_column(typecode, count, blob):
+    if typecode == b"s":
+        return blob.decode("utf-8", "surrogateescape").split("\0") if count else []
+    values = array(typecode.decode())
+    values.frombytes(blob)
+    return values.tolist()
+
+
+def write_columns(path, meta, columns):
+    """
+    Atomically write a small JSON header plus named columns to a binary file.
+    Columns are lists of str, int or float; each one is stored as a single
+    compressed blob so loading does not parse anything per value.
+    """
+    meta_blob = json.dumps(meta).encode("utf-8")
+    parts = [_HEADER.pack(MAGIC, VERSION, len(meta_blob)), meta_blob, struct.pack("<H", len(columns))]
+    for name, values in columns.items():
+        typecode = _column_type(values)
+        blob = zlib.compress(_encode_column(typecode, values), 1)
+        name_blob = name.encode("utf-8")
+        parts.append(_COLUMN.pack(len(name_blob), typecode, len(values), len(blob)))
+        parts.append(name_blob)
+        parts.append(blob)
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(b"".join(parts))
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def read_meta(path):
+    """Read only the JSON header of a file written by write_columns()."""
+    with open(path, "rb") as f:
+        header = f.read(_HEADER.size)
+        try:
+            magic, version, meta_len = _HEADER.unpack(header)
+        except struct.error as e:
+            raise ValueError(f"Corrupt snapshot {path}: {e}")
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"Unsupported snapshot format in {path}")
+        return json.loads(f.read(meta_len).decode("utf-8"))
+
+
+def read_columns(path):
+    """Read a file written by write_columns(). Returns (meta, columns)."""
+    with open(path, "rb") as f:
+        data = f.read()
+    try:
+        magic, version, meta_len = _HEADER.unpack_from(data, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"Unsupported snapshot format in {path}")
+        offset = _HEADER.size
+        meta = json.loads(data[offset:offset + meta_len].decode("utf-8"))
+        offset += meta_len
+        (ncols,) = struct.unpack_from("<H", data, offset)
+        offset += 2
+        columns = {}
+        for _ in range(ncols):
+            name_len, typecode, count, blob_len = _COLUMN.unpack_from(data, offset)
+            offset += _COLUMN.size
+            name = data[offset:offset + name_len].decode("utf-8")
+            offset += name_len
+            blob = zlib.decompress(data[offset:offset + blob_len])
+            offset += blob_len
+            columns[name] = _decode_column(typecode, count, blob)
+    except (struct.error, zlib.error) as e:
+        raise ValueError(f"Corrupt snapshot {path}: {e}")
+    return meta, columns
+
+
+def items_to_columns(items):
+    columns = {field: [item.get(field, "") for item in items] for field in ITEM_FIELDS}
+    for field, default in EXTRA_FIELDS.items():
+        if any(field in item for item in items):
+            columns[field] = [type(default)(item.get(field, default)) for item in items]
+    return columns
+
+
+def columns_to_items(columns):
+    items = [dict(zip(ITEM_FIELDS, row)) for row in zip(*(columns[field] for field in ITEM_FIELDS))]
+    for field in EXTRA_FIELDS:
+        if field in columns:
+            for item, value in zip(items, columns[field]):
+                if value:
+                    item[field] = value
+    return items
+
+
+def root_key(root):
+    """Stable key for a scan root; system scans use None as their root."""
+    if root is None:
+        return "system"
+    return os.path.abspath(os.path.expanduser(root))
+
+
+def cache_file(directory, root, extension):
+    """Path of the cache file for root inside directory."""
+    digest = hashlib.sha1(root_key(root).encode("utf-8", "surrogateescape")).hexdigest()[:16]
+    return os.path.join(directory, f"{digest}{extension}")
+
+
+def snapshot_path(root):
+    return cache_file(SNAPSHOT_DIR, root, ".snap")
+
+
+def save_results(root, items):
+    logger = logging.getLogger(__name__)
+    columns = items_to_columns(items)
+    meta = {"root": root_key(root), "created": time.time(), "count": len(items)}
+    try:
+        write_columns(snapshot_path(root), meta, columns)
+        logger.info(f"Saved snapshot of {meta['root']} ({len(items)} items)")
+    except (OSError, ValueError) as e:
+        logger.error(f"Failed to save snapshot for {meta['root']}: {e}")
+
+
+def load_results(root):
+    """Return (items, created) from the last snapshot of root, or (None, None)."""
+    logger = logging.getLogger(__name__)
+    path = snapshot_path(root)
+    if not os.path.exists(path):
+        return None, None
+    try:
+        meta, columns = read_columns(path)
+        if meta.get("root") != root_key(root):
+            logger.warning(f"Snapshot {path} belongs to {meta.get('root')}, ignoring")
+            return None, None
+        return columns_to_items(columns), meta.get("created")
+    except (OSError, ValueError, KeyError) as e:
+        logger.error(f"Failed to load snapshot {path}: {e}")
+        return None, None
@@ -0,0 +1,145 @@
+# macOS Cleanup Tool
+# Copyright (c) 2025 XClassicPeter
+# Licensed under the MIT License. See LICENSE for details.
+
+"""
+Throttled scanning: caps the directories listed per second, backs off while
+the machine is busy and can drop the process to background CPU and I/O
+priority, so long-running scans (daemon.py, scheduled cli.py runs) go
+unnoticed.
+"""
+
+import os
+import sys
+import time
+import ctypes
+import logging
+import platform
+import threading
+
+LOAD_PER_CPU = 0.7    # back off while the 1-minute load average per CPU is above this
+IOWAIT_LIMIT = 0.2    # or while more than this share of CPU time waits on I/O (Linux)
+CHECK_INTERVAL = 2.0  # seconds between load checks
+MIN_FACTOR = 1 / 16   # never slow down below this share of the configured rate
+
+# ioprio_set(2) on Linux: idle class, for the whole process
+_IOPRIO_SYSCALL = {"x86_64": 251, "aarch64": 30, "arm64": 30}
+_IOPRIO_WHO_PROCESS = 1
+_IOPRIO_CLASS_IDLE = 3
+_IOPRIO_CLASS_SHIFT = 13
+# setiopolicy_np(3) on macOS: throttled disk I/O, for the whole process
+_IOPOL_TYPE_DISK = 0
+_IOPOL_SCOPE_PROCESS = 0
+_IOPOL_THROTTLE = 3
+
+
+def _cpu_times():
+    """(iowait, total) jiffies from /proc/stat, or None where it doesn't exist."""
+    try:
+        with open("/proc/stat") as f:
+            fields = [int(v) for v in f.readline().split()[1:]]
+    except (OSError, ValueError):
+        return None
+    return fields[4], sum(fields)
+
+
+class Throttle:
+    """
+    Token bucket of directory operations. wait() takes one token, sleeping
+    once the bucket is empty; the refill rate drops by half each check that
+    finds the system busy and recovers gradually once it is quiet again.
+    """
+
+    def __init__(self, ops_per_sec):
+        self.rate = float(ops_per_sec)
+        self.capacity = max(1.0, self.rate / 10)  # allow bursts of a tenth of a second
+        self.tokens = self.capacity
+        self.factor = 1.0
+        self.last = time.monotonic()
+        self.next_check = self.last
+        self.cpu = _cpu_times()
+        self.lock = threading.Lock()
+
+    def busy(self):
+        try:
+            load = os.getloadavg()[0] / (os.cpu_count() or 1)
+        except OSError:
+            load = 0.0
+        iowait = 0.0
+        cpu = _cpu_times()
+        if cpu is not None and self.cpu is not None and cpu[1] > self.cpu[1]:
+            iowait = (cpu[0] - self.cpu[0]) / (cpu[1] - self.cpu[1])
+        self.cpu = cpu
+        return load > LOAD_PER_CPU or iowait > IOWAIT_LIMIT
+
+    def wait(self):
+        with self.lock:
+            now = time.monotonic()
+            if now >= self.next_check:
+                self.next_check = now + CHECK_INTERVAL
+                factor = max(MIN_FACTOR, self.factor / 2) if self.busy() else min(1.0, self.factor * 1.25)
+                if factor != self.factor:
+                    logging.getLogger(__name__).debug(f"Scan rate now {self.rate * factor:.0f} directories/s")
+                self.factor = factor
+            rate = self.rate * self.factor
+            self.tokens = min(self.capacity, self.tokens + (now - self.last) * rate)
+            self.last = now
+            self.tokens -= 1
+            delay = -self.tokens / rate if self.tokens < 0 else 0
+        if delay:
+            time.sleep(delay)
+
+
+_active = None
+
+
+def configure(ops_per_sec):
+    """Cap scanning at ops_per_sec directory listings per second; 0 or None turns throttling off."""
+    global _active
+    _active = Throttle(ops_per_sec) if ops_per_sec else None
+    logging.getLogger(__name__).info(
+        f"Scan throttle {'set to ' + str(ops_per_sec) + ' directories/s' if ops_per_sec else 'off'}"
+    )
+
+
+def active():
+    return _active is not None
+
+
+def wait():
+    """Called by the scanner before each directory it lists."""
+    throttle = _active
+    if throttle is not None:
+        throttle.wait()
+
+
+def lower_priority():
+    """
+    Drop this process to background CPU priority (nice 10) and idle or
+    throttled I/O priority. This cannot be undone without privileges, so only
+    processes that do nothing but scan should call it.
+    """
+    logger = logging.getLogger(__name__)
+    try:
+        os.nice(10)
+    except OSError as e:
+        logger.warning(f"Cannot lower CPU priority: {e}")
+    try:
+        libc = ctypes.CDLL(None, use_errno=True)
+        if sys.platform == "darwin":
+            result = libc.setiopolicy_np(_IOPOL_TYPE_DISK, _IOPOL_SCOPE_PROCESS, _IOPOL_THROTTLE)
+        elif sys.platform.startswith("linux") and platform.machine() in _IOPRIO_SYSCALL:
+            result = libc.syscall(
+                _IOPRIO_SYSCALL[platform.machine()], _IOPRIO_WHO_PROCESS, 0,
+                _IOPRIO_CLASS_IDLE << _IOPRIO_CLASS_SHIFT
+            )
+        else:
+            logger.info("Lowering I/O priority is not supported on this platform")
+            return
+    except (OSError, AttributeError) as e:
+        logger.warning(f"Cannot lower I/O priority: {e}")
+        return
+    if result != 0:
+        logger.warning(f"Cannot lower I/O priority: {os.strerror(ctypes.get_errno())}")
+    else:
+        logger.info("Running at background CPU and I/O priority")
@@ -0,0 +1,412 @@
+# macOS Cleanup Tool
+# Copyright (c) 2025 XClassicPeter
+# Licensed under the MIT License. See LICENSE for details.
+
+"""
+Live updates of scan results. A watch backend reports directories whose
+contents changed (inotify on Linux, FSEvents on macOS, periodic polling
+elsewhere), and LiveUpdater re-measures only the result rows those changes
+fall under.
+"""
+
+import os
+import sys
+import time
+import ctypes
+import select
+import struct
+import logging
+import threading
+
+from scanner import measure, size_to_bytes, format_size, _should_exclude
+import throttle
+
+DEBOUNCE = 2.0        # seconds of changes gathered before re-measuring
+POLL_INTERVAL = 30.0  # seconds between walks of the polling backend
+FSEVENTS_LATENCY = 1.0
+
+
+class WatchBackend:
+    """
+    Watches directory trees and calls on_change(directory) from its own
+    thread whenever an entry in directory is created, removed, renamed or
+    written. Subclasses implement start(roots) and stop().
+    """
+
+    def __init__(self, on_change, exclusions=()):
+        self.logger = logging.getLogger(__name__)
+        self.on_change = on_change
+        self.exclusions = list(exclusions)
+
+    def start(self, roots):
+        raise NotImplementedError
+
+    def stop(self):
+        raise NotImplementedError
+
+
+# inotify(7) event bits
+_IN_MODIFY = 0x00000002
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_FROM = 0x00000040
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+_IN_DELETE_SELF = 0x00000400
+_IN_Q_OVERFLOW = 0x00004000
+_IN_IGNORED = 0x00008000
+_IN_ONLYDIR = 0x01000000
+_IN_EXCL_UNLINK = 0x04000000
+_IN_ISDIR = 0x40000000
+_IN_NONBLOCK = os.O_NONBLOCK
+_IN_CLOEXEC = 0o2000000
+_INOTIFY_MASK = (
+    _IN_MODIFY | _IN_CLOSE_WRITE | _IN_MOVED_FROM | _IN_MOVED_TO | _IN_CREATE | _IN_DELETE
+    | _IN_DELETE_SELF | _IN_ONLYDIR | _IN_EXCL_UNLINK
+)
+_EVENT = struct.Struct("iIII")  # wd, mask, cookie, len; followed by the name
+
+
+class InotifyBackend(WatchBackend):
+    """inotify(7) through ctypes; one watch per directory, added as directories appear."""
+
+    def start(self, roots):
+        self.libc = ctypes.CDLL(None, use_errno=True)
+        self.fd = self.libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.roots = list(roots)
+        self.watches = {}  # watch descriptor -> directory
+        self.full = False
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stopped.set()
+        self.thread.join(timeout=2)
+
+    def _add_tree(self, root):
+        for dirpath, dirs, _ in os.walk(root):
+            if self.stopped.is_set() or self.full:
+                return
+            wd = self.libc.inotify_add_watch(self.fd, os.fsencode(dirpath), _INOTIFY_MASK)
+            if wd < 0:
+                errno = ctypes.get_errno()
+                if errno == 28:  # ENOSPC: out of watches
+                    self.full = True
+                    self.logger.warning(
+                        f"inotify watch limit reached at {dirpath} ({len(self.watches)} watches); raise "
+                        f"fs.inotify.max_user_watches to see changes everywhere"
+                    )
+                    return
+                dirs[:] = []
+                continue
+            self.watches[wd] = dirpath
+            dirs[:] = [d for d in dirs if not _should_exclude(os.path.join(dirpath, d), self.exclusions)]
+
+    def _run(self):
+        try:
+            for root in self.roots:
+                self._add_tree(root)
+            self.logger.info(f"Watching {len(self.watches)} directories with inotify")
+            while not self.stopped.is_set():
+                ready, _, _ = select.select([self.fd], [], [], 0.5)
+                if not ready:
+                    continue
+                try:
+                    data = os.read(self.fd, 64 * 1024)
+                except BlockingIOError:
+                    continue
+                self._dispatch(data)
+        finally:
+            os.close(self.fd)
+
+    def _dispatch(self, data):
+        offset = 0
+        while offset + _EVENT.size <= len(data):
+            wd, mask, _, length = _EVENT.unpack_from(data, offset)
+            name = data[offset + _EVENT.size:offset + _EVENT.size + length].split(b"\0", 1)[0]
+            offset += _EVENT.size + length
+            if mask & _IN_Q_OVERFLOW:
+                self.logger.warning("inotify queue overflowed; treating every watched root as changed")
+                for root in self.roots:
+                    self.on_change(root)
+                continue
+            directory = self.watches.get(wd)
+            if directory is None:
+                continue
+            if mask & _IN_IGNORED:
+                del self.watches[wd]
+                continue
+            self.on_change(directory)
+            if mask & _IN_ISDIR and mask & (_IN_CREATE | _IN_MOVED_TO):
+                path = os.path.join(directory, os.fsdecode(name))
+                if not _should_exclude(path, self.exclusions):
+                    self._add_tree(path)
+
+
+class FSEventsBackend(WatchBackend):
+    """macOS FSEvents through ctypes; one stream for all roots, run on its own CFRunLoop."""
+
+    _CALLBACK = ctypes.CFUNCTYPE(
+        None, ctypes.c_void_p, ctypes.c_void_p, ctypes.c_size_t,
+        ctypes.POINTER(ctypes.c_char_p), ctypes.POINTER(ctypes.c_uint32), ctypes.POINTER(ctypes.c_uint64)
+    )
+    _SINCE_NOW = 0xFFFFFFFFFFFFFFFF
+    _UTF8 = 0x08000100
+    _FLAG_NO_DEFER = 0x00000002
+
+    def start(self, roots):
+        cf = ctypes.CDLL("/System/Library/Frameworks/CoreFoundation.framework/CoreFoundation")
+        cs = ctypes.CDLL("/System/Library/Frameworks/CoreServices.framework/CoreServices")
+        cf.CFStringCreateWithCString.restype = ctypes.c_void_p
+        cf.CFStringCreateWithCString.argtypes = [ctypes.c_void_p, ctypes.c_char_p, ctypes.c_uint32]
+        cf.CFArrayCreate.restype = ctypes.c_void_p
+        cf.CFArrayCreate.argtypes = [ctypes.c_void_p, ctypes.POINTER(ctypes.c_void_p), ctypes.c_long, ctypes.c_void_p]
+        cf.CFRunLoopGetCurrent.restype = ctypes.c_void_p
+        cf.CFRunLoopRun.restype = None
+        cf.CFRunLoopStop.argtypes = [ctypes.c_void_p]
+        cf.CFRelease.argtypes = [ctypes.c_void_p]
+        cs.FSEventStreamCreate.restype = ctypes.c_void_p
+        cs.FSEventStreamCreate.argtypes = [
+            ctypes.c_void_p, self._CALLBACK, ctypes.c_void_p, ctypes.c_void_p,
+            ctypes.c_uint64, ctypes.c_double, ctypes.c_uint32
+        ]
+        cs.FSEventStreamScheduleWithRunLoop.argtypes = [ctypes.c_void_p, ctypes.c_void_p, ctypes.c_void_p]
+        cs.FSEventStreamStart.argtypes = [ctypes.c_void_p]
+        for name in ("FSEventStreamStop", "FSEventStreamInvalidate", "FSEventStreamRelease"):
+            getattr(cs, name).argtypes = [ctypes.c_void_p]
+        self.cf, self.cs = cf, cs
+        self.roots = list(roots)
+        self.callback = self._CALLBACK(self._events)  # kept referenced for as long as the stream lives
+        self.run_loop = None
+        self.ready = threading.Event()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+        self.ready.wait(timeout=5)
+
+    def stop(self):
+        if self.run_loop is not None:
+            self.cf.CFRunLoopStop(self.run_loop)
+        self.thread.join(timeout=2)
+
+    def _run(self):
+        cf, cs = self.cf, self.cs
+        strings = [cf.CFStringCreateWithCString(None, os.fsencode(root), self._UTF8) for root in self.roots]
+        values = (ctypes.c_void_p * len(strings))(*strings)
+        callbacks = ctypes.c_void_p.in_dll(cf, "kCFTypeArrayCallBacks")
+        paths = cf.CFArrayCreate(None, values, len(strings), ctypes.addressof(callbacks))
+        stream = cs.FSEventStreamCreate(
+            None, self.callback, None, paths, self._SINCE_NOW, FSEVENTS_LATENCY, self._FLAG_NO_DEFER
+        )
+        self.run_loop = cf.CFRunLoopGetCurrent()
+        mode = ctypes.c_void_p.in_dll(cf, "kCFRunLoopDefaultMode")
+        cs.FSEventStreamScheduleWithRunLoop(stream, self.run_loop, mode)
+        cs.FSEventStreamStart(stream)
+        self.logger.info(f"Watching {len(self.roots)} roots with FSEvents")
+        self.ready.set()
+        try:
+            cf.CFRunLoopRun()
+        finally:
+            cs.FSEventStreamStop(stream)
+            cs.FSEventStreamInvalidate(stream)
+            cs.FSEventStreamRelease(stream)
+            cf.CFRelease(paths)
+            for string in strings:
+                cf.CFRelease(string)
+
+    def _events(self, stream, info, count, paths, flags, ids):
+        for i in range(count):
+            directory = os.fsdecode(paths[i]).rstrip(os.sep) or os.sep
+            if not _should_exclude(directory, self.exclusions):
+                self.on_change(directory)
+
+
+class PollingBackend(WatchBackend):
+    """
+    Walks the roots every POLL_INTERVAL seconds and compares directory mtimes,
+    so it sees entries added, removed or renamed but not files rewritten in place.
+    """
+
+    def start(self, roots):
+        self.roots = list(roots)
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stopped.set()
+        self.thread.join(timeout=2)
+
+    def _snapshot(self):
+        mtimes = {}
+        for root in self.roots:
+            for dirpath, dirs, _ in os.walk(root):
+                if self.stopped.is_set():
+                    return mtimes
+                throttle.wait()
+                try:
+                    mtimes[dirpath] = os.lstat(dirpath).st_mtime_ns
+                except OSError:
+                    continue
+                dirs[:] = [d for d in dirs if not _should_exclude(os.path.join(dirpath, d), self.exclusions)]
+        return mtimes
+
+    def _run(self):
+        before = self._snapshot()
+        self.logger.info(f"Polling {len(before)} directories for changes every {POLL_INTERVAL:.0f}s")
+        while not self.stopped.wait(POLL_INTERVAL):
+            after = self._snapshot()
+            if self.stopped.is_set():
+                return
+            for directory, mtime in after.items():
+                if before.get(directory) != mtime:
+                    self.on_change(directory)
+            for directory in before.keys() - after.keys():
+                self.on_change(os.path.dirname(directory))
+            before = after
+
+
+def create_backend(on_change, exclusions=()):
+    """The best watch backend for this platform."""
+    if sys.platform.startswith("linux") and hasattr(ctypes.CDLL(None), "inotify_init1"):
+        return InotifyBackend(on_change, exclusions)
+    if sys.platform == "darwin":
+        return FSEventsBackend(on_change, exclusions)
+    return PollingBackend(on_change, exclusions)
+
+
+# Rows whose figures are not simply the size of their folder (member files,
+# exclusive bytes, disk image accounting); measuring the folder would be wrong
+ACCOUNTED_FIELDS = ("members", "shared", "reclaimable", "logical")
+
+
+def watchable(item):
+    """Whether item is a plain folder row that re-measuring its path keeps correct."""
+    if item.get("folded") or item.get("pending") or item.get("approx"):
+        return False
+    return not any(item.get(k) for k in ACCOUNTED_FIELDS)
+
+
+class LiveUpdater:
+    """
+    Keeps scan results current after a scan. Each changed directory marks the
+    deepest result row containing it dirty; dirty rows are re-measured and
+    every row above them is adjusted by the difference instead of being
+    walked again. Only watchable() rows are tracked. update_callback(item,
+    fields) is called from a background thread for every row whose figures
+    changed.
+    """
+
+    def __init__(self, items, update_callback, exclusions=()):
+        self.logger = logging.getLogger(__name__)
+        self.update_callback = update_callback
+        self.exclusions = list(exclusions)
+        self.rows = {}  # path -> [item, ...]; system scans can list a path under several categories
+        self.bytes = {}  # path -> bytes as last measured here
+        self.files = {}
+        for item in items:
+            if not watchable(item):
+                continue
+            self.rows.setdefault(item["path"], []).append(item)
+            self.bytes[item["path"]] = item.get("bytes") or size_to_bytes(item["size"])
+            self.files[item["path"]] = item.get("files", 0)
+        self.dirty = set()
+        self.lock = threading.Lock()
+        self.wake = threading.Event()
+        self.stopped = threading.Event()
+        self.backend = None
+
+    def roots(self):
+        """The outermost directories among the rows; watching them covers every row."""
+        roots = []
+        for path in sorted(p for p in self.rows if os.path.isdir(p)):
+            if not roots or not path.startswith(roots[-1].rstrip(os.sep) + os.sep):
+                roots.append(path)
+        return roots
+
+    def start(self):
+        roots = self.roots()
+        if not roots:
+            return
+        self.backend = create_backend(self.changed, self.exclusions)
+        try:
+            self.backend.start(roots)
+        except (OSError, AttributeError) as e:
+            self.logger.warning(f"{type(self.backend).__name__} unavailable ({e}); polling for changes instead")
+            self.backend = PollingBackend(self.changed, self.exclusions)
+            self.backend.start(roots)
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def stop(self):
+        self.stopped.set()
+        self.wake.set()
+        if self.backend is not None:
+            self.backend.stop()
+
+    def changed(self, directory):
+        with self.lock:
+            self.dirty.add(directory)
+        self.wake.set()
+
+    def _owner(self, path):
+        """The deepest row at or above path, or None."""
+        while True:
+            if path in self.rows:
+                return path
+            parent = os.path.dirname(path)
+            if parent == path:
+                return None
+            path = parent
+
+    def _run(self):
+        while not self.stopped.is_set():
+            self.wake.wait()
+            if self.stopped.wait(DEBOUNCE):  # let a burst of changes settle
+                return
+            self.wake.clear()
+            with self.lock:
+                dirty, self.dirty = self.dirty, set()
+            self._refresh(dirty)
+
+    def _refresh(self, dirty):
+        owners = {owner for owner in map(self._owner, dirty) if owner is not None}
+        if not owners:
+            return
+        started = time.monotonic()
+        deltas = {}
+        for path in sorted(owners, key=lambda p: p.count(os.sep), reverse=True):
+            if self.stopped.is_set():
+                return
+            fields = measure(path)
+            delta = (fields["bytes"] - self.bytes[path], fields["files"] - self.files[path], fields["mtime"])
+            self.bytes[path], self.files[path] = fields["bytes"], fields["files"]
+            self._update(path, fields)
+            deltas[path] = delta
+        above = {}
+        for path, (byte_delta, file_delta, mtime) in deltas.items():
+            # Each row between this owner and the next re-measured one above it
+            # gets its change; that owner's own measurement already includes it
+            parent = os.path.dirname(path)
+            while parent != path and parent not in owners:
+                if parent in self.rows:
+                    total, files, newest = above.get(parent, (0, 0, 0.0))
+                    above[parent] = (total + byte_delta, files + file_delta, max(newest, mtime))
+                path, parent = parent, os.path.dirname(parent)
+        for path, (byte_delta, file_delta, mtime) in above.items():
+            self.bytes[path] = max(0, self.bytes[path] + byte_delta)
+            self.files[path] = max(0, self.files[path] + file_delta)
+            self._update(path, {
+                "size": format_size(self.bytes[path]), "bytes": self.bytes[path], "files": self.files[path],
+                "mtime": max(self.rows[path][0].get("mtime", 0.0), mtime)
+            })
+        self.logger.info(
+            f"Re-measured {len(owners)} changed folders, adjusted {len(above)} above them "
+            f"in {time.monotonic() - started:.2f}s"
+        )
+
+    def _update(self, path, fields):
+        for item in self.rows.get(path, []):
+            if any(item.get(k) != v for k, v in fields.items()):
+                self.update_callback(item, fields)
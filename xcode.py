@@ -0,0 +1,104 @@
+# macOS Cleanup Tool
+# Copyright (c) 2025 XClassicPeter
+# Licensed under the MIT License. See LICENSE for details.
+
+"""
+Per-project breakdown of Xcode's DerivedData and Archives. Each DerivedData
+folder records the workspace it was built from in info.plist, and each
+.xcarchive its app name, version and creation date in Info.plist, so stale
+projects can be told apart from the one being built today.
+"""
+
+import os
+import time
+import calendar
+import plistlib
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from scanner import measure, TARGET_WORKERS
+
+HOME = os.path.expanduser("~")
+
+
+def _plist(path):
+    try:
+        with open(path, "rb") as f:
+            return plistlib.load(f)
+    except (OSError, plistlib.InvalidFileException, ValueError) as e:
+        logging.getLogger(__name__).debug(f"Cannot read {path}: {e}")
+        return {}
+
+
+def _timestamp(value):
+    """plistlib dates are naive UTC datetimes; returns seconds since the epoch or 0."""
+    try:
+        return calendar.timegm(value.utctimetuple())
+    except AttributeError:
+        return 0.0
+
+
+def _short(path):
+    return "~" + path[len(HOME):] if path.startswith(HOME + os.sep) else path
+
+
+def derived_data(root):
+    """[(folder, label)] for each project folder in a DerivedData directory."""
+    entries = []
+    try:
+        names = sorted(os.listdir(root))
+    except OSError:
+        return entries
+    for name in names:
+        path = os.path.join(root, name)
+        if not os.path.isdir(path):
+            continue
+        workspace = _plist(os.path.join(path, "info.plist")).get("WorkspacePath")
+        if not workspace:
+            # ModuleCache.noindex, SymbolCache.noindex and the like are shared by every project
+            entries.append((path, f"{name} (shared)"))
+            continue
+        project = os.path.splitext(os.path.basename(workspace))[0]
+        gone = "" if os.path.exists(workspace) else ", project no longer exists"
+        entries.append((path, f"{project} ({_short(workspace)}{gone})"))
+    return entries
+
+
+def archives(root):
+    """[(archive path, label, created)] for each .xcarchive under an Archives directory (grouped by date folders)."""
+    entries = []
+    for dirpath, dirs, _ in os.walk(root):
+        for name in [d for d in dirs if d.endswith(".xcarchive")]:
+            path = os.path.join(dirpath, name)
+            info = _plist(os.path.join(path, "Info.plist"))
+            app = info.get("Name") or os.path.splitext(name)[0]
+            version = (info.get("ApplicationProperties") or {}).get("CFBundleShortVersionString")
+            entries.append((path, f"{app} {version}" if version else app, _timestamp(info.get("CreationDate"))))
+        dirs[:] = [d for d in dirs if not d.endswith(".xcarchive")]
+    return entries
+
+
+def xcode_items(derived_roots=(), archive_roots=(), workers=TARGET_WORKERS):
+    """One row per DerivedData project and per archive, sized in parallel, with its last build or archive date."""
+    logger = logging.getLogger(__name__)
+    rows = [(path, label, 0.0, "Xcode DerivedData") for root in derived_roots for path, label in derived_data(root)]
+    rows += [(path, label, created, "Xcode Archive") for root in archive_roots for path, label, created in archives(root)]
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        sizes = list(pool.map(lambda row: measure(row[0]), rows))
+    items = []
+    for (path, label, created, category), fields in zip(rows, sizes):
+        if not fields["bytes"]:
+            continue
+        # Builds write into the folder, so its newest file is the last build
+        when = created or fields["mtime"]
+        verb = "archived" if category == "Xcode Archive" else "built"
+        items.append(dict(fields, **{
+            "category": category,
+            "name": f"{label}, {verb} {time.strftime('%Y-%m-%d %H:%M', time.localtime(when))}",
+            "short_name": label.split(" (")[0],
+            "path": path,
+            "mtime": when,
+            "atime": when,  # indexing and opening the project read these files; only builds count as use
+        }))
+    logger.info(f"Sized {len(rows)} Xcode DerivedData folders and archives")
+    return items